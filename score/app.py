@@ -1,19 +1,192 @@
 import os
+import re
+import asyncio
+import json
 import time
+import uuid
 import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional, Union, List, Dict
+from contextlib import asynccontextmanager
+from typing import Any, Optional, Union, List, Dict, Iterator, Literal, Tuple
 from collections import Counter
 
 import cv2
+import numpy as np
 import mediapipe as mp
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, PlainTextResponse
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError
 
 from score.utils import landmark
-from features import frame_features_from_xyvis, Estimator
+from score.annotate import AnnotatedVideoWriter
+from score.pipeline import max_in_flight, run_pipeline
+from score.workers import PoolSaturated, PoolUnavailable, PoseWorkerPool, run_with_pose
+from score.jobs import Job, JobQueue, JobQueueFull, Progress
+from score.upload import StreamedUpload, UploadError, UploadTooLarge, read_body, receive_upload
+from score.landmarks import LandmarkPayloadError, decode_landmarks, detected_frames, to_pixels
+from score.cache import ResultCache, cache_key
+from score.columns import FrameSeries
+from score.store import LandmarkStore, file_sha256
+from score.sessions import Session, SessionLimitReached, SessionRegistry
+from score.roi import PersonRoi
+from score.early_exit import EarlyExit, EarlyExitMonitor
+from score.video import DecodeCounter, FrameSource, VideoMeta, open_frame_source, probe_video
+from score.metrics import STAGE_BUCKETS, Counter as MetricCounter, CounterFunc, Gauge, Histogram, Registry, StageTimer
+from features import frame_features_from_xyvis, frame_features_batch, score_sequence, Estimator
 
-app = FastAPI(title="Score API")
+# analyses run in a process pool with warm Pose models; SCORE_POOL_SIZE=0 runs them in a thread
+POOL_SIZE = int(os.environ.get("SCORE_POOL_SIZE", str(os.cpu_count() or 1)))
+POOL_MAX_QUEUED = int(os.environ.get("SCORE_POOL_MAX_QUEUED", str(POOL_SIZE)))
+POOL_WARM_COMPLEXITIES = [int(c) for c in os.environ.get("SCORE_POOL_WARM_COMPLEXITIES", "0").split(",") if c.strip()]
+
+# real-time /ws/score sessions, each holding its own Pose + Estimator in this process
+WS_MAX_SESSIONS = int(os.environ.get("SCORE_WS_MAX_SESSIONS", "8"))
+WS_IDLE_TIMEOUT_SECONDS = float(os.environ.get("SCORE_WS_IDLE_TIMEOUT_SECONDS", "30"))
+WS_MAX_FRAME_BYTES = int(os.environ.get("SCORE_WS_MAX_FRAME_BYTES", str(2 * 1024 * 1024)))
+
+# /api/score results by upload hash + parameters: in-memory LRU, plus a disk tier when
+# SCORE_CACHE_DIR is set. SCORE_CACHE_ENTRIES=0 without a dir disables caching.
+CACHE_ENTRIES = int(os.environ.get("SCORE_CACHE_ENTRIES", "256"))
+CACHE_TTL_SECONDS = float(os.environ.get("SCORE_CACHE_TTL_SECONDS", "86400"))
+CACHE_DIR = os.environ.get("SCORE_CACHE_DIR") or None
+CACHE_DISK_MAX_BYTES = int(os.environ.get("SCORE_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+
+pool: Optional[PoseWorkerPool] = None
+jobs: Optional[JobQueue] = None
+sessions = SessionRegistry(WS_MAX_SESSIONS)
+results: Optional[ResultCache] = None
+if CACHE_ENTRIES > 0 or CACHE_DIR is not None:
+    results = ResultCache(CACHE_ENTRIES, CACHE_TTL_SECONDS, CACHE_DIR, CACHE_DISK_MAX_BYTES)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    global pool, jobs
+    if POOL_SIZE > 0:
+        pool = PoseWorkerPool(
+            POOL_SIZE,
+            max_queued=POOL_MAX_QUEUED,
+            warm_keys=[(c, 0.5, 0.5) for c in POOL_WARM_COMPLEXITIES],
+        )
+        await run_in_threadpool(pool.start)
+    jobs = JobQueue(JOB_CONCURRENCY, JOB_MAX_QUEUED, JOB_TTL_SECONDS, limits={"background": JOB_BACKGROUND_MAX})
+    await jobs.start()
+    try:
+        yield
+    finally:
+        await jobs.close()
+        jobs = None
+        sessions.close_all()
+        if pool is not None:
+            pool.close()
+            pool = None
+
+app = FastAPI(title="Score API", lifespan=lifespan)
+
+# Prometheus text metrics served on /metrics
+metrics = Registry()
+REQUESTS = metrics.register(
+    MetricCounter("score_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+)
+REQUEST_SECONDS = metrics.register(
+    Histogram(
+        "score_http_request_duration_seconds",
+        "HTTP request latency by route.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+        ("route",),
+    )
+)
+ANALYSES = metrics.register(
+    MetricCounter("score_analyses_total", "Scoring results by source (computed, memory, disk, coalesced).", ("source",))
+)
+FRAMES = metrics.register(MetricCounter("score_frames_total", "Video frames decoded / run through pose inference.", ("kind",)))
+STAGE_SECONDS = metrics.register(
+    Histogram("score_stage_seconds", "Per-frame time spent in each analysis stage.", STAGE_BUCKETS, ("stage",))
+)
+ANALYSIS_FPS = metrics.register(
+    Histogram(
+        "score_analysis_frames_per_second",
+        "Decoded frames per second of processing time, per analysis.",
+        (5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+    )
+)
+WS_FRAME_SECONDS = metrics.register(
+    Histogram("score_ws_frame_seconds", "Server time per /ws/score frame.", STAGE_BUCKETS)
+)
+metrics.register(
+    Gauge("score_pool_workers", "Pose worker processes.", lambda: {(): pool.size if pool is not None else 0})
+)
+metrics.register(
+    Gauge(
+        "score_pool_pending",
+        "Analyses running or queued in the worker pool.",
+        lambda: {(): pool.pending if pool is not None else 0},
+    )
+)
+metrics.register(Gauge("score_ws_sessions", "Open /ws/score sessions.", lambda: {(): len(sessions)}))
+metrics.register(
+    Gauge(
+        "score_jobs",
+        "Analysis jobs by status (finished ones until they expire).",
+        lambda: {(k,): v for k, v in jobs.counts().items()} if jobs is not None else {},
+        ("status",),
+    )
+)
+metrics.register(
+    CounterFunc(
+        "score_cache_events_total",
+        "Result cache lookups and evictions by outcome.",
+        lambda: {(k,): v for k, v in results.stats.as_dict().items()} if results is not None else {},
+        ("event",),
+    )
+)
+
+@app.middleware("http")
+async def record_requests(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        REQUESTS.inc(path, request.method, str(status))
+        REQUEST_SECONDS.observe(time.perf_counter() - t0, path)
+
+# annotated videos are kept here and served by /api/annotated/{name} until the TTL expires
+ANNOTATED_DIR = Path(os.environ.get("SCORE_ANNOTATED_DIR", Path(tempfile.gettempdir()) / "score-annotated"))
+ANNOTATED_TTL_SECONDS = float(os.environ.get("SCORE_ANNOTATED_TTL_SECONDS", "3600"))
+# uploads larger than this are rejected with 413 while streaming
+MAX_UPLOAD_BYTES = int(os.environ.get("SCORE_MAX_UPLOAD_BYTES", str(512 * 1024 * 1024)))
+# /api/score/landmarks bodies (33*3 float32 = 396 bytes per frame)
+MAX_LANDMARK_BYTES = int(os.environ.get("SCORE_MAX_LANDMARK_BYTES", str(64 * 1024 * 1024)))
+# when set, every /api/score analysis stores its landmarks here (see score.store) and
+# re-uploads of the same video with the same pose parameters skip pose inference
+LANDMARK_DIR = os.environ.get("SCORE_LANDMARK_DIR") or None
+# frames buffered between decode, pose and scoring stages
+PIPELINE_QUEUE_SIZE = int(os.environ.get("SCORE_PIPELINE_QUEUE_SIZE", "8"))
+# video decoding backend: auto (ffmpeg when the binary is found and runs, else OpenCV), ffmpeg or opencv
+FRAME_SOURCE = os.environ.get("SCORE_FRAME_SOURCE", "auto")
+FFMPEG_BIN = os.environ.get("SCORE_FFMPEG_BIN", "ffmpeg")
+# roi=true: long side of the person crop fed to pose inference, and of each search region
+# (whole frame, then tiles) used to find the person when there is no crop yet
+ROI_SIZE = int(os.environ.get("SCORE_ROI_SIZE", "384"))
+ROI_DETECT_SIZE = int(os.environ.get("SCORE_ROI_DETECT_SIZE", "960"))
+# /api/score/jobs: analyses run at once, jobs allowed to wait, how long finished jobs stay
+# pollable, and how many background jobs may run at once (the other runners stay free for
+# live and normal jobs)
+JOB_CONCURRENCY = int(os.environ.get("SCORE_JOB_CONCURRENCY", str(max(1, POOL_SIZE))))
+JOB_MAX_QUEUED = int(os.environ.get("SCORE_JOB_MAX_QUEUED", "64"))
+JOB_TTL_SECONDS = float(os.environ.get("SCORE_JOB_TTL_SECONDS", "3600"))
+JOB_BACKGROUND_MAX = int(os.environ.get("SCORE_JOB_BACKGROUND_MAX", str(max(1, JOB_CONCURRENCY - 1))))
+# wait before a job retries when the worker pool is saturated
+JOB_RETRY_SECONDS = float(os.environ.get("SCORE_JOB_RETRY_SECONDS", "0.5"))
+# how often a segmented job sums its segments' progress (and passes on a cancellation)
+JOB_PROGRESS_SECONDS = float(os.environ.get("SCORE_JOB_PROGRESS_SECONDS", "0.25"))
 
 class TemporalStats(BaseModel):
     dom_freq: Optional[float] = None
@@ -23,7 +196,9 @@ class TemporalStats(BaseModel):
 
 class ScoreSummary(BaseModel):
     frames_processed: int
+    frames_analyzed: Optional[int] = None
     input_fps: float
+    analyzed_fps: Optional[float] = None
     duration_seconds: float
     mode: str
     avg_score: Optional[float] = None
@@ -33,6 +208,32 @@ class ScoreSummary(BaseModel):
     last_conf: Optional[float] = None
     temporal_stats: Optional[TemporalStats] = None
     processing_time_seconds: float
+    stage_fps: Optional[Dict[str, float]] = None
+    # per-stage count / total_ms / mean_ms; only in responses that ask for timings
+    stage_timings: Optional[Dict[str, Dict[str, float]]] = None
+    # served from the result cache (or a concurrent identical request) instead of analyzed again
+    cached: bool = False
+    # stored landmarks of this analysis, for /api/rescore/{landmark_key}
+    landmark_key: Optional[str] = None
+    annotated_video_url: Optional[str] = None
+    # share of the video's frames covered by the result; below 1 when stopped early
+    analyzed_fraction: Optional[float] = None
+    stopped_early: bool = False
+    # stable, time_budget or frame_budget
+    stop_reason: Optional[str] = None
+    # full stage histograms for /metrics; travels with the summary out of pool workers
+    _timer: Optional[StageTimer] = PrivateAttr(default=None)
+    # (scores, confs, labels) per scored frame, for the batch results store (python -m batch)
+    _frames: Optional[FrameSeries] = PrivateAttr(default=None)
+
+def _record_analysis(summary: ScoreSummary) -> None:
+    FRAMES.inc("decoded", amount=summary.frames_processed)
+    FRAMES.inc("analyzed", amount=summary.frames_analyzed or 0)
+    if summary.processing_time_seconds > 0:
+        ANALYSIS_FPS.observe(summary.frames_processed / summary.processing_time_seconds)
+    if summary._timer is not None:
+        for stage, (count, seconds, counts) in summary._timer.stages.items():
+            STAGE_SECONDS.merge(count, seconds, counts, stage)
 
 def _temporal_stats_to_dict(med: Dict) -> Dict:
     return {
@@ -42,106 +243,161 @@ def _temporal_stats_to_dict(med: Dict) -> Dict:
         "hip_y_std_norm": med.get("hip_y_std_norm"),
     }
 
-def analyze_video(
-    input_path: Union[str, Path],
-    mode: str = "auto",
-    max_width: Optional[int] = None,
-    model_complexity: int = 0,
-    min_det_conf: float = 0.5,
-    min_track_conf: float = 0.5,
-    annotated_output_path: Optional[Union[str, Path]] = None,
-) -> ScoreSummary:
-    input_path = Path(input_path)
-    if not input_path.exists():
-        raise RuntimeError(f"Input file does not exist: {input_path}")
+def _sweep_annotated() -> None:
+    cutoff = time.time() - ANNOTATED_TTL_SECONDS
+    for p in ANNOTATED_DIR.glob("*.mp4"):
+        try:
+            if p.stat().st_mtime < cutoff:
+                p.unlink()
+        except OSError:
+            pass
 
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(
+# RGB frames at the analysis size; the ring covers every frame the decode -> pose -> score
+# pipeline can hold at once
+def _open_source(input_path: Union[str, Path], max_width: Optional[int], target_fps: Optional[float]) -> FrameSource:
+    return open_frame_source(
+        input_path,
+        max_width,
+        target_fps,
+        buffers=max_in_flight(2, PIPELINE_QUEUE_SIZE),
+        backend=FRAME_SOURCE,
+        ffmpeg=FFMPEG_BIN,
+    )
+
+def _open_pose(pose: Optional[Any], model_complexity: int, min_det_conf: float, min_track_conf: float) -> Tuple[Any, bool]:
+    # a caller-supplied (warm) Pose is reset for the new video and left open afterwards
+    if pose is not None:
+        pose.reset()
+        return pose, False
+    pose = mp.solutions.pose.Pose(
         static_image_mode=False,
         model_complexity=int(model_complexity),
         min_detection_confidence=float(min_det_conf),
         min_tracking_confidence=float(min_track_conf),
     )
-    connections = mp_pose.POSE_CONNECTIONS
-
-    cap = cv2.VideoCapture(str(input_path))
-    if not cap.isOpened():
-        pose.close()
-        raise RuntimeError(f"Cannot open {input_path}")
+    return pose, True
 
-    in_w: int = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    in_h: int = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps: float = cap.get(cv2.CAP_PROP_FPS) or 30.0
-    scale: float = 1.0
-    if max_width is not None and in_w > max_width:
-        scale = float(max_width) / float(in_w)
-    out_w: int = int(round(in_w * scale))
-    out_h: int = int(round(in_h * scale))
+# stored row for an analyzed frame where no person was found
+NO_POSE = np.full((33, 3), np.nan, dtype=np.float32)
 
-    out = None
+def _pose_landmarks(
+    pose: Any, rgb: np.ndarray, out_w: int, out_h: int, timer: Optional[StageTimer] = None
+) -> Optional[np.ndarray]:
+    t0 = time.perf_counter()
+    results = pose.process(rgb)
+    if timer is not None:
+        timer.observe("pose", time.perf_counter() - t0)
+    if not results.pose_landmarks:
+        return None
+    lm = results.pose_landmarks.landmark
+    if len(lm) < 33:
+        padded = list(lm) + [
+            mp.framework.formats.landmark_pb2.NormalizedLandmark()
+            for _ in range(33 - len(lm))
+        ]
+        lm = padded[:33]
+    return landmark(lm, out_w, out_h)
 
-    estimator = Estimator(fps=fps, window_seconds=3.0, stable_threshold=3, mode=mode)
+# (33, 3) normalized x, y and visibility as score.utils.landmark reads them, before scaling
+def _pose_normalized(pose: Any, image: np.ndarray, timer: Optional[StageTimer] = None) -> Optional[np.ndarray]:
+    t0 = time.perf_counter()
+    results = pose.process(image)
+    if timer is not None:
+        timer.observe("pose", time.perf_counter() - t0)
+    if not results.pose_landmarks:
+        return None
+    out = np.zeros((33, 3), dtype=np.float64)
+    for i, lm in enumerate(results.pose_landmarks.landmark[:33]):
+        out[i] = (lm.x, lm.y, getattr(lm, "visibility", None) or getattr(lm, "presence", None) or 1.0)
+    return out
 
-    frame_idx = 0
-    scores: List[int] = []
-    confs: List[float] = []
-    labels: List[str] = []
-    last_med = None
+# pose inference on the person crop (see score.roi); landmarks in frame pixels. When the
+# crop loses the person, the same frame goes to the search, starting with the whole frame.
+def _pose_landmarks_roi(
+    pose: Any, rgb: np.ndarray, roi: PersonRoi, timer: Optional[StageTimer] = None
+) -> Optional[np.ndarray]:
+    h, w = rgb.shape[:2]
+    while True:
+        full = roi.box is None
+        t0 = time.perf_counter()
+        image, box = roi.image(rgb)
+        if timer is not None:
+            timer.observe("roi", time.perf_counter() - t0)
+        norm = _pose_normalized(pose, image, timer)
+        if norm is None:
+            if full:
+                return None
+            roi.lost()
+            pose.reset()
+            continue
+        xyvis = roi.to_frame(norm, box, w, h)
+        # the tracker's state is in the old crop's coordinates
+        if roi.update(xyvis, w, h):
+            pose.reset()
+        return xyvis
 
-    start_time = time.time()
-    try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frame_idx += 1
-            frame_proc = cv2.resize(frame, (out_w, out_h)) if scale != 1.0 else frame
-            rgb = cv2.cvtColor(frame_proc, cv2.COLOR_BGR2RGB)
-            results = pose.process(rgb)
-            canvas = frame_proc.copy()
-
-            label = "unknown"
-            score = 0
-            conf = 0.0
-            if results.pose_landmarks:
-                lm = results.pose_landmarks.landmark
-                if len(lm) < 33:
-                    padded = list(lm) + [
-                        mp.framework.formats.landmark_pb2.NormalizedLandmark()
-                        for _ in range(33 - len(lm))
-                    ]
-                    lm = padded[:33]
-                xyvis = landmark(lm, out_w, out_h)
-
-                for a, b in connections:
-                    if a < 0 or b < 0 or a >= xyvis.shape[0] or b >= xyvis.shape[0]:
-                        continue
-                    xa, ya, va = xyvis[a]
-                    xb, yb, vb = xyvis[b]
-                    if va > 0.12 and vb > 0.12:
-                        cv2.line(canvas, (int(xa), int(ya)), (int(xb), int(yb)), (0, 200, 255), 2)
-                for _, (x, y, v) in enumerate(xyvis):
-                    c = (0, 255, 0) if v > 0.12 else (90, 90, 90)
-                    cv2.circle(canvas, (int(x), int(y)), 3, c, -1)
-
-                feat = frame_features_from_xyvis(xyvis)
-                estimator.push(feat)
-                label, score, conf = estimator.detect()
-                med = estimator._temporal_stats()
-                if med is not None:
-                    last_med = med
-
-                scores.append(int(score))
-                confs.append(float(conf))
-                labels.append(str(label))
+# scoring of collected (33, 3) landmarks, in order -> (scores, confs, labels, last stats)
+def _score_landmarks(
+    landmarks: Union[List[np.ndarray], np.ndarray],
+    fps: float,
+    mode: str,
+    offline: bool,
+    window_seconds: float = 3.0,
+    stable_threshold: int = 3,
+    timer: Optional[StageTimer] = None,
+) -> Tuple[List[int], List[float], List[str], Optional[Dict]]:
+    if len(landmarks) == 0:
+        return [], [], [], None
+    t0 = time.perf_counter()
+    if not offline:
+        estimator = Estimator(fps=fps, window_seconds=window_seconds, stable_threshold=stable_threshold, mode=mode)
+        scores: List[int] = []
+        confs: List[float] = []
+        labels: List[str] = []
+        last_med = None
+        for xyvis in landmarks:
+            estimator.push(frame_features_from_xyvis(xyvis))
+            label, score, conf = estimator.detect()
+            med = estimator._temporal_stats()
+            if med is not None:
+                last_med = med
+            scores.append(int(score))
+            confs.append(float(conf))
+            labels.append(str(label))
+        if timer is not None:
+            timer.observe("score_landmarks", time.perf_counter() - t0)
+        return scores, confs, labels, last_med
 
-    finally:
-        cap.release()
-        if out is not None:
-            out.release()
-        pose.close()
+    seq = score_sequence(
+        frame_features_batch(landmarks if isinstance(landmarks, np.ndarray) else np.stack(landmarks)),
+        fps=fps,
+        window_seconds=window_seconds,
+        stable_threshold=stable_threshold,
+        mode=mode,
+    )
+    if timer is not None:
+        timer.observe("score_sequence", time.perf_counter() - t0)
+    last_med = None
+    with_stats = np.flatnonzero(seq["has_stats"])
+    if with_stats.size:
+        last = int(with_stats[-1])
+        last_med = {k: float(v[last]) for k, v in seq["stats"].items()}
+    return seq["scores"].tolist(), seq["confs"].tolist(), [str(label) for label in seq["labels"]], last_med
 
-    processing_time = time.time() - start_time
+def _summarize(
+    fps: float,
+    analyzed_fps: float,
+    frames_processed: int,
+    frames_analyzed: int,
+    mode: str,
+    scores: List[int],
+    confs: List[float],
+    labels: List[str],
+    last_med: Optional[Dict],
+    processing_time: float,
+    stage_fps: Optional[Dict[str, float]],
+    timer: Optional[StageTimer] = None,
+) -> ScoreSummary:
     avg_score = float(sum(scores) / len(scores)) if scores else None
     max_score = int(max(scores)) if scores else None
     last_label = labels[-1] if labels else None
@@ -151,9 +407,11 @@ def analyze_video(
     temporal_stats = _temporal_stats_to_dict(last_med) if last_med is not None else None
 
     summary = ScoreSummary(
-        frames_processed=frame_idx,
+        frames_processed=frames_processed,
+        frames_analyzed=frames_analyzed,
         input_fps=float(fps),
-        duration_seconds=float(frame_idx) / float(fps) if fps > 0 else 0.0,
+        analyzed_fps=float(analyzed_fps),
+        duration_seconds=float(frames_processed) / float(fps) if fps > 0 else 0.0,
         mode=mode,
         avg_score=avg_score,
         max_score=max_score,
@@ -162,48 +420,998 @@ def analyze_video(
         last_conf=last_conf,
         temporal_stats=temporal_stats,
         processing_time_seconds=processing_time,
+        stage_fps=stage_fps,
+        stage_timings=timer.summary() if timer is not None else None,
     )
+    summary._timer = timer
+    summary._frames = (scores, confs, labels)
     return summary
 
-@app.post("/api/score", response_model=ScoreSummary)
-async def api_score(
-    file: UploadFile = File(...),
-    mode: str = Form("auto"),
-    max_width: Optional[int] = Form(None),
-    model_complexity: int = Form(0),
-    min_det_conf: float = Form(0.5),
-    min_track_conf: float = Form(0.5),
-    save_annotated: bool = Form(False),
-):
-    if not file.filename.lower().endswith((".mp4", ".mov", ".m4v")):
-        raise HTTPException(status_code=400, detail="Unsupported file extension. Please upload MP4/MOV/M4V.")
-
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
-            tmp_path = tmp.name
-            contents = await file.read()
-            tmp.write(contents)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save uploaded file: {e}")
+def _store_landmarks(
+    landmark_dir: Union[str, Path],
+    key: str,
+    xyvis: np.ndarray,
+    summary: ScoreSummary,
+    video_hash: str,
+    pose_params: Dict[str, Any],
+    size: Tuple[int, int],
+) -> None:
+    LandmarkStore(landmark_dir).save(
+        key,
+        xyvis,
+        {
+            "video_sha256": video_hash,
+            "input_fps": summary.input_fps,
+            "analyzed_fps": summary.analyzed_fps,
+            "frames_processed": summary.frames_processed,
+            "frames_analyzed": summary.frames_analyzed,
+            "width": size[0],
+            "height": size[1],
+            **pose_params,
+        },
+    )
 
-    try:
-        summary = analyze_video(
-            tmp_path,
+# score stored landmarks again (new mode/thresholds/scoring code) without decode or pose inference
+def rescore_landmarks(
+    landmark_dir: Union[str, Path],
+    key: str,
+    mode: str = "auto",
+    offline: bool = True,
+    window_seconds: float = 3.0,
+    stable_threshold: int = 3,
+) -> ScoreSummary:
+    start_time = time.time()
+    timer = StageTimer()
+    xyvis, meta = LandmarkStore(landmark_dir).load(key)
+    scores, confs, labels, last_med = _score_landmarks(
+        detected_frames(xyvis), meta["analyzed_fps"], mode, offline, window_seconds, stable_threshold, timer
+    )
+    summary = _summarize(
+        meta["input_fps"],
+        meta["analyzed_fps"],
+        meta["frames_processed"],
+        meta["frames_analyzed"],
+        mode,
+        scores,
+        confs,
+        labels,
+        last_med,
+        time.time() - start_time,
+        None,
+        timer,
+    )
+    # only complete passes are stored
+    summary.analyzed_fraction = 1.0
+    summary.landmark_key = key
+    return summary
+
+def analyze_video(
+    input_path: Union[str, Path],
+    mode: str = "auto",
+    max_width: Optional[int] = None,
+    model_complexity: int = 0,
+    min_det_conf: float = 0.5,
+    min_track_conf: float = 0.5,
+    annotated_output_path: Optional[Union[str, Path]] = None,
+    offline: bool = False,
+    target_fps: Optional[float] = None,
+    pose: Optional[Any] = None,
+    segments: int = 1,
+    landmark_dir: Optional[Union[str, Path]] = None,
+    video_hash: Optional[str] = None,
+    roi: bool = False,
+    progress: Optional[Progress] = None,
+    early_exit: Optional[EarlyExit] = None,
+) -> ScoreSummary:
+    # landmarks already stored for this video + pose parameters: score them, skip inference.
+    # Not under an early-exit rule, whose result covers only the frames up to the stop.
+    store_key: Optional[str] = None
+    pose_params = dict(
+        model_complexity=model_complexity,
+        min_det_conf=min_det_conf,
+        min_track_conf=min_track_conf,
+        max_width=max_width,
+        target_fps=target_fps,
+        roi=roi,
+    )
+    if landmark_dir is not None:
+        video_hash = video_hash or file_sha256(input_path)
+        store_key = LandmarkStore.key(video_hash, **pose_params)
+        if annotated_output_path is None and early_exit is None and store_key in LandmarkStore(landmark_dir):
+            return rescore_landmarks(landmark_dir, store_key, mode=mode, offline=offline)
+
+    # long videos: pose inference split over processes, scored as one sequence; early exit
+    # needs the frames in order, and a job's progress lives in this process, so those always
+    # run as one pass
+    if segments > 1 and annotated_output_path is None and pose is None and early_exit is None and progress is None:
+        return analyze_video_segmented(
+            input_path,
+            segments=segments,
             mode=mode,
             max_width=max_width,
             model_complexity=model_complexity,
             min_det_conf=min_det_conf,
             min_track_conf=min_track_conf,
+            offline=offline,
+            target_fps=target_fps,
+            landmark_dir=landmark_dir,
+            video_hash=video_hash,
+            roi=roi,
+        )
+
+    source = _open_source(input_path, max_width, target_fps)
+    meta = source.meta
+    pose, owns_pose = _open_pose(pose, model_complexity, min_det_conf, min_track_conf)
+    person = PersonRoi(ROI_SIZE, ROI_DETECT_SIZE) if roi else None
+
+    # annotated output is opt-in: no frame copy or drawing unless a path is given
+    out: Optional[AnnotatedVideoWriter] = None
+    if annotated_output_path is not None:
+        try:
+            out = AnnotatedVideoWriter(
+                annotated_output_path, meta.analyzed_fps, (meta.out_w, meta.out_h), mp.solutions.pose.POSE_CONNECTIONS
+            )
+        except Exception:
+            source.close()
+            if owns_pose:
+                pose.close()
+            raise
+
+    estimator = Estimator(fps=meta.analyzed_fps, window_seconds=3.0, stable_threshold=3, mode=mode)
+    monitor: Optional[EarlyExitMonitor] = None
+    if early_exit is not None:
+        monitor = early_exit.monitor(meta.analyzed_fps, warmup_frames=estimator.window_size)
+
+    counter = DecodeCounter(0)
+    scores: List[int] = []
+    confs: List[float] = []
+    labels: List[str] = []
+    last_med = None
+    # offline: keep the landmarks and score every window in one batched pass at the end;
+    # one row per analyzed frame (NO_POSE where nobody was found) when they are also stored
+    keep_rows = offline or landmark_dir is not None
+    rows: List[np.ndarray] = []
+    # per-frame time in each step; pose and score threads each touch only their own stages
+    timer = StageTimer()
+    clock = time.perf_counter
+
+    # decode (to RGB at the analysis size) -> pose.process -> scoring, each on its own thread;
+    # the decoder, cv2 and MediaPipe release the GIL, so the stages overlap
+    def infer(item: Tuple[int, np.ndarray]) -> Tuple[int, np.ndarray, Optional[np.ndarray]]:
+        idx, rgb = item
+        # frames still in flight after an early stop are dropped by score_frame anyway
+        if monitor is not None and monitor.stopped():
+            return idx, rgb, None
+        if person is not None:
+            return idx, rgb, _pose_landmarks_roi(pose, rgb, person, timer)
+        return idx, rgb, _pose_landmarks(pose, rgb, meta.out_w, meta.out_h, timer)
+
+    def score_frame(item: Tuple[int, np.ndarray, Optional[np.ndarray]]) -> None:
+        nonlocal last_med
+        idx, rgb, xyvis = item
+        if monitor is not None and monitor.stopped():
+            return
+        if out is not None:
+            t0 = clock()
+            # the writer draws on its frame later, on its own thread: give it a BGR copy,
+            # the decoder reuses rgb once it leaves the pipeline
+            out.submit(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR), xyvis)
+            timer.observe("annotate", clock() - t0)
+        if keep_rows:
+            rows.append(NO_POSE if xyvis is None else xyvis)
+        if xyvis is None or offline:
+            if monitor is not None:
+                monitor.frame(idx)
+            return
+        t0 = clock()
+        feat = frame_features_from_xyvis(xyvis)
+        t1 = clock()
+        estimator.push(feat)
+        label, score, conf = estimator.detect()
+        med = estimator._temporal_stats()
+        timer.observe("features", t1 - t0)
+        timer.observe("estimator", clock() - t1)
+        if med is not None:
+            last_med = med
+
+        scores.append(int(score))
+        confs.append(float(conf))
+        labels.append(str(label))
+        if monitor is not None:
+            monitor.frame(idx, labels[-1], scores[-1])
+
+    # frames decoded so far against the container's frame count; stops at cancellation
+    # and when the early-exit rule is met
+    def frames() -> Iterator[Tuple[int, np.ndarray]]:
+        for item in source.frames(counter, timer):
+            if progress is not None:
+                progress.update(counter.frame_idx, meta.frame_count)
+                progress.check()
+            if monitor is not None and monitor.stopped():
+                return
+            yield item
+
+    start_time = time.time()
+    try:
+        stage_stats = run_pipeline(
+            source.frames(counter, timer) if progress is None and monitor is None else frames(),
+            [("pose", infer), ("score", score_frame)],
+            source_name="decode",
+            maxsize=PIPELINE_QUEUE_SIZE,
+        )
+    finally:
+        # each release runs even if an earlier one raises (e.g. the annotation writer failed)
+        try:
+            source.close()
+        finally:
+            try:
+                if out is not None:
+                    out.close()
+            finally:
+                if owns_pose:
+                    pose.close()
+
+    xyvis_all = np.stack(rows) if rows else np.zeros((0, 33, 3), dtype=np.float32)
+    if offline:
+        scores, confs, labels, last_med = _score_landmarks(
+            detected_frames(xyvis_all), meta.analyzed_fps, mode, offline=True, timer=timer
+        )
+
+    # after an early stop the result covers the frames up to the last one scored
+    stopped = monitor is not None and monitor.reason is not None
+    frames_end, frames_analyzed = (monitor.end, monitor.frames) if stopped else (counter.frame_idx, counter.analyzed)
+    summary = _summarize(
+        meta.fps,
+        meta.analyzed_fps,
+        frames_end,
+        frames_analyzed,
+        mode,
+        scores,
+        confs,
+        labels,
+        last_med,
+        time.time() - start_time,
+        {st.name: st.items_per_second for st in stage_stats},
+        timer,
+    )
+    if meta.frame_count > 0:
+        summary.analyzed_fraction = min(1.0, frames_end / meta.frame_count)
+    if stopped:
+        summary.stopped_early = True
+        summary.stop_reason = monitor.reason
+    # partial landmarks are not stored as if they covered the whole video
+    if store_key is not None and not stopped:
+        _store_landmarks(landmark_dir, store_key, xyvis_all, summary, video_hash, pose_params, (meta.out_w, meta.out_h))
+        summary.landmark_key = store_key
+    return summary
+
+# Segment plan for split-and-merge analysis: [start, end) frame ranges, each preceded by
+# one Estimator window of warm-up frames so the pose tracker is already locked on at `start`.
+# Scoring runs over the merged landmarks, so the result differs from a serial run only where
+# MediaPipe's tracker places a segment's first landmarks differently; with a stateless pose
+# model it is identical (tests/test_segments.py).
+def plan_segments(
+    input_path: Union[str, Path], segments: int, target_fps: Optional[float] = None
+) -> Tuple[VideoMeta, List[Dict[str, int]]]:
+    meta = probe_video(input_path, None, target_fps)
+    total = meta.frame_count
+    window_frames = Estimator(fps=meta.analyzed_fps, window_seconds=3.0).window_size * meta.stride
+    n = max(1, min(int(segments), total // max(1, 2 * window_frames))) if total > 0 else 1
+    bounds = [round(i * total / n) for i in range(n + 1)]
+    plan = []
+    for i in range(n):
+        start = bounds[i]
+        warmup = min(start, window_frames)
+        plan.append(
+            {
+                "start_frame": start,
+                "end_frame": bounds[i + 1] if i + 1 < n else -1,
+                "warmup_frames": warmup,
+            }
+        )
+    return meta, plan
+
+# pose inference over one segment: landmarks of the frames in [start_frame, end_frame).
+# progress counts the segment's own frames (not the warm-up) and stops it when cancelled.
+def analyze_segment(
+    input_path: Union[str, Path],
+    start_frame: int,
+    end_frame: int,
+    warmup_frames: int = 0,
+    max_width: Optional[int] = None,
+    model_complexity: int = 0,
+    min_det_conf: float = 0.5,
+    min_track_conf: float = 0.5,
+    target_fps: Optional[float] = None,
+    pose: Optional[Any] = None,
+    roi: bool = False,
+    progress: Optional[Progress] = None,
+) -> Dict[str, Any]:
+    source = _open_source(input_path, max_width, target_fps)
+    meta = source.meta
+    pose, owns_pose = _open_pose(pose, model_complexity, min_det_conf, min_track_conf)
+    person = PersonRoi(ROI_SIZE, ROI_DETECT_SIZE) if roi else None
+    # the source seeks to the counter's start
+    counter = DecodeCounter(max(0, int(start_frame) - int(warmup_frames)))
+    rows: List[np.ndarray] = []
+    timer = StageTimer()
+
+    def infer(item: Tuple[int, np.ndarray]) -> Tuple[int, Optional[np.ndarray]]:
+        idx, rgb = item
+        if person is not None:
+            return idx, _pose_landmarks_roi(pose, rgb, person, timer)
+        return idx, _pose_landmarks(pose, rgb, meta.out_w, meta.out_h, timer)
+
+    def collect(item: Tuple[int, Optional[np.ndarray]]) -> None:
+        idx, xyvis = item
+        if idx >= start_frame:
+            rows.append(NO_POSE if xyvis is None else xyvis)
+
+    end = None if end_frame < 0 else int(end_frame)
+    total = max(0, (meta.frame_count if end is None else end) - int(start_frame))
+
+    def frames() -> Iterator[Tuple[int, np.ndarray]]:
+        for item in source.frames(counter, timer, end):
+            progress.update(min(total, max(0, counter.frame_idx - int(start_frame))), total)
+            progress.check()
+            yield item
+
+    try:
+        stage_stats = run_pipeline(
+            source.frames(counter, timer, end) if progress is None else frames(),
+            [("pose", infer), ("score", collect)],
+            source_name="decode",
+            maxsize=PIPELINE_QUEUE_SIZE,
+        )
+    finally:
+        try:
+            source.close()
+        finally:
+            if owns_pose:
+                pose.close()
+    return {
+        "frames_end": counter.frame_idx,
+        "size": (meta.out_w, meta.out_h),
+        "frames_analyzed": len(rows),
+        "landmarks": np.stack(rows) if rows else np.zeros((0, 33, 3), dtype=np.float32),
+        "stages": {st.name: (st.items, st.busy_seconds) for st in stage_stats},
+        "timer": timer,
+    }
+
+# concatenate segment landmarks in order and score them as one sequence
+def merge_segments(
+    meta: VideoMeta,
+    results: List[Dict[str, Any]],
+    mode: str,
+    offline: bool,
+    processing_time: float,
+    landmark_dir: Optional[Union[str, Path]] = None,
+    video_hash: Optional[str] = None,
+    pose_params: Optional[Dict[str, Any]] = None,
+) -> ScoreSummary:
+    xyvis_all = np.concatenate([r["landmarks"] for r in results])
+    timer = StageTimer()
+    for r in results:
+        timer.merge(r["timer"])
+    scores, confs, labels, last_med = _score_landmarks(
+        detected_frames(xyvis_all), meta.analyzed_fps, mode, offline, timer=timer
+    )
+    stages: Dict[str, List[float]] = {}
+    for r in results:
+        for name, (items, busy) in r["stages"].items():
+            acc = stages.setdefault(name, [0, 0.0])
+            acc[0] += items
+            acc[1] += busy
+    summary = _summarize(
+        meta.fps,
+        meta.analyzed_fps,
+        max((r["frames_end"] for r in results), default=0),
+        sum(r["frames_analyzed"] for r in results),
+        mode,
+        scores,
+        confs,
+        labels,
+        last_med,
+        processing_time,
+        {name: (items / busy if busy > 0 else 0.0) for name, (items, busy) in stages.items()},
+        timer,
+    )
+    if meta.frame_count > 0:
+        summary.analyzed_fraction = min(1.0, summary.frames_processed / meta.frame_count)
+    if landmark_dir is not None and video_hash is not None and pose_params is not None:
+        key = LandmarkStore.key(video_hash, **pose_params)
+        _store_landmarks(landmark_dir, key, xyvis_all, summary, video_hash, pose_params, results[0]["size"])
+        summary.landmark_key = key
+    return summary
+
+def analyze_video_segmented(
+    input_path: Union[str, Path],
+    segments: int,
+    mode: str = "auto",
+    max_width: Optional[int] = None,
+    model_complexity: int = 0,
+    min_det_conf: float = 0.5,
+    min_track_conf: float = 0.5,
+    offline: bool = False,
+    target_fps: Optional[float] = None,
+    landmark_dir: Optional[Union[str, Path]] = None,
+    video_hash: Optional[str] = None,
+    roi: bool = False,
+) -> ScoreSummary:
+    start_time = time.time()
+    meta, plan = plan_segments(input_path, segments, target_fps)
+    kwargs = dict(
+        max_width=max_width,
+        model_complexity=model_complexity,
+        min_det_conf=min_det_conf,
+        min_track_conf=min_track_conf,
+        target_fps=target_fps,
+        roi=roi,
+    )
+    if landmark_dir is not None and video_hash is None:
+        video_hash = file_sha256(input_path)
+    if len(plan) == 1:
+        results = [analyze_segment(str(input_path), **plan[0], **kwargs)]
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(plan), mp_context=ctx) as ex:
+            futures = [ex.submit(analyze_segment, str(input_path), **seg, **kwargs) for seg in plan]
+            results = [f.result() for f in futures]
+    return merge_segments(meta, results, mode, offline, time.time() - start_time, landmark_dir, video_hash, kwargs)
+
+# the job's progress is the sum of its segments'; its cancellation is passed on to them
+async def _follow_segments(progress: Progress, parts: List[Progress], total: int) -> None:
+    while True:
+        progress.update(sum(p.done for p in parts), total)
+        if progress.cancelled:
+            for p in parts:
+                p.cancel()
+        await asyncio.sleep(JOB_PROGRESS_SECONDS)
+
+# segments of one video fan out over the pool's workers; scoring runs once on the merged
+# landmarks. Given a job's progress slot, every segment reports through a slot of its own;
+# with too few slots free the pool counts as saturated.
+async def _run_segmented(
+    input_path: str,
+    segments: int,
+    mode: str,
+    offline: bool,
+    landmark_dir: Optional[Union[str, Path]] = None,
+    video_hash: Optional[str] = None,
+    progress: Optional[Progress] = None,
+    **kwargs: Any,
+) -> ScoreSummary:
+    start_time = time.time()
+    meta, plan = await run_in_threadpool(plan_segments, input_path, segments, kwargs.get("target_fps"))
+    parts: List[Progress] = []
+    follow: Optional[asyncio.Task] = None
+    try:
+        if progress is not None and progress.slot is not None:
+            for _ in plan:
+                part = pool.progress.acquire()
+                if part is None:
+                    raise PoolSaturated("no progress slots free")
+                parts.append(part)
+            follow = asyncio.ensure_future(_follow_segments(progress, parts, meta.frame_count))
+        slots = [p.slot for p in parts] or [None] * len(plan)
+        calls = [
+            ((analyze_segment, input_path), dict(seg, progress_slot=slot, **kwargs)) for seg, slot in zip(plan, slots)
+        ]
+        results = await pool.run_many(run_with_pose, calls)
+    finally:
+        if follow is not None:
+            follow.cancel()
+            progress.update(sum(p.done for p in parts), meta.frame_count)
+        for part in parts:
+            pool.progress.release(part)
+    return await run_in_threadpool(
+        merge_segments, meta, results, mode, offline, time.time() - start_time, landmark_dir, video_hash, kwargs
+    )
+
+# with a pool, progress must be a slot of pool.progress
+async def _run_analysis(
+    input_path: str, segments: int = 1, progress: Optional[Progress] = None, **kwargs: Any
+) -> ScoreSummary:
+    # landmarks already stored: re-scored right here, without taking a worker (not under an
+    # early-exit rule, see analyze_video)
+    landmark_dir = kwargs.get("landmark_dir")
+    if landmark_dir is not None and kwargs.get("annotated_output_path") is None and kwargs.get("early_exit") is None:
+        key = LandmarkStore.key(
+            kwargs["video_hash"],
+            kwargs["model_complexity"],
+            kwargs["min_det_conf"],
+            kwargs["min_track_conf"],
+            kwargs["max_width"],
+            kwargs["target_fps"],
+            kwargs.get("roi", False),
+        )
+        if key in LandmarkStore(landmark_dir):
+            return await run_in_threadpool(
+                rescore_landmarks, landmark_dir, key, mode=kwargs["mode"], offline=kwargs["offline"]
+            )
+    if pool is None:
+        return await run_in_threadpool(analyze_video, input_path, segments=segments, progress=progress, **kwargs)
+    try:
+        if segments > 1 and kwargs.get("annotated_output_path") is None and kwargs.get("early_exit") is None:
+            # options of the single pass only; the segment tasks take none of them
+            for name in ("annotated_output_path", "early_exit"):
+                kwargs.pop(name, None)
+            return await _run_segmented(input_path, min(segments, pool.size), progress=progress, **kwargs)
+        slot = progress.slot if progress is not None else None
+        return await pool.run(run_with_pose, analyze_video, input_path, progress_slot=slot, **kwargs)
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=429, detail="Scoring workers are busy. Please retry later.", headers={"Retry-After": "5"}
         )
+    except PoolUnavailable:
+        raise HTTPException(status_code=503, detail="Scoring workers are unavailable.")
+
+class ScoreParams(BaseModel):
+    mode: str = "auto"
+    max_width: Optional[int] = None
+    model_complexity: int = 0
+    min_det_conf: float = 0.5
+    min_track_conf: float = 0.5
+    save_annotated: bool = False
+    offline: bool = False
+    target_fps: Optional[float] = None
+    # >1 splits pose inference over that many workers (no annotated video)
+    segments: int = Field(1, ge=1, le=64)
+    # crop pose inference to the person, at a resolution picked from their on-screen size
+    roi: bool = False
+    # early exit: stop once label and score have been stable for early_exit_seconds (scores
+    # within early_exit_tolerance standard deviation; streaming mode only), or after
+    # budget_seconds of analysis / budget_frames analyzed frames. Segments are then ignored.
+    early_exit_seconds: Optional[float] = Field(None, gt=0)
+    early_exit_tolerance: float = Field(2.0, ge=0)
+    budget_seconds: Optional[float] = Field(None, gt=0)
+    budget_frames: Optional[int] = Field(None, gt=0)
+    # include the per-stage breakdown (stage_timings) in the response
+    timings: bool = False
+
+async def _receive_video(request: Request) -> StreamedUpload:
+    try:
+        return await receive_upload(
+            request,
+            "file",
+            max_bytes=MAX_UPLOAD_BYTES,
+            allowed_suffixes=(".mp4", ".mov", ".m4v"),
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=f"{e} Please upload MP4/MOV/M4V.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save uploaded file: {e}")
+
+def _annotated_output() -> Tuple[str, Path]:
+    ANNOTATED_DIR.mkdir(parents=True, exist_ok=True)
+    _sweep_annotated()
+    name = f"{uuid.uuid4().hex}.mp4"
+    return name, ANNOTATED_DIR / name
+
+# analysis of a saved upload, through the result cache unless an annotated video is written
+# or a time budget is set
+async def _score_video(
+    path: str,
+    sha256: str,
+    params: ScoreParams,
+    annotated_path: Optional[Path] = None,
+    progress: Optional[Progress] = None,
+) -> ScoreSummary:
+    early_exit = EarlyExit(
+        params.early_exit_seconds, params.early_exit_tolerance, params.budget_seconds, params.budget_frames
+    )
+
+    async def compute() -> Dict[str, Any]:
+        summary = await _run_analysis(
+            path,
+            mode=params.mode,
+            max_width=params.max_width,
+            model_complexity=params.model_complexity,
+            min_det_conf=params.min_det_conf,
+            min_track_conf=params.min_track_conf,
+            offline=params.offline,
+            target_fps=params.target_fps,
+            annotated_output_path=annotated_path,
+            segments=params.segments,
+            roi=params.roi,
+            early_exit=early_exit if early_exit.enabled else None,
+            landmark_dir=LANDMARK_DIR,
+            video_hash=sha256,
+            progress=progress,
+        )
+        _record_analysis(summary)
+        return summary.model_dump()
+
+    # annotated runs write a new video, and where a time budget stops a run depends on the
+    # machine's load: only plain scoring without one goes through the cache
+    if results is not None and annotated_path is None and params.budget_seconds is None:
+        key = cache_key(sha256, params.model_dump(exclude={"save_annotated", "timings"}))
+        # a job can be cancelled: its run is not shared with concurrent requests
+        result, source = await results.get_or_compute(key, compute, shared=progress is None)
+        summary = ScoreSummary.model_validate(result)
+        summary.cached = source != "computed"
+    else:
+        source = "computed"
+        summary = ScoreSummary.model_validate(await compute())
+    ANALYSES.inc(source)
+    if not params.timings:
+        summary.stage_timings = None
+    return summary
+
+# multipart form: file (MP4/MOV/M4V) + the ScoreParams fields. The body is streamed to disk
+# as it arrives (see score.upload) instead of being buffered by the form parser.
+@app.post("/api/score", response_model=ScoreSummary)
+async def api_score(request: Request):
+    upload = await _receive_video(request)
+    annotated_name: Optional[str] = None
+    annotated_path: Optional[Path] = None
+    try:
+        if upload.path is None:
+            raise HTTPException(status_code=400, detail="Missing 'file' part. Please upload MP4/MOV/M4V.")
+        try:
+            params = ScoreParams.model_validate({k: v for k, v in upload.fields.items() if v != ""})
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+        if params.save_annotated:
+            annotated_name, annotated_path = _annotated_output()
+        summary = await _score_video(upload.path, upload.sha256, params, annotated_path)
+        if annotated_name is not None:
+            summary.annotated_video_url = f"/api/annotated/{annotated_name}"
 
         return summary
+    except HTTPException:
+        if annotated_path is not None:
+            annotated_path.unlink(missing_ok=True)
+        raise
     except Exception as e:
+        if annotated_path is not None:
+            annotated_path.unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail=f"Processing failed: {e}")
     finally:
+        upload.remove()
+
+class JobParams(ScoreParams):
+    # live (e.g. a battle in progress) runs ahead of everything queued; background is for
+    # bulk re-scoring and never takes every runner
+    priority: Literal["live", "normal", "background"] = "normal"
+
+class JobStatus(BaseModel):
+    id: str
+    # queued, running, done, failed or cancelled
+    status: str
+    priority: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # jobs that will start before this one
+    queue_position: Optional[int] = None
+    # decoded frames so far / the container's frame count
+    frames_done: int = 0
+    frames_total: int = 0
+    progress: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[ScoreSummary] = None
+
+def _job_status(job: Job) -> JobStatus:
+    done, total = job.progress.done, job.progress.total
+    if job.status == "done":
+        done = max(done, total)
+    return JobStatus(
+        id=job.id,
+        status=job.status,
+        priority=job.priority,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        queue_position=jobs.position(job) if jobs is not None else None,
+        frames_done=done,
+        frames_total=total,
+        progress=min(1.0, done / total) if total > 0 else None,
+        error=job.error,
+        result=ScoreSummary.model_validate(job.result) if job.result is not None else None,
+    )
+
+async def _run_job(
+    job: Job, upload: StreamedUpload, params: ScoreParams, annotated_name: Optional[str], annotated_path: Optional[Path]
+) -> Dict[str, Any]:
+    # pool workers report through a shared slot; the job's own cells take over its state
+    board = pool.progress if pool is not None else None
+    shared = board.acquire() if board is not None else None
+    if shared is not None:
+        shared.update(0, job.progress.total)
+        if job.progress.cancelled:
+            shared.cancel()
+        job.progress = shared
+    try:
+        while True:
+            try:
+                summary = await _score_video(upload.path, upload.sha256, params, annotated_path, job.progress)
+                break
+            except HTTPException as e:
+                # workers busy with synchronous requests: wait for one instead of failing
+                if e.status_code != 429:
+                    raise
+            job.progress.check()
+            await asyncio.sleep(JOB_RETRY_SECONDS)
+    except BaseException:
+        if annotated_path is not None:
+            annotated_path.unlink(missing_ok=True)
+        raise
+    finally:
+        if shared is not None:
+            job.progress = shared.snapshot()
+            board.release(shared)
+    if annotated_name is not None:
+        summary.annotated_video_url = f"/api/annotated/{annotated_name}"
+    return summary.model_dump()
+
+# Same multipart form as /api/score plus `priority` (JobParams). Returns 202 with the job's
+# status right after the upload; poll GET /api/score/jobs/{id} for progress and the
+# ScoreSummary (`result`), DELETE it to cancel. 429 when SCORE_JOB_MAX_QUEUED jobs wait.
+@app.post("/api/score/jobs", response_model=JobStatus, status_code=202)
+async def api_score_jobs(request: Request):
+    if jobs is None:
+        raise HTTPException(status_code=503, detail="Job queue is not running.")
+    upload = await _receive_video(request)
+    queued = False
+    try:
+        if upload.path is None:
+            raise HTTPException(status_code=400, detail="Missing 'file' part. Please upload MP4/MOV/M4V.")
         try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
+            params = JobParams.model_validate({k: v for k, v in upload.fields.items() if v != ""})
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+        # unreadable videos fail here rather than after waiting in the queue
+        try:
+            meta = await run_in_threadpool(probe_video, upload.path)
+        except RuntimeError:
+            raise HTTPException(status_code=400, detail="Cannot read the uploaded video. Please upload MP4/MOV/M4V.")
+        score_params = ScoreParams.model_validate(params.model_dump(exclude={"priority"}))
+        annotated_name: Optional[str] = None
+        annotated_path: Optional[Path] = None
+        if score_params.save_annotated:
+            annotated_name, annotated_path = _annotated_output()
+
+        async def run(job: Job) -> Dict[str, Any]:
+            return await _run_job(job, upload, score_params, annotated_name, annotated_path)
+
+        try:
+            job = jobs.submit(run, params.priority, cleanup=upload.remove)
+        except JobQueueFull:
+            raise HTTPException(
+                status_code=429, detail="Too many queued jobs. Please retry later.", headers={"Retry-After": "5"}
+            )
+        queued = True
+        job.progress.update(0, meta.frame_count)
+        return _job_status(job)
+    finally:
+        if not queued:
+            upload.remove()
+
+def _get_job(job_id: str) -> Job:
+    job = jobs.get(job_id) if jobs is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job
+
+@app.get("/api/score/jobs/{job_id}", response_model=JobStatus)
+async def api_score_job(job_id: str):
+    return _job_status(_get_job(job_id))
+
+# queued jobs are dropped at once; running ones stop at their next decoded frame
+@app.delete("/api/score/jobs/{job_id}", response_model=JobStatus)
+async def api_score_job_cancel(job_id: str):
+    _get_job(job_id)
+    return _job_status(jobs.cancel(job_id))
+
+class LandmarkParams(BaseModel):
+    fps: float = Field(gt=0, le=1000)
+    mode: str = "auto"
+    offline: bool = True
+    # set both when x/y are normalized [0, 1] (MediaPipe output) instead of pixels
+    image_width: Optional[int] = Field(None, gt=0)
+    image_height: Optional[int] = Field(None, gt=0)
+    timings: bool = False
+
+# score precomputed (N, 33, 3) landmarks; rows with NaN/inf are frames without a person
+def analyze_landmarks(
+    xyvis: np.ndarray,
+    fps: float,
+    mode: str = "auto",
+    offline: bool = True,
+    image_width: Optional[int] = None,
+    image_height: Optional[int] = None,
+) -> ScoreSummary:
+    start_time = time.time()
+    detected = detected_frames(xyvis)
+    if image_width is not None and image_height is not None:
+        detected = to_pixels(detected, image_width, image_height)
+    timer = StageTimer()
+    scores, confs, labels, last_med = _score_landmarks(detected, fps, mode, offline, timer=timer)
+    return _summarize(
+        fps, fps, len(xyvis), len(xyvis), mode, scores, confs, labels, last_med, time.time() - start_time, None, timer
+    )
+
+# Body: a .npy array or raw little-endian float32 bytes, shape (N, 33, 3) = (x, y, visibility)
+# per frame, as produced by pose estimation on the client. Query string: LandmarkParams.
+@app.post("/api/score/landmarks", response_model=ScoreSummary)
+async def api_score_landmarks(request: Request):
+    try:
+        params = LandmarkParams.model_validate({k: v for k, v in request.query_params.items() if v != ""})
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    if (params.image_width is None) != (params.image_height is None):
+        raise HTTPException(status_code=422, detail="image_width and image_height must be given together.")
+    try:
+        data = await read_body(request, MAX_LANDMARK_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        xyvis = decode_landmarks(data)
+    except LandmarkPayloadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    summary = await run_in_threadpool(
+        analyze_landmarks,
+        xyvis,
+        params.fps,
+        mode=params.mode,
+        offline=params.offline,
+        image_width=params.image_width,
+        image_height=params.image_height,
+    )
+    _record_analysis(summary)
+    if not params.timings:
+        summary.stage_timings = None
+    return summary
+
+class SessionParams(BaseModel):
+    mode: str = "auto"
+    # rate the client sends frames at; sizes the Estimator window
+    fps: float = Field(30.0, gt=0, le=240)
+    max_width: Optional[int] = None
+    model_complexity: int = 0
+    min_det_conf: float = 0.5
+    min_track_conf: float = 0.5
+
+def _score_session_frame(session: Session, params: SessionParams, data: bytes) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return {"type": "error", "detail": "Cannot decode frame; send JPEG or PNG bytes."}
+    h, w = frame.shape[:2]
+    if params.max_width is not None and w > params.max_width:
+        scale = float(params.max_width) / float(w)
+        w, h = int(round(w * scale)), int(round(h * scale))
+        frame = cv2.resize(frame, (w, h))
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    xyvis = _pose_landmarks(session.pose, rgb, w, h)
+    session.frames += 1
+    estimator: Estimator = session.state
+    result: Dict[str, Any] = {"type": "result", "frame": session.frames, "detected": xyvis is not None}
+    # like analyze_video, frames without a person are not pushed; the last result stands
+    if xyvis is not None:
+        estimator.push(frame_features_from_xyvis(xyvis))
+        label, score, conf = estimator.detect()
+        session.last_result = (str(label), int(score), float(conf))
+    label, score, conf = session.last_result or (None, None, None)
+    result.update(label=label, score=score, conf=conf, latency_ms=(time.perf_counter() - t0) * 1000.0)
+    return result
+
+# Real-time scoring. Query string: SessionParams. Each binary message is one encoded frame
+# (JPEG/PNG) and gets one JSON reply with the current label/score/conf; the text message
+# {"type": "reset"} starts a new Estimator window. Sessions idle for longer than
+# SCORE_WS_IDLE_TIMEOUT_SECONDS are closed, and at most SCORE_WS_MAX_SESSIONS are open at once.
+@app.websocket("/ws/score")
+async def ws_score(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        params = SessionParams.model_validate({k: v for k, v in websocket.query_params.items() if v != ""})
+    except ValidationError as e:
+        await websocket.close(code=1008, reason=str(e.errors(include_url=False, include_context=False))[:120])
+        return
+
+    def new_estimator() -> Estimator:
+        return Estimator(fps=params.fps, window_seconds=3.0, stable_threshold=3, mode=params.mode)
+
+    try:
+        session = await run_in_threadpool(
+            sessions.open,
+            params.model_complexity,
+            params.min_det_conf,
+            params.min_track_conf,
+            new_estimator(),
+        )
+    except SessionLimitReached:
+        await websocket.close(code=1013, reason="Too many scoring sessions. Please retry later.")
+        return
+
+    try:
+        await websocket.send_json({"type": "ready", "session_id": session.id, "window_size": session.state.window_size})
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive(), timeout=WS_IDLE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.close(code=1000, reason="Idle timeout.")
+                return
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes")
+            if data is not None:
+                if len(data) > WS_MAX_FRAME_BYTES:
+                    await websocket.close(code=1009, reason=f"Frame exceeds {WS_MAX_FRAME_BYTES} bytes.")
+                    return
+                reply = await run_in_threadpool(_score_session_frame, session, params, data)
+                if "latency_ms" in reply:
+                    WS_FRAME_SECONDS.observe(reply["latency_ms"] / 1000.0)
+                await websocket.send_json(reply)
+                continue
+            text = message.get("text") or ""
+            try:
+                command = json.loads(text)
+            except ValueError:
+                command = None
+            if isinstance(command, dict) and command.get("type") == "reset":
+                session.state = new_estimator()
+                session.last_result = None
+                await websocket.send_json({"type": "reset", "frame": session.frames})
+            else:
+                await websocket.send_json({"type": "error", "detail": "Unknown message; send frame bytes or {\"type\": \"reset\"}."})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sessions.close(session)
+
+class RescoreParams(BaseModel):
+    mode: str = "auto"
+    offline: bool = True
+    window_seconds: float = Field(3.0, gt=0, le=30)
+    stable_threshold: int = Field(3, ge=0, le=1000)
+    timings: bool = False
+
+# re-run feature extraction + classification on landmarks stored by an earlier /api/score
+@app.post("/api/rescore/{key}", response_model=ScoreSummary)
+async def api_rescore(key: str, request: Request):
+    if LANDMARK_DIR is None:
+        raise HTTPException(status_code=404, detail="Landmark store is not enabled.")
+    if not re.fullmatch(r"[0-9a-f]{32}", key) or key not in LandmarkStore(LANDMARK_DIR):
+        raise HTTPException(status_code=404, detail="Stored landmarks not found.")
+    try:
+        params = RescoreParams.model_validate({k: v for k, v in request.query_params.items() if v != ""})
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    summary = await run_in_threadpool(
+        rescore_landmarks,
+        LANDMARK_DIR,
+        key,
+        mode=params.mode,
+        offline=params.offline,
+        window_seconds=params.window_seconds,
+        stable_threshold=params.stable_threshold,
+    )
+    _record_analysis(summary)
+    if not params.timings:
+        summary.stage_timings = None
+    return summary
+
+@app.get("/metrics")
+async def api_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/cache/stats")
+async def api_cache_stats():
+    if results is None:
+        return {"enabled": False}
+    return {"enabled": True, **results.info()}
+
+@app.get("/api/annotated/{name}")
+async def api_annotated(name: str):
+    path = ANNOTATED_DIR / name
+    if not re.fullmatch(r"[0-9a-f]{32}\.mp4", name) or not path.is_file():
+        raise HTTPException(status_code=404, detail="Annotated video not found.")
+    return FileResponse(path, media_type="video/mp4")
 
 if __name__ == "__main__":
     import uvicorn
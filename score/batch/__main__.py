@@ -0,0 +1,204 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from app import ScoreSummary, analyze_video
+from score.cache import cache_key
+from score.columns import ColumnStore, FrameSeries
+from score.store import file_sha256
+from score.workers import PoseWorkerPool, run_with_pose
+
+# python -m batch VIDEO_OR_DIR... [--manifest list.txt] --output results/ [--workers N] [--frames]
+# Run from the project root, like the app. Scores every video with analyze_video, fanned out
+# over a pool of worker processes with warm Pose models, and appends one row per video (plus,
+# with --frames, the per-frame scores, confidences and labels) to a score.columns.ColumnStore.
+# Rows are keyed by file content + scoring parameters, so a rerun over the same inputs only
+# scores what is not stored yet.
+
+VIDEO_SUFFIXES = (".mp4", ".mov", ".m4v")
+
+# directories are searched recursively; manifest lines are paths relative to the manifest,
+# blank lines and # comments skipped. Each file once, in the order given.
+def _inputs(paths: List[str], manifest: Optional[str]) -> List[Path]:
+    found: List[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            found += sorted(f for f in p.rglob("*") if f.is_file() and f.suffix.lower() in VIDEO_SUFFIXES)
+        else:
+            found.append(p)
+    if manifest is not None:
+        base = Path(manifest).resolve().parent
+        for line in Path(manifest).read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                found.append(base / line)
+    seen: Set[Path] = set()
+    out = []
+    for p in found:
+        r = p.resolve()
+        if r not in seen:
+            seen.add(r)
+            out.append(p)
+    return out
+
+def _row(path: Path, sha256: str, key: str, params: Dict[str, Any], summary: ScoreSummary) -> Dict[str, Any]:
+    stats = summary.temporal_stats.model_dump() if summary.temporal_stats is not None else {}
+    return {
+        "key": key,
+        "path": str(path),
+        "sha256": sha256,
+        "params": json.dumps(params, sort_keys=True),
+        "frames_processed": summary.frames_processed,
+        "frames_analyzed": summary.frames_analyzed,
+        "input_fps": summary.input_fps,
+        "analyzed_fps": summary.analyzed_fps,
+        "duration_seconds": summary.duration_seconds,
+        "mode": summary.mode,
+        "avg_score": summary.avg_score,
+        "max_score": summary.max_score,
+        "last_label": summary.last_label,
+        "last_score": summary.last_score,
+        "last_conf": summary.last_conf,
+        "dom_freq": stats.get("dom_freq"),
+        "periodic_strength": stats.get("periodic_strength"),
+        "ankle_speed_norm": stats.get("ankle_speed_norm"),
+        "hip_y_std_norm": stats.get("hip_y_std_norm"),
+        "processing_time_seconds": summary.processing_time_seconds,
+        "scored_at": time.time(),
+    }
+
+async def _run(args: argparse.Namespace, files: List[Path], params: Dict[str, Any]) -> Dict[str, Any]:
+    store = ColumnStore(args.output)
+    done = set() if args.force else store.keys()
+    report: Dict[str, Any] = {"inputs": len(files), "scored": 0, "skipped": 0, "failed": 0, "frames": 0}
+    rows: List[Dict[str, Any]] = []
+    series: List[FrameSeries] = []
+
+    def flush() -> None:
+        if rows:
+            store.append(rows, series if args.frames else None)
+            rows.clear()
+            series.clear()
+
+    t0 = time.perf_counter()
+    pool: Optional[PoseWorkerPool] = None
+    if args.workers > 0:
+        pool = PoseWorkerPool(
+            args.workers,
+            max_queued=args.workers,
+            warm_keys=[(params["model_complexity"], params["min_det_conf"], params["min_track_conf"])],
+        )
+        await asyncio.to_thread(pool.start)
+    report["warmup_seconds"] = time.perf_counter() - t0
+    # as many videos in flight as the pool admits, so it never reports saturation
+    slots = asyncio.Semaphore(pool.max_pending if pool is not None else 1)
+    start = time.perf_counter()
+
+    async def score(path: Path) -> None:
+        try:
+            sha256 = await asyncio.to_thread(file_sha256, path)
+        except OSError as e:
+            report["failed"] += 1
+            print(f"[batch] {path}: {e}", file=sys.stderr)
+            return
+        key = cache_key(sha256, params)
+        # stored already, or the same content earlier in this run
+        if key in done:
+            report["skipped"] += 1
+            return
+        done.add(key)
+        kwargs = dict(params)
+        if args.landmark_dir is not None:
+            kwargs.update(landmark_dir=args.landmark_dir, video_hash=sha256)
+        async with slots:
+            try:
+                # in this process too, one Pose per parameter set is kept warm across videos
+                if pool is None:
+                    summary = await asyncio.to_thread(run_with_pose, analyze_video, str(path), **kwargs)
+                else:
+                    summary = await pool.run(run_with_pose, analyze_video, str(path), **kwargs)
+            except Exception as e:
+                done.discard(key)
+                report["failed"] += 1
+                print(f"[batch] {path}: {e}", file=sys.stderr)
+                return
+        rows.append(_row(path, sha256, key, params, summary))
+        series.append(summary._frames or ([], [], []))
+        report["scored"] += 1
+        report["frames"] += summary.frames_processed
+        n = report["scored"] + report["skipped"] + report["failed"]
+        avg = f"{summary.avg_score:.1f}" if summary.avg_score is not None else "-"
+        print(
+            f"[batch] {n}/{len(files)} {path}: {summary.frames_processed} frames, {summary.last_label} {avg} "
+            f"in {summary.processing_time_seconds:.1f}s",
+            file=sys.stderr,
+        )
+        if len(rows) >= args.flush_every:
+            flush()
+
+    try:
+        await asyncio.gather(*(score(p) for p in files))
+    finally:
+        # interrupted runs keep what finished; the rest is scored on the next run
+        flush()
+        if pool is not None:
+            pool.close()
+    elapsed = time.perf_counter() - start
+    report["elapsed_seconds"] = elapsed
+    report["videos_per_second"] = report["scored"] / elapsed if elapsed > 0 else 0.0
+    report["frames_per_second"] = report["frames"] / elapsed if elapsed > 0 else 0.0
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m batch", description="Score many videos into a columnar results store")
+    parser.add_argument("inputs", nargs="*", help="video files and directories (searched recursively)")
+    parser.add_argument("--manifest", help="file with one video path per line")
+    parser.add_argument("--output", required=True, help="results directory (ColumnStore parts)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes, 0 to score in this process")
+    parser.add_argument("--frames", action="store_true", help="also store score / confidence / label of every scored frame")
+    parser.add_argument("--flush-every", type=int, default=16, help="videos per appended part")
+    parser.add_argument("--force", action="store_true", help="score inputs already in the store again")
+    parser.add_argument("--landmark-dir", help="LandmarkStore directory: reuse and save landmarks")
+    parser.add_argument("--mode", default="auto")
+    parser.add_argument("--max-width", type=int)
+    # lite (0) like /api/score and the warm pool; the full model (1) ships with mediapipe,
+    # lite and heavy (2) are downloaded on first use
+    parser.add_argument("--model-complexity", type=int, default=0, help="0 lite, 1 full, 2 heavy (0 and 2 need a download)")
+    parser.add_argument("--min-det-conf", type=float, default=0.5)
+    parser.add_argument("--min-track-conf", type=float, default=0.5)
+    parser.add_argument("--target-fps", type=float)
+    parser.add_argument("--offline", action="store_true", help="batched sequence scoring instead of streaming")
+    parser.add_argument("--roi", action="store_true", help="person-ROI pose inference")
+    args = parser.parse_args(argv)
+
+    files = _inputs(args.inputs, args.manifest)
+    if not files:
+        parser.error("no input videos")
+    args.flush_every = max(1, args.flush_every)
+    params = {
+        "mode": args.mode,
+        "max_width": args.max_width,
+        "model_complexity": args.model_complexity,
+        "min_det_conf": args.min_det_conf,
+        "min_track_conf": args.min_track_conf,
+        "target_fps": args.target_fps,
+        "offline": args.offline,
+        "roi": args.roi,
+    }
+    report = asyncio.run(_run(args, files, params))
+    print(
+        f"[batch] {report['scored']} scored, {report['skipped']} skipped, {report['failed']} failed in "
+        f"{report['elapsed_seconds']:.1f}s: {report['videos_per_second']:.2f} videos/s, "
+        f"{report['frames_per_second']:.1f} frames/s",
+        file=sys.stderr,
+    )
+    print(json.dumps(report, indent=2))
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from bench.synthetic import ACTIVITIES, landmark_sequence, write_video
+from features import Estimator, EstimatorBank, features_at, frame_features_batch, frame_features_from_xyvis, score_sequence
+from score.utils import angle_at, dist, torso_angle_deg
+
+# python -m bench [--quick] [--suites utils,features,...] [--output results.json] [--baseline old.json]
+# Every result is {"suite", "name", "params", "items", "best_us", "median_us"}: microseconds per
+# item over `repeat` runs. Compare two runs with --baseline to get per-result ratios.
+
+Result = Dict[str, Any]
+
+def _time(fn: Callable[[], Any], items: int, repeat: int) -> Dict[str, float]:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return {
+        "best_us": min(runs) / items * 1e6,
+        "median_us": statistics.median(runs) / items * 1e6,
+    }
+
+def _result(suite: str, name: str, params: Dict[str, Any], items: int, timing: Dict[str, float], **extra: Any) -> Result:
+    return dict(suite=suite, name=name, params=params, items=items, **timing, **extra)
+
+def bench_utils(args: argparse.Namespace) -> List[Result]:
+    rng = np.random.default_rng(0)
+    n = 2000 if args.quick else 20000
+    pts = rng.uniform(0, 640, size=(n, 3, 2)).tolist()
+    out = []
+    for name, fn in (
+        ("dist", lambda: [dist(a, b) for a, b, _ in pts]),
+        ("angle_at", lambda: [angle_at(a, b, c) for a, b, c in pts]),
+        ("torso_angle_deg", lambda: [torso_angle_deg(a, b) for a, b, _ in pts]),
+    ):
+        out.append(_result("utils", name, {}, n, _time(fn, n, args.repeat)))
+    return out
+
+def bench_features(args: argparse.Namespace) -> List[Result]:
+    n = 1000 if args.quick else 10000
+    out = []
+    for activity in args.activities:
+        xyvis = landmark_sequence(activity, n, fps=30.0)
+        frames = list(xyvis)
+        out.append(
+            _result(
+                "features",
+                "frame_features_from_xyvis",
+                {"activity": activity},
+                n,
+                _time(lambda: [frame_features_from_xyvis(x) for x in frames], n, args.repeat),
+            )
+        )
+        out.append(
+            _result("features", "frame_features_batch", {"activity": activity}, n, _time(lambda: frame_features_batch(xyvis), n, args.repeat))
+        )
+    return out
+
+def bench_estimator(args: argparse.Namespace) -> List[Result]:
+    n = 600 if args.quick else 3000
+    out = []
+    for fps in args.fps:
+        for activity in args.activities:
+            feats = [frame_features_from_xyvis(x) for x in landmark_sequence(activity, n, fps=fps)]
+            window = Estimator(fps=fps).window_size
+            params = {"activity": activity, "fps": fps, "window_size": window}
+            warm = feats[:window]
+
+            # steady state: the window is already full when the timed steps start
+            def run(step: Callable[[Estimator, Dict[str, Any]], Any]) -> Callable[[], None]:
+                def go() -> None:
+                    est = Estimator(fps=fps)
+                    for f in warm:
+                        est.push(f)
+                    for f in feats:
+                        step(est, f)
+                return go
+
+            def push(est: Estimator, f: Dict[str, Any]) -> None:
+                est.push(f)
+
+            def push_stats(est: Estimator, f: Dict[str, Any]) -> None:
+                est.push(f)
+                est._temporal_stats()
+
+            def push_detect(est: Estimator, f: Dict[str, Any]) -> None:
+                est.push(f)
+                est.detect()
+
+            # warm-up cost is timed too; subtract it via an empty run
+            base = _time(run(lambda est, f: None), n, args.repeat)
+            for name, step in (("push", push), ("push+_temporal_stats", push_stats), ("push+detect", push_detect)):
+                t = _time(run(step), n, args.repeat)
+                timing = {k: max(0.0, t[k] - base[k]) for k in t}
+                out.append(_result("estimator", name, params, n, timing))
+    return out
+
+def bench_sequence(args: argparse.Namespace) -> List[Result]:
+    n = 2000 if args.quick else 20000
+    out = []
+    for fps in args.fps:
+        for activity in args.activities:
+            table = frame_features_batch(landmark_sequence(activity, n, fps=fps))
+            params = {"activity": activity, "fps": fps, "window_size": Estimator(fps=fps).window_size}
+            fn = lambda: score_sequence(table, fps=fps, window_seconds=3.0, stable_threshold=3, mode="auto")
+            out.append(_result("sequence", "score_sequence", params, n, _time(fn, n, args.repeat)))
+    return out
+
+# many live sessions, one frame each per tick: per-session Estimators vs one EstimatorBank
+def bench_bank(args: argparse.Namespace) -> List[Result]:
+    ticks = 30 if args.quick else 150
+    out = []
+    for fps in args.fps:
+        window = Estimator(fps=fps).window_size
+        for sessions in args.sessions:
+            tables = [
+                frame_features_batch(landmark_sequence(args.activities[i % len(args.activities)], window + ticks, fps=fps, seed=i))
+                for i in range(sessions)
+            ]
+            # one table per tick with a row per session
+            per_tick = [{k: np.array([t[k][j] for t in tables]) for k in tables[0]} for j in range(window + ticks)]
+            feats = [[features_at(t, j) for t in tables] for j in range(window + ticks)]
+            params = {"fps": fps, "window_size": window, "sessions": sessions}
+            # the window-filling pushes are timed for both, so compare the two rows, not absolutes
+            items = sessions * ticks
+
+            def estimators() -> None:
+                ests = [Estimator(fps=fps) for _ in range(sessions)]
+                for j in range(window + ticks):
+                    for est, f in zip(ests, feats[j]):
+                        est.push(f)
+                        if j >= window:
+                            est.detect()
+
+            def bank() -> None:
+                b = EstimatorBank(fps=fps, capacity=sessions)
+                slots = [b.add() for _ in range(sessions)]
+                for j in range(window + ticks):
+                    b.push(slots, per_tick[j])
+                    if j >= window:
+                        b.detect(slots)
+
+            for name, fn in (("Estimator push+detect", estimators), ("EstimatorBank push+detect", bank)):
+                out.append(_result("bank", name, params, items, _time(fn, items, max(1, min(args.repeat, 3)))))
+    return out
+
+def bench_video(args: argparse.Namespace) -> List[Result]:
+    from app import analyze_video
+
+    out = []
+    with tempfile.TemporaryDirectory(prefix="score-bench-") as tmp:
+        for res in args.resolutions:
+            w, h = (int(v) for v in res.lower().split("x"))
+            path = Path(tmp) / f"{args.activities[0]}_{w}x{h}.mp4"
+            write_video(path, args.activities[0], args.video_seconds, fps=30.0, width=w, height=h)
+            for offline in (False, True):
+                params = {
+                    "activity": args.activities[0],
+                    "resolution": f"{w}x{h}",
+                    "seconds": args.video_seconds,
+                    "model_complexity": args.model_complexity,
+                    "offline": offline,
+                }
+                summaries = []
+
+                def go() -> None:
+                    summaries.append(analyze_video(path, model_complexity=args.model_complexity, offline=offline))
+
+                timing = _time(go, 1, max(1, min(args.repeat, 3)))
+                s = summaries[-1]
+                timing = {k: v / s.frames_processed for k, v in timing.items()}
+                out.append(
+                    _result(
+                        "video",
+                        "analyze_video",
+                        params,
+                        s.frames_processed,
+                        timing,
+                        frames_per_second=1e6 / timing["best_us"] if timing["best_us"] > 0 else 0.0,
+                        stage_fps=s.stage_fps,
+                    )
+                )
+    return out
+
+SUITES: Dict[str, Callable[[argparse.Namespace], List[Result]]] = {
+    "utils": bench_utils,
+    "features": bench_features,
+    "estimator": bench_estimator,
+    "sequence": bench_sequence,
+    "bank": bench_bank,
+    "video": bench_video,
+}
+
+def _git_commit() -> Optional[str]:
+    try:
+        root = Path(__file__).resolve().parent.parent
+        head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain"], cwd=root, capture_output=True, text=True, check=True)
+        return head.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _environment() -> Dict[str, Any]:
+    try:
+        import mediapipe
+
+        mp_version = mediapipe.__version__
+    except ImportError:
+        mp_version = None
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "mediapipe": mp_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def _key(r: Result) -> str:
+    return json.dumps([r["suite"], r["name"], r["params"]], sort_keys=True)
+
+# ratio > 1 means slower than the baseline
+def compare(results: List[Result], baseline: Dict[str, Any]) -> None:
+    old = {_key(r): r for r in baseline.get("results", [])}
+    for r in results:
+        b = old.get(_key(r))
+        if b is not None and b["best_us"] > 0:
+            r["baseline_ratio"] = r["best_us"] / b["best_us"]
+
+def _print_table(results: List[Result]) -> None:
+    for r in results:
+        params = " ".join(f"{k}={v}" for k, v in r["params"].items())
+        ratio = f"  x{r['baseline_ratio']:.2f}" if "baseline_ratio" in r else ""
+        print(f"{r['suite']:<10} {r['name']:<26} {params:<60} {r['best_us']:>12.2f} us{ratio}", file=sys.stderr)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Scoring pipeline benchmarks")
+    parser.add_argument("--suites", default=",".join(SUITES), help="comma separated: " + ",".join(SUITES))
+    parser.add_argument("--quick", action="store_true", help="fewer items per run (smoke test)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--activities", default="running,squat,plank", help="comma separated: " + ",".join(ACTIVITIES))
+    parser.add_argument("--fps", default="15,30,60", help="Estimator fps values (window = 3 s)")
+    parser.add_argument("--sessions", default="10,100,1000", help="EstimatorBank session counts")
+    parser.add_argument("--resolutions", default="320x240,640x480,1280x720")
+    parser.add_argument("--video-seconds", type=float, default=4.0)
+    parser.add_argument("--model-complexity", type=int, default=0)
+    parser.add_argument("--output", default="-", help="JSON output path, - for stdout")
+    parser.add_argument("--baseline", help="earlier JSON output to compare against")
+    args = parser.parse_args(argv)
+
+    args.activities = [a for a in args.activities.split(",") if a]
+    unknown = [a for a in args.activities if a not in ACTIVITIES]
+    if unknown:
+        parser.error(f"unknown activities: {', '.join(unknown)}")
+    args.fps = [float(f) for f in args.fps.split(",") if f]
+    args.sessions = [int(n) for n in args.sessions.split(",") if n]
+    args.resolutions = [r for r in args.resolutions.split(",") if r]
+    suites = [s for s in args.suites.split(",") if s]
+    unknown = [s for s in suites if s not in SUITES]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    results: List[Result] = []
+    for name in suites:
+        print(f"[bench] {name}", file=sys.stderr)
+        results.extend(SUITES[name](args))
+
+    if args.baseline:
+        compare(results, json.loads(Path(args.baseline).read_text()))
+    _print_table(results)
+
+    report = {
+        "environment": _environment(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
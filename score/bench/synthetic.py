@@ -0,0 +1,183 @@
+import math
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+# Deterministic stick-figure motion for benchmarks: each activity is a cycle of key postures,
+# blended with a raised cosine, turned into 33 MediaPipe-ordered landmarks in pixels.
+
+# segment lengths as a fraction of the figure height
+SEGMENTS: Dict[str, float] = {
+    "torso": 0.30,
+    "thigh": 0.24,
+    "shin": 0.24,
+    "upper_arm": 0.17,
+    "forearm": 0.15,
+    "hip_width": 0.10,
+    "shoulder_width": 0.18,
+    "head": 0.11,
+}
+
+# (torso, l_thigh, l_shin, r_thigh, r_shin, l_upper_arm, l_forearm, r_upper_arm, r_forearm, hip_dx, hip_dy)
+# torso: 0 = up; limbs: 0 = straight down, positive = towards +x; hip offsets in figure heights
+Posture = Tuple[float, ...]
+POSTURES: Dict[str, Posture] = {
+    "stand": (0, -3, -3, 3, 3, -8, -8, 8, 8, 0.0, 0.0),
+    "squat": (35, 80, -20, 80, -20, 80, 85, 80, 85, 0.0, 0.20),
+    "lunge_l": (5, 70, -10, -30, -75, -10, -10, 10, 10, 0.0, 0.15),
+    "lunge_r": (5, -30, -75, 70, -10, -10, -10, 10, 10, 0.0, 0.15),
+    "jj_open": (0, -22, -22, 22, 22, -160, -165, 160, 165, 0.0, -0.02),
+    "plank_high": (82, -86, -86, -86, -86, 0, 0, 0, 0, 0.0, 0.38),
+    "plank_low": (86, -88, -88, -88, -88, -60, 40, -60, 40, 0.0, 0.43),
+    "lying": (-90, 135, 45, 135, 45, -100, -100, -100, -100, 0.0, 0.42),
+    "sitting": (-20, 135, 45, 135, 45, 150, 150, 150, 150, 0.0, 0.42),
+    "stride_a": (10, 45, -5, -30, -80, -40, 50, 40, 100, 0.0, 0.02),
+    "stride_b": (10, -30, -80, 45, -5, 40, 100, -40, 50, 0.0, 0.02),
+    "flight": (10, 10, -40, 10, -40, 0, 70, 0, 70, 0.0, -0.04),
+    "step_a": (3, 20, 0, -15, -25, -15, -10, 15, 10, 0.0, 0.0),
+    "step_b": (3, -15, -25, 20, 0, 15, 10, -15, -10, 0.0, 0.0),
+    "step_mid": (3, 2, -5, 2, -5, 0, 0, 0, 0, 0.0, -0.015),
+}
+
+# activity -> (posture cycle, cycles per second)
+ACTIVITIES: Dict[str, Tuple[Tuple[str, ...], float]] = {
+    "standing": (("stand",), 0.0),
+    "walking": (("step_a", "step_mid", "step_b", "step_mid"), 0.6),
+    "running": (("stride_a", "flight", "stride_b", "flight"), 1.1),
+    "squat": (("stand", "squat"), 0.5),
+    "lunge": (("stand", "lunge_l", "stand", "lunge_r"), 0.35),
+    "jumping_jack": (("stand", "jj_open"), 1.3),
+    "pushup": (("plank_high", "plank_low"), 0.8),
+    "plank": (("plank_high",), 0.0),
+    "situp": (("lying", "sitting"), 0.5),
+    "burpee": (("stand", "squat", "plank_high", "squat"), 0.3),
+}
+
+def _limb(origin: np.ndarray, deg: float, length: float) -> np.ndarray:
+    a = math.radians(deg)
+    return origin + length * np.array([math.sin(a), math.cos(a)])
+
+def figure(posture: Sequence[float], center: Tuple[float, float], height: float) -> np.ndarray:
+    torso, lt, ls, rt, rs, lua, lfa, rua, rfa, hdx, hdy = posture
+    seg = {k: v * height for k, v in SEGMENTS.items()}
+    t = math.radians(torso)
+    up = np.array([math.sin(t), -math.cos(t)])
+    # left/right spread shrinks as the body turns sideways (plank, lying)
+    side = np.array([math.cos(t), math.sin(t)]) * abs(math.cos(t))
+    hip = np.array(center) + np.array([hdx, hdy]) * height
+    shoulder = hip + up * seg["torso"]
+    pts = np.zeros((33, 2))
+
+    l_sh, r_sh = shoulder + side * seg["shoulder_width"] / 2, shoulder - side * seg["shoulder_width"] / 2
+    l_hip, r_hip = hip + side * seg["hip_width"] / 2, hip - side * seg["hip_width"] / 2
+    l_el = _limb(l_sh, lua, seg["upper_arm"])
+    r_el = _limb(r_sh, rua, seg["upper_arm"])
+    l_wr = _limb(l_el, lfa, seg["forearm"])
+    r_wr = _limb(r_el, rfa, seg["forearm"])
+    l_kn = _limb(l_hip, lt, seg["thigh"])
+    r_kn = _limb(r_hip, rt, seg["thigh"])
+    l_an = _limb(l_kn, ls, seg["shin"])
+    r_an = _limb(r_kn, rs, seg["shin"])
+    nose = shoulder + up * seg["head"]
+
+    pts[0] = nose
+    # eyes / ears / mouth around the nose
+    for i, (dx, dy) in enumerate(
+        [(0.15, -0.2), (0.25, -0.22), (0.35, -0.2), (-0.15, -0.2), (-0.25, -0.22), (-0.35, -0.2), (0.5, 0), (-0.5, 0), (0.15, 0.3), (-0.15, 0.3)],
+        start=1,
+    ):
+        pts[i] = nose + np.array([dx, dy]) * seg["head"] * 0.5
+    pts[11], pts[12] = l_sh, r_sh
+    pts[13], pts[14] = l_el, r_el
+    pts[15], pts[16] = l_wr, r_wr
+    # pinky / index / thumb
+    for i, wr, el in ((17, l_wr, l_el), (18, r_wr, r_el)):
+        d = wr - el
+        d = d / max(np.linalg.norm(d), 1e-6) * seg["forearm"] * 0.25
+        pts[i], pts[i + 2], pts[i + 4] = wr + d * 1.0, wr + d * 1.1, wr + d * 0.6
+    pts[23], pts[24] = l_hip, r_hip
+    pts[25], pts[26] = l_kn, r_kn
+    pts[27], pts[28] = l_an, r_an
+    # heel / foot index
+    for i, an in ((29, l_an), (30, r_an)):
+        pts[i] = an + np.array([-0.03, 0.02]) * height
+        pts[i + 2] = an + np.array([0.07, 0.025]) * height
+    return pts
+
+def activity_postures(activity: str, n: int, fps: float, phase: float = 0.0) -> np.ndarray:
+    names, freq = ACTIVITIES[activity]
+    keys = np.array([POSTURES[k] for k in names], dtype=np.float64)
+    if len(keys) == 1 or freq <= 0:
+        return np.repeat(keys[:1], n, axis=0)
+    # position in the posture cycle, eased between consecutive key postures
+    pos = ((np.arange(n) / float(fps)) * freq + phase) % 1.0 * len(keys)
+    i = np.floor(pos).astype(int)
+    w = 0.5 - 0.5 * np.cos(np.pi * (pos - i))
+    return keys[i] * (1.0 - w[:, None]) + keys[(i + 1) % len(keys)] * w[:, None]
+
+# (n, 33, 3) float32 pixel landmarks like score.utils.landmark output, deterministic for a seed.
+# missing_p of the frames get visibility below the features' validity threshold.
+def landmark_sequence(
+    activity: str,
+    n: int,
+    fps: float = 30.0,
+    width: int = 640,
+    height: int = 480,
+    seed: int = 0,
+    noise_px: float = 0.5,
+    missing_p: float = 0.02,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    postures = activity_postures(activity, n, fps, phase=float(rng.random()))
+    fig_h = 0.55 * height
+    center = (0.5 * width, 0.45 * height)
+    out = np.empty((n, 33, 3), dtype=np.float32)
+    for k in range(n):
+        out[k, :, :2] = figure(postures[k], center, fig_h)
+    out[:, :, :2] += rng.normal(0.0, noise_px, size=(n, 33, 2))
+    out[:, :, 0] = np.clip(np.round(out[:, :, 0]), 0, width - 1)
+    out[:, :, 1] = np.clip(np.round(out[:, :, 1]), 0, height - 1)
+    out[:, :, 2] = np.clip(rng.normal(0.93, 0.03, size=(n, 33)), 0.0, 1.0)
+    missing = rng.random(n) < missing_p
+    out[missing, :, 2] = 0.05
+    return out
+
+_BONES: List[Tuple[int, int, float]] = [
+    (11, 12, 0.05), (11, 23, 0.06), (12, 24, 0.06), (23, 24, 0.06),
+    (11, 13, 0.04), (13, 15, 0.035), (12, 14, 0.04), (14, 16, 0.035),
+    (23, 25, 0.055), (25, 27, 0.045), (24, 26, 0.055), (26, 28, 0.045),
+    (27, 31, 0.03), (28, 32, 0.03),
+]
+
+# figure-on-background frames written with cv2.VideoWriter; returns the landmarks drawn
+def write_video(
+    path: Union[str, Path],
+    activity: str,
+    seconds: float,
+    fps: float = 30.0,
+    width: int = 640,
+    height: int = 480,
+    seed: int = 0,
+    fourcc: str = "mp4v",
+) -> np.ndarray:
+    n = max(1, int(round(seconds * fps)))
+    xyvis = landmark_sequence(activity, n, fps, width, height, seed, noise_px=0.0, missing_p=0.0)
+    rng = np.random.default_rng(seed + 1)
+    background = cv2.GaussianBlur(rng.integers(60, 200, (height, width, 3), dtype=np.uint8), (0, 0), 8)
+    scale = 0.55 * height
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*fourcc), float(fps), (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Cannot open video writer for {path}")
+    try:
+        for pts in xyvis:
+            frame = background.copy()
+            p = pts[:, :2].astype(int)
+            for a, b, thick in _BONES:
+                cv2.line(frame, tuple(p[a]), tuple(p[b]), (40, 60, 170), max(2, int(thick * scale)), cv2.LINE_AA)
+            cv2.circle(frame, tuple(p[0]), max(3, int(0.06 * scale)), (150, 180, 230), -1, cv2.LINE_AA)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return xyvis
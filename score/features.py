@@ -1,15 +1,52 @@
-from collections import deque
-from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import math
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 from score.utils import dist, angle_at, torso_angle_deg
+from score.rolling import RingBuffer, RingMedian, SlidingDFT, SlidingExtrema, SlidingMoments, SlidingSum
+
+# stats key -> per-frame feature key, medians over the valid frames of the last W pushes
+PUSH_MEDIANS: Tuple[Tuple[str, str], ...] = (
+    ("median_knee", "avg_knee"),
+    ("median_torso", "torso_angle"),
+    ("median_wrist_norm", "wrist_dist_norm"),
+    ("median_foot_norm", "foot_dist_norm"),
+    ("knee_diff_med", "knee_diff"),
+    ("hip_ang_med", "avg_hip_ang"),
+    ("elbow_med", "avg_elbow"),
+)
+
+# landmarks that must be visible on average for a frame to count
+REQ_IDX: List[int] = [11, 12, 23, 24, 25, 26, 27, 28, 15, 16, 13, 14]
+
+# per-frame feature columns, in the order frame_features_from_xyvis emits them
+FEATURE_KEYS: Tuple[str, ...] = (
+    "shoulder_width_px",
+    "hip_x",
+    "hip_y",
+    "hip_norm_x",
+    "hip_norm_y",
+    "foot_dist_norm",
+    "wrist_dist_norm",
+    "left_knee",
+    "right_knee",
+    "avg_knee",
+    "knee_diff",
+    "avg_hip_ang",
+    "avg_elbow",
+    "torso_angle",
+    "left_ankle_x",
+    "left_ankle_y",
+    "right_ankle_x",
+    "right_ankle_y",
+)
 
 def frame_features_from_xyvis(xyvis: np.ndarray) -> Dict[str, Any]:
     f: Dict[str, Any] = {"valid": False}
     vis = xyvis[:, 2]
-    req_idx: List[int] = [11, 12, 23, 24, 25, 26, 27, 28, 15, 16, 13, 14]
+    req_idx: List[int] = REQ_IDX
     if np.mean(vis[req_idx]) < 0.12:
         return f
 
@@ -48,31 +85,318 @@ def frame_features_from_xyvis(xyvis: np.ndarray) -> Dict[str, Any]:
 
     t_ang = torso_angle_deg(shoulder_mid, hip_mid)
 
-    f.update(
-        {
-            "valid": True,
-            "shoulder_width_px": float(shoulder_width),
-            "hip_x": float(hip_mid[0]),
-            "hip_y": float(hip_mid[1]),
-            "hip_norm_x": float(hip_mid[0] / (shoulder_width + 1e-6)),
-            "hip_norm_y": float(hip_mid[1] / (shoulder_width + 1e-6)),
-            "foot_dist_norm": float(foot_dist),
-            "wrist_dist_norm": float(wrist_dist),
-            "left_knee": left_knee_ang,
-            "right_knee": right_knee_ang,
-            "avg_knee": avg_knee,
-            "knee_diff": knee_diff,
-            "avg_hip_ang": avg_hip_ang,
-            "avg_elbow": avg_elbow,
-            "torso_angle": t_ang,
-            "left_ankle_x": float(la[0]),
-            "left_ankle_y": float(la[1]),
-            "right_ankle_x": float(ra[0]),
-            "right_ankle_y": float(ra[1]),
-        }
-    )
+    # in FEATURE_KEYS order, rounded to float32 (see frame_features_batch)
+    values = np.array(
+        [
+            shoulder_width,
+            hip_mid[0],
+            hip_mid[1],
+            hip_mid[0] / (shoulder_width + 1e-6),
+            hip_mid[1] / (shoulder_width + 1e-6),
+            foot_dist,
+            wrist_dist,
+            left_knee_ang,
+            right_knee_ang,
+            avg_knee,
+            knee_diff,
+            avg_hip_ang,
+            avg_elbow,
+            t_ang,
+            la[0],
+            la[1],
+            ra[0],
+            ra[1],
+        ],
+        dtype=np.float64,
+    ).astype(np.float32)
+    f["valid"] = True
+    f.update(zip(FEATURE_KEYS, values.tolist()))
     return f
 
+# |v| row-wise, float32 in -> float32 out like np.linalg.norm on one frame
+def _norm_rows(v: np.ndarray) -> np.ndarray:
+    return np.sqrt(v[:, 0] * v[:, 0] + v[:, 1] * v[:, 1])
+
+# row-wise angle_at: arccos((BA・BC)/(|BA| |BC|)), degenerate -> 180
+def _angle_rows(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    ba = a - b
+    bc = c - b
+    nba = _norm_rows(ba)
+    nbc = _norm_rows(bc)
+    degenerate = (nba < 1e-6) | (nbc < 1e-6)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosang = (ba[:, 0] * bc[:, 0] + ba[:, 1] * bc[:, 1]) / (nba * nbc)
+    # the per-frame clip promotes the float32 cosine to float64 before arccos
+    cosang = np.clip(cosang.astype(np.float64), -1.0, 1.0)
+    ang = np.degrees(np.arccos(cosang))
+    ang[degenerate] = 180.0
+    return ang
+
+# (N, 33, 3) -> {"valid": (N,) bool, key: (N,) float64}; invalid rows are NaN. Values are
+# rounded to float32, the precision of the landmarks they come from, so the estimators keep
+# their windows in float32 without changing them.
+def frame_features_batch(xyvis: np.ndarray) -> Dict[str, np.ndarray]:
+    xyvis = np.asarray(xyvis, dtype=np.float32)
+    if xyvis.ndim == 2:
+        xyvis = xyvis[None]
+    n = xyvis.shape[0]
+    vis = xyvis[:, :, 2]
+    valid = ~(np.mean(vis[:, REQ_IDX], axis=1) < 0.12)
+
+    pts = np.ascontiguousarray(xyvis[:, :, :2])
+    ls, rs = pts[:, 11], pts[:, 12]
+    lh, rh = pts[:, 23], pts[:, 24]
+    lk, rk = pts[:, 25], pts[:, 26]
+    la, ra = pts[:, 27], pts[:, 28]
+    lw, rw = pts[:, 15], pts[:, 16]
+    le, re = pts[:, 13], pts[:, 14]
+
+    shoulder_mid = (ls + rs) / np.float32(2.0)
+    hip_mid = (lh + rh) / np.float32(2.0)
+    shoulder_width = np.maximum(_norm_rows(ls - rs).astype(np.float64), 1e-6)
+
+    left_knee = _angle_rows(lh, lk, la)
+    right_knee = _angle_rows(rh, rk, ra)
+    left_hip = _angle_rows(ls, lh, lk)
+    right_hip = _angle_rows(rs, rh, rk)
+    left_elbow = _angle_rows(ls, le, lw)
+    right_elbow = _angle_rows(rs, re, rw)
+
+    # | atan2(dy, dx) | angle = min(|θ|, 180−|θ|)
+    # libm atan2 (as math.atan2 in torso_angle_deg); np.arctan2's SIMD loop can differ by 1 ulp
+    v = (hip_mid - shoulder_mid).astype(np.float64)
+    theta = np.fromiter(map(math.atan2, v[:, 1].tolist(), v[:, 0].tolist()), dtype=np.float64, count=n)
+    t_ang = np.abs(np.degrees(theta))
+    t_ang = np.minimum(t_ang, 180 - t_ang)
+
+    hip_x = hip_mid[:, 0].astype(np.float64)
+    hip_y = hip_mid[:, 1].astype(np.float64)
+    table: Dict[str, np.ndarray] = {
+        "shoulder_width_px": shoulder_width,
+        "hip_x": hip_x,
+        "hip_y": hip_y,
+        "hip_norm_x": hip_x / (shoulder_width + 1e-6),
+        "hip_norm_y": hip_y / (shoulder_width + 1e-6),
+        "foot_dist_norm": _norm_rows(la - ra).astype(np.float64) / shoulder_width,
+        "wrist_dist_norm": _norm_rows(lw - rw).astype(np.float64) / shoulder_width,
+        "left_knee": left_knee,
+        "right_knee": right_knee,
+        "avg_knee": (left_knee + right_knee) / 2.0,
+        "knee_diff": np.abs(left_knee - right_knee),
+        "avg_hip_ang": (left_hip + right_hip) / 2.0,
+        "avg_elbow": (left_elbow + right_elbow) / 2.0,
+        "torso_angle": t_ang,
+        "left_ankle_x": la[:, 0].astype(np.float64),
+        "left_ankle_y": la[:, 1].astype(np.float64),
+        "right_ankle_x": ra[:, 0].astype(np.float64),
+        "right_ankle_y": ra[:, 1].astype(np.float64),
+    }
+    for key in FEATURE_KEYS:
+        table[key] = table[key].astype(np.float32).astype(np.float64)
+        table[key][~valid] = np.nan
+    table["valid"] = valid
+    return table
+
+# row i of a frame_features_batch table as the dict frame_features_from_xyvis returns
+def features_at(table: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+    if not table["valid"][i]:
+        return {"valid": False}
+    f: Dict[str, Any] = {"valid": True}
+    for key in FEATURE_KEYS:
+        f[key] = float(table[key][i])
+    return f
+
+# ring-buffer columns: every push (valid flag + per-push stats inputs) / valid frames only
+PUSH_COLUMNS: Tuple[str, ...] = ("valid",) + tuple(src for _, src in PUSH_MEDIANS) + ("motion",)
+SERIES_COLUMNS: Tuple[str, ...] = (
+    "hip_y",
+    "hip_x",
+    "left_ankle_x",
+    "left_ankle_y",
+    "right_ankle_x",
+    "right_ankle_y",
+    "shoulder_width_px",
+)
+
+# |left ankle - right ankle| per frame, rounded to float32 like the features
+def _motion(lax: np.ndarray, lay: np.ndarray, rax: np.ndarray, ray: np.ndarray) -> np.ndarray:
+    motion = np.hypot(np.asarray(lax) - np.asarray(rax), np.asarray(lay) - np.asarray(ray))
+    return motion.astype(np.float32).astype(np.float64)
+
+# bins within this relative distance of the spectral peak count as tied; the lowest one wins.
+# Integer pixel tracks often give two bins of exactly equal magnitude, and which of them the
+# FFT (or the sliding DFT) puts on top is down to rounding.
+PEAK_RTOL: float = 1e-9
+
+# (peak bin, peak / median of the other bins) of |rfft| magnitudes with the DC bin zeroed,
+# the median as np.median(np.delete(mag, idx)); partitions mag in place
+def _spectral_peak(mag: np.ndarray) -> Tuple[int, float]:
+    peak = float(np.max(mag))
+    idx = int(np.argmax(mag >= peak * (1.0 - PEAK_RTOL)))
+    # dropping one maximum leaves the len - 1 smallest values
+    r = len(mag) - 1
+    lo, hi = (r - 1) // 2, r // 2
+    mag.partition((lo, hi))
+    rest = (mag[lo] + mag[hi]) / 2.0 + 1e-6
+    return idx, float(peak / rest)
+
+# Activity classifier and form scores as weighted sums of per-stat terms.
+# Term = (weight, stat, kind, k, x0, center): with x = stat, or |stat - center| when a center
+# is given, and z = k (x - x0), a "logistic" term is 1 / (1 + exp(-z)) and a "clip" term
+# is clip(z, 0, 1). 1 - logistic(k (x - x0)) is written as k -> -k.
+Term = Tuple[float, str, str, float, float, Optional[float]]
+
+# raw class scores; detect() picks the label with a softmax over them, in this order
+CLASS_TERMS: Dict[str, Tuple[Term, ...]] = {
+    "running": (
+        (0.45, "periodic_strength", "logistic", 0.8, 2.0, None),
+        (0.3, "ankle_speed_norm", "logistic", 1.2, 0.8, None),
+        (0.15, "hip_x_std_norm", "logistic", 2.0, 0.2, None),
+        (0.1, "dom_freq", "clip", -1 / 1.4, 1.4, 2.2),
+    ),
+    "walking": (
+        (0.5, "periodic_strength", "logistic", 0.6, 1.2, None),
+        (0.35, "dom_freq", "clip", -1 / 0.9, 0.9, 1.2),
+        (0.15, "ankle_speed_norm", "logistic", 1.0, 0.35, None),
+    ),
+    "squat": (
+        (0.55, "median_knee", "clip", -1 / 80.0, 160.0, None),
+        (0.3, "periodic_strength", "logistic", -0.6, 1.0, None),
+        (0.15, "hip_ang_med", "logistic", -0.05, 60.0, 90.0),
+    ),
+    "lunge": (
+        (0.6, "knee_diff_med", "logistic", 0.15, 20.0, None),
+        (0.4, "hip_x_std_norm", "logistic", 2.0, 0.12, None),
+    ),
+    "pushup": (
+        (0.6, "median_torso", "logistic", -0.2, 32.0, None),
+        (0.25, "median_knee", "logistic", 0.03, 120.0, None),
+        (0.15, "hip_y_range_norm", "logistic", -2.0, 0.2, None),
+    ),
+    "plank": (
+        (0.7, "median_torso", "logistic", -0.2, 32.0, None),
+        (0.3, "hip_y_std_norm", "logistic", -3.0, 0.05, None),
+    ),
+    "jumping_jack": (
+        (0.225, "median_wrist_norm", "logistic", 2.0, 1.2, None),
+        (0.225, "median_foot_norm", "logistic", 2.0, 1.2, None),
+        (0.55, "periodic_strength", "logistic", 0.6, 1.3, None),
+    ),
+    "situp": (
+        (0.5, "hip_y_std_norm", "logistic", 6.0, 0.06, None),
+        (0.5, "dom_freq", "clip", -1 / 0.8, 0.8, 1.0),
+    ),
+    "burpee": (
+        (0.6, "hip_y_range_norm", "clip", 1 / 0.6, 0.0, None),
+        (0.4, "median_torso", "logistic", -0.08, 50.0, None),
+    ),
+    "standing": (
+        (0.6, "ankle_speed_norm", "logistic", -1.5, 0.15, None),
+        (0.4, "hip_y_std_norm", "logistic", -4.0, 0.03, None),
+    ),
+}
+
+# 0-1 form score of each label, reported x100
+FORM_TERMS: Dict[str, Tuple[Term, ...]] = {
+    "running": (
+        (0.5, "periodic_strength", "logistic", 0.8, 2.0, None),
+        (0.35, "ankle_speed_norm", "clip", 1 / 2.2, 0.0, None),
+        (0.15, "dom_freq", "clip", -1 / 1.6, 1.6, 2.2),
+    ),
+    "walking": (
+        (0.5, "dom_freq", "clip", -1.0, 1.0, 1.2),
+        (0.35, "periodic_strength", "logistic", 0.6, 1.2, None),
+        (0.15, "ankle_speed_norm", "clip", 1.0, 0.0, None),
+    ),
+    "squat": (
+        (0.6, "median_knee", "clip", -1 / 80.0, 160.0, None),
+        (0.25, "knee_diff_med", "clip", -1 / 70.0, 70.0, None),
+        (0.15, "hip_ang_med", "clip", -1 / 50.0, 50.0, 90.0),
+    ),
+    "lunge": (
+        (0.6, "knee_diff_med", "clip", 1 / 60.0, 0.0, None),
+        (0.4, "hip_x_std_norm", "clip", 1 / 0.5, 0.0, None),
+    ),
+    "pushup": (
+        (0.6, "median_torso", "clip", -1 / 40.0, 40.0, None),
+        (0.3, "elbow_med", "clip", -1 / 60.0, 60.0, 80.0),
+        (0.1, "hip_y_range_norm", "clip", -1 / 0.3, 0.3, None),
+    ),
+    "plank": (
+        (0.75, "median_torso", "clip", -1 / 25.0, 25.0, None),
+        (0.25, "hip_y_std_norm", "clip", -1 / 0.05, 0.05, None),
+    ),
+    "jumping_jack": (
+        (0.2, "median_wrist_norm", "clip", 1 / 0.8, 1.2, None),
+        (0.2, "median_foot_norm", "clip", 1 / 0.8, 1.2, None),
+        (0.6, "periodic_strength", "logistic", 0.6, 1.3, None),
+    ),
+    "situp": (
+        (0.5, "dom_freq", "clip", -1 / 0.8, 0.8, 1.0),
+        (0.5, "hip_y_std_norm", "clip", 1 / 0.12, 0.0, None),
+    ),
+    "burpee": (
+        (0.6, "hip_y_range_norm", "clip", 1 / 0.6, 0.0, None),
+        (0.4, "median_torso", "clip", -1 / 60.0, 60.0, None),
+    ),
+    "standing": (
+        (0.6, "ankle_speed_norm", "clip", -1 / 0.25, 0.25, None),
+        (0.4, "hip_y_std_norm", "clip", -1 / 0.02, 0.02, None),
+    ),
+}
+
+# CLASS_TERMS / FORM_TERMS compiled to arrays: every distinct term is evaluated once per
+# row of a (rows, stats) matrix, then one matrix product per table gives all the scores
+class ActivityTable:
+    def __init__(self, class_terms: Dict[str, Tuple[Term, ...]], form_terms: Dict[str, Tuple[Term, ...]]) -> None:
+        if list(form_terms) != list(class_terms):
+            raise ValueError("class and form tables must list the same labels in the same order")
+        self.labels: Tuple[str, ...] = tuple(class_terms)
+        terms: Dict[Tuple[str, str, float, float, Optional[float]], int] = {}
+        stats: Dict[str, int] = {}
+        for table in (class_terms, form_terms):
+            for label_terms in table.values():
+                for _, stat, kind, k, x0, center in label_terms:
+                    if kind not in ("logistic", "clip"):
+                        raise ValueError(f"unknown term kind {kind!r}")
+                    stats.setdefault(stat, len(stats))
+                    terms.setdefault((stat, kind, k, x0, center), len(terms))
+        # stats_matrix() column order
+        self.stats: Tuple[str, ...] = tuple(stats)
+        keys = list(terms)
+        self._col = np.array([stats[t[0]] for t in keys], dtype=np.intp)
+        self._logistic = np.array([t[1] == "logistic" for t in keys])
+        self._k = np.array([t[2] for t in keys], dtype=np.float64)
+        self._x0 = np.array([t[3] for t in keys], dtype=np.float64)
+        self._centered = np.array([t[4] is not None for t in keys])
+        self._center = np.array([t[4] or 0.0 for t in keys], dtype=np.float64)
+        self._class_weights = self._weights(class_terms, terms)
+        self._form_weights = self._weights(form_terms, terms)
+
+    # (terms, labels) weight matrix
+    def _weights(self, table: Dict[str, Tuple[Term, ...]], terms: Dict[Any, int]) -> np.ndarray:
+        w = np.zeros((len(terms), len(self.labels)))
+        for j, label_terms in enumerate(table.values()):
+            for weight, *term in label_terms:
+                w[terms[tuple(term)], j] += weight
+        return w
+
+    # (rows, len(self.stats)) from stats values that are floats or equal-length arrays
+    def stats_matrix(self, med: Dict[str, Any]) -> np.ndarray:
+        return np.column_stack([np.asarray(med[s], dtype=np.float64).reshape(-1) for s in self.stats])
+
+    # -> (class scores, form scores x100), each (rows, len(self.labels))
+    def evaluate(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        v = x[:, self._col]
+        v = np.where(self._centered, np.abs(v - self._center), v)
+        z = (v - self._x0) * self._k
+        # exp overflow only means the logistic is 0
+        with np.errstate(over="ignore"):
+            terms = np.where(self._logistic, 1.0 / (1.0 + np.exp(-z)), np.clip(z, 0.0, 1.0))
+        return terms @ self._class_weights, (terms @ self._form_weights) * 100.0
+
+ACTIVITY_TABLE = ActivityTable(CLASS_TERMS, FORM_TERMS)
+
 class Estimator:
     def __init__(
         self,
@@ -83,181 +407,226 @@ class Estimator:
     ) -> None:
         self.fps: float = max(1.0, float(fps))
         self.window_size: int = max(8, int(round(self.fps * window_seconds)))
-        self.buf: Deque[Dict[str, Any]] = deque(maxlen=self.window_size)
-        self.hip_y_series: Deque[float] = deque(maxlen=self.window_size)
-        self.hip_x_series: Deque[float] = deque(maxlen=self.window_size)
-        self.lax: Deque[float] = deque(maxlen=self.window_size)
-        self.lay: Deque[float] = deque(maxlen=self.window_size)
-        self.rax: Deque[float] = deque(maxlen=self.window_size)
-        self.ray: Deque[float] = deque(maxlen=self.window_size)
-        self.shoulder_width_series: Deque[float] = deque(maxlen=self.window_size)
+        # "push" window = last W pushes, "series" window = last W valid frames; features are
+        # float32 values (see frame_features_batch), so float32 columns hold them exactly
+        self.pushes = RingBuffer(PUSH_COLUMNS, self.window_size, dtype=np.float32)
+        self.series = RingBuffer(SERIES_COLUMNS, self.window_size, dtype=np.float32)
         self.standing_hip_y: Optional[float] = None
         self.standing_initialized: bool = False
+        self.standing_count: int = 0
         self.prev_label: Optional[str] = None
         self.candidate_label: Optional[str] = None
         self.stable_count: int = 0
         self.stable_threshold: int = stable_threshold
         self.mode: str = mode
 
+        # medians over ring positions of the valid rows, no copies of the values
+        self._push_medians: Dict[str, RingMedian] = {k: RingMedian(self.pushes, src) for k, src in PUSH_MEDIANS}
+        self._motion = SlidingSum()
+        self._valid_in_buf: int = 0
+        self._sw_median = RingMedian(self.series, "shoulder_width_px")
+        self._hip_y_moments = SlidingMoments()
+        self._hip_x_moments = SlidingMoments()
+        self._hip_y_extrema = SlidingExtrema()
+        # hip_y spectrum of a full series window, see _compute_stats
+        self._hip_y_dft = SlidingDFT(self.window_size)
+        self._freqs: np.ndarray = np.fft.rfftfreq(self.window_size, d=1.0 / self.fps)
+        self._left_speed = SlidingSum()
+        self._right_speed = SlidingSum()
+        self._series_seq: int = 0
+        self._push_seq: int = 0
+        self._stats: Optional[Dict[str, float]] = None
+        self._stats_dirty: bool = False
+
+    # the window arrays only: 5.8 KB at 30 fps and 11.5 KB at 60 fps with the 3 s window
+    # (plus 2 bytes per row and median for the median orders). A whole Estimator retains
+    # about 25 KB at 30 fps and 33 KB at 60 fps (tracemalloc), most of the rest fixed
+    # per-object overhead; many live sessions are cheaper in an EstimatorBank.
+    @property
+    def nbytes(self) -> int:
+        return self.pushes.nbytes + self.series.nbytes
+
     def push(self, feat: Dict[str, Any]) -> None:
         if not isinstance(feat, dict):
             return
-        self.buf.append(feat)
+        if self.pushes.full:
+            self._evict_push()
+        self._stats_dirty = True
+        self._push_seq += 1
+        pos = self.pushes.advance()
         if feat.get("valid"):
-            self.hip_y_series.append(feat["hip_y"])
-            self.hip_x_series.append(feat["hip_x"])
-            self.lax.append(feat["left_ankle_x"])
-            self.lay.append(feat["left_ankle_y"])
-            self.rax.append(feat["right_ankle_x"])
-            self.ray.append(feat["right_ankle_y"])
-            self.shoulder_width_series.append(feat["shoulder_width_px"])
+            self.pushes.put("valid", pos, 1.0)
+            for _, src in PUSH_MEDIANS:
+                self.pushes.put(src, pos, feat[src])
+            self.pushes.put(
+                "motion",
+                pos,
+                math.hypot(feat["left_ankle_x"] - feat["right_ankle_x"], feat["left_ankle_y"] - feat["right_ankle_y"]),
+            )
+            self._valid_in_buf += 1
+            for median in self._push_medians.values():
+                median.add(pos)
+            # as stored (float32), so removing it later leaves no residue
+            self._motion.add(self.pushes.newest("motion"))
+            if feat["avg_knee"] > 150:
+                self.standing_count += 1
+
+            if self.series.full:
+                self._evict_series()
+            self._append_series(feat)
             if not self.standing_initialized and feat["avg_knee"] > 150:
                 if self.standing_hip_y is None:
                     self.standing_hip_y = feat["hip_y"]
                 else:
                     self.standing_hip_y = 0.95 * self.standing_hip_y + 0.05 * feat["hip_y"]
 
-                if len([b for b in self.buf if b.get("valid") and b["avg_knee"] > 150]) > self.fps * 1.0:
+                if self.standing_count > self.fps * 1.0:
                     self.standing_initialized = True
+        else:
+            # the other cells of an invalid row are never read
+            self.pushes.put("valid", pos, 0.0)
+        # re-anchor the running sum once per window so rounding cannot accumulate
+        if self._push_seq % self.window_size == 0:
+            valid = self.pushes.values("valid")
+            self._motion.reset(m for v, m in zip(valid, self.pushes.values("motion")) if v > 0)
+
+    def _evict_push(self) -> None:
+        if not self.pushes.oldest("valid"):
+            return
+        self._valid_in_buf -= 1
+        oldest = self.pushes.position(0)
+        for median in self._push_medians.values():
+            median.remove(oldest)
+        self._motion.remove(self.pushes.oldest("motion"))
+        if self.pushes.oldest("avg_knee") > 150:
+            self.standing_count -= 1
+
+    def _evict_series(self) -> None:
+        s = self.series
+        self._sw_median.remove(s.position(0))
+        self._hip_y_moments.remove(s.oldest("hip_y"))
+        self._hip_x_moments.remove(s.oldest("hip_x"))
+        if len(s) >= 2:
+            self._left_speed.remove(self._step(s, "left_ankle_x", "left_ankle_y", 0))
+            self._right_speed.remove(self._step(s, "right_ankle_x", "right_ankle_y", 0))
+
+    def _append_series(self, feat: Dict[str, Any]) -> None:
+        s = self.series
+        if len(s) >= 1:
+            self._left_speed.add(
+                math.hypot(feat["left_ankle_x"] - s.newest("left_ankle_x"), feat["left_ankle_y"] - s.newest("left_ankle_y"))
+            )
+            self._right_speed.add(
+                math.hypot(feat["right_ankle_x"] - s.newest("right_ankle_x"), feat["right_ankle_y"] - s.newest("right_ankle_y"))
+            )
+        evicted = s.oldest("hip_y") if s.full else None
+        pos = s.advance()
+        for c in SERIES_COLUMNS:
+            s.put(c, pos, feat[c])
+        if evicted is not None and self._hip_y_dft.ready:
+            self._hip_y_dft.update(feat["hip_y"], evicted)
+
+        self._sw_median.add(pos)
+        self._hip_y_moments.add(feat["hip_y"])
+        self._hip_x_moments.add(feat["hip_x"])
+        self._series_seq += 1
+        self._hip_y_extrema.add(self._series_seq, feat["hip_y"])
+        self._hip_y_extrema.expire(self._series_seq - self.window_size + 1)
 
+        if self._series_seq % self.window_size == 0:
+            self._hip_y_moments.reset(s.values("hip_y"))
+            self._hip_x_moments.reset(s.values("hip_x"))
+            self._left_speed.reset(self._steps(s, "left_ankle_x", "left_ankle_y"))
+            self._right_speed.reset(self._steps(s, "right_ankle_x", "right_ankle_y"))
+            # the window is full, i.e. the whole storage row starting at the oldest row
+            self._hip_y_dft.reset(s.storage("hip_y"), s.position(0))
+
+    # |Δankle| between live rows i and i + 1
+    @staticmethod
+    def _step(s: RingBuffer, cx: str, cy: str, i: int) -> float:
+        return math.hypot(s.get(cx, i + 1) - s.get(cx, i), s.get(cy, i + 1) - s.get(cy, i))
+
+    @staticmethod
+    def _steps(s: RingBuffer, cx: str, cy: str) -> List[float]:
+        xs = s.values(cx)
+        ys = s.values(cy)
+        return [math.hypot(xs[i + 1] - xs[i], ys[i + 1] - ys[i]) for i in range(len(xs) - 1)]
+
+    # computed at most once per pushed frame; detect() and callers share the result
     def _temporal_stats(self) -> Optional[Dict[str, float]]:
-        valid = [b for b in self.buf if b.get("valid")]
-        if len(valid) == 0:
+        if self._stats_dirty:
+            self._stats = self._compute_stats()
+            self._stats_dirty = False
+        return self._stats
+
+    def _compute_stats(self) -> Optional[Dict[str, float]]:
+        if self._valid_in_buf == 0:
             return None
         med: Dict[str, float] = {}
-        med["median_knee"] = float(np.median([b["avg_knee"] for b in valid]))
-        med["median_torso"] = float(np.median([b["torso_angle"] for b in valid]))
-        med["median_wrist_norm"] = float(np.median([b["wrist_dist_norm"] for b in valid]))
-        med["median_foot_norm"] = float(np.median([b["foot_dist_norm"] for b in valid]))
-        med["knee_diff_med"] = float(np.median([b["knee_diff"] for b in valid]))
-        med["hip_ang_med"] = float(np.median([b["avg_hip_ang"] for b in valid]))
-        med["elbow_med"] = float(np.median([b["avg_elbow"] for b in valid]))
-        med["shoulder_width_median"] = (
-            float(np.median(list(self.shoulder_width_series)))
-            if len(self.shoulder_width_series) > 0
-            else 1.0
-        )
-
-        hip_y = np.array(self.hip_y_series) if len(self.hip_y_series) > 0 else np.array([0.0])
-        hip_x = np.array(self.hip_x_series) if len(self.hip_x_series) > 0 else np.array([0.0])
+        for key, _ in PUSH_MEDIANS:
+            med[key] = float(self._push_medians[key].median())
+        sw_median = self._sw_median.median()
+        med["shoulder_width_median"] = float(sw_median) if sw_median is not None else 1.0
 
+        n = len(self.series)
         sw = med["shoulder_width_median"] + 1e-6
-        med["hip_y_std_norm"] = float(np.std(hip_y) / sw)
-        med["hip_y_range_norm"] = float((np.max(hip_y) - np.min(hip_y)) / sw) if len(hip_y) > 1 else 0.0
-        med["hip_x_std_norm"] = float(np.std(hip_x) / sw)
+        med["hip_y_std_norm"] = float(self._hip_y_moments.std() / sw)
+        med["hip_y_range_norm"] = (
+            float((self._hip_y_extrema.max() - self._hip_y_extrema.min()) / sw) if n > 1 else 0.0
+        )
+        med["hip_x_std_norm"] = float(self._hip_x_moments.std() / sw)
 
         dom_freq = 0.0
         periodic_strength = 0.0
-        if len(hip_y) >= max(8, int(self.fps * 0.5)):
-            y = hip_y - np.mean(hip_y)
-            yf = np.abs(np.fft.rfft(y))
-            yf[0] = 0
-            freqs = np.fft.rfftfreq(len(y), d=1.0 / self.fps)
-            idx = int(np.argmax(yf))
-            if idx < len(freqs):
-                dom_freq = float(freqs[idx])
-                peak = float(yf[idx])
-                rest = np.median(np.delete(yf, idx)) + 1e-6
-                periodic_strength = float(peak / rest)
+        # |rfft| of the mean-removed hip_y window: dominant frequency and its peak over the
+        # median bin. A full window reads the sliding DFT instead of running an FFT per push;
+        # it matches the FFT to ~1e-12 of the spectrum scale, so periodic_strength agrees to
+        # ~1e-9 relative and dom_freq is the same bin (ties resolved by PEAK_RTOL).
+        # A flat window has an all-zero spectrum, reported as (0, 0) like the FFT does.
+        if n >= max(8, int(self.fps * 0.5)):
+            if n == self.window_size and self._hip_y_dft.ready:
+                flat = self._hip_y_extrema.max() == self._hip_y_extrema.min()
+                if not flat:
+                    idx, periodic_strength = _spectral_peak(self._hip_y_dft.magnitudes())
+                    dom_freq = float(self._freqs[idx])
+            else:
+                # not full, so not wrapped around either: one view
+                hip_y = self.series.window("hip_y")[0].astype(np.float64)
+                yf = np.abs(np.fft.rfft(hip_y - np.mean(hip_y)))
+                yf[0] = 0
+                idx, periodic_strength = _spectral_peak(yf)
+                dom_freq = float(np.fft.rfftfreq(n, d=1.0 / self.fps)[idx])
         med["dom_freq"] = dom_freq
         med["periodic_strength"] = periodic_strength
 
-        def mean_ankle_speed_norm(xs: List[float], ys: List[float]) -> float:
-            if len(xs) < 2 or len(self.shoulder_width_series) < 1:
-                return 0.0
-            diffs = [math.hypot(xs[i + 1] - xs[i], ys[i + 1] - ys[i]) for i in range(len(xs) - 1)]
-            diffs = np.array(diffs)
-            sh = float(np.median(list(self.shoulder_width_series))) if len(self.shoulder_width_series) > 0 else sw
-            mean_norm = float(np.mean(diffs) / (sh + 1e-6) * self.fps)
-            return mean_norm
-
-        left_speed = mean_ankle_speed_norm(list(self.lax), list(self.lay))
-        right_speed = mean_ankle_speed_norm(list(self.rax), list(self.ray))
+        # mean |Δankle| / median shoulder width * fps over the series window
+        if n >= 2:
+            sh = med["shoulder_width_median"] + 1e-6
+            left_speed = self._left_speed.mean() / sh * self.fps
+            right_speed = self._right_speed.mean() / sh * self.fps
+        else:
+            left_speed = right_speed = 0.0
         med["ankle_speed_norm"] = float((left_speed + right_speed) / 2.0)
 
-        med["motion_energy"] = float(
-            np.mean(
-                [
-                    np.linalg.norm(
-                        [
-                            b.get("left_ankle_x", 0) - b.get("right_ankle_x", 0),
-                            b.get("left_ankle_y", 0) - b.get("right_ankle_y", 0),
-                        ]
-                    )
-                    for b in valid
-                ]
-            )
-        )
+        med["motion_energy"] = float(self._motion.mean())
 
         return med
 
-    @staticmethod
-    def _logistic(x: float, k: float = 1.0, x0: float = 0.0) -> float:
-        return 1.0 / (1.0 + np.exp(-k * (x - x0)))
-
     def detect(self) -> Tuple[str, int, float]:
         med = self._temporal_stats()
         if med is None:
             return "unknown", 0, 0.0
 
-        scores: Dict[str, float] = {}
-
-        run_freq_score = np.clip(1 - abs(2.2 - med["dom_freq"]) / 1.4, 0.0, 1.0)
-        run_periodic = self._logistic(med["periodic_strength"], k=0.8, x0=2.0)
-        run_speed = self._logistic(med["ankle_speed_norm"], k=1.2, x0=0.8)
-        run_side_motion = self._logistic(med["hip_x_std_norm"], k=2.0, x0=0.2)
-        run_score_raw = 0.45 * run_periodic + 0.3 * run_speed + 0.15 * run_side_motion + 0.1 * run_freq_score
-        scores["running"] = run_score_raw
-
-        walk_freq_score = np.clip(1 - abs(1.2 - med["dom_freq"]) / 0.9, 0.0, 1.0)
-        walk_speed = self._logistic(med["ankle_speed_norm"], k=1.0, x0=0.35)
-        walk_periodic = self._logistic(med["periodic_strength"], k=0.6, x0=1.2)
-        scores["walking"] = 0.5 * walk_periodic + 0.35 * walk_freq_score + 0.15 * walk_speed
-
-        squat_depth = np.clip((160.0 - med["median_knee"]) / 80.0, 0.0, 1.0)
-        squat_nonperiodic = 1.0 - self._logistic(med["periodic_strength"], k=0.6, x0=1.0)
-        squat_torso = self._logistic(100.0 - abs(90.0 - med["hip_ang_med"]), k=0.05, x0=40.0)
-        scores["squat"] = 0.55 * squat_depth + 0.3 * squat_nonperiodic + 0.15 * squat_torso
-
-        lunge_asym = self._logistic(med["knee_diff_med"], k=0.15, x0=20.0)
-        lunge_step = self._logistic(med["hip_x_std_norm"], k=2.0, x0=0.12)
-        scores["lunge"] = 0.6 * lunge_asym + 0.4 * lunge_step
-
-        pushup_torso = self._logistic(40.0 - med["median_torso"], k=0.2, x0=8.0)
-        pushup_knee = self._logistic(med["median_knee"], k=0.03, x0=120.0)
-        pushup_motion = 1.0 - self._logistic(med["hip_y_range_norm"], k=2.0, x0=0.2)
-        scores["pushup"] = 0.6 * pushup_torso + 0.25 * pushup_knee + 0.15 * pushup_motion
-
-        plank_torso = pushup_torso
-        plank_still = 1.0 - self._logistic(med["hip_y_std_norm"], k=3.0, x0=0.05)
-        scores["plank"] = 0.7 * plank_torso + 0.3 * plank_still
-
-        jj_w = self._logistic(med["median_wrist_norm"], k=2.0, x0=1.2)
-        jj_f = self._logistic(med["median_foot_norm"], k=2.0, x0=1.2)
-        jj_period = self._logistic(med["periodic_strength"], k=0.6, x0=1.3)
-        scores["jumping_jack"] = 0.45 * (jj_w + jj_f) / 2.0 + 0.55 * jj_period
-
-        sit_amp = self._logistic(med["hip_y_std_norm"], k=6.0, x0=0.06)
-        sit_freq = np.clip(1 - abs(1.0 - med["dom_freq"]) / 0.8, 0.0, 1.0)
-        scores["situp"] = 0.5 * sit_amp + 0.5 * sit_freq
-
-        burp_amp = np.clip(med["hip_y_range_norm"] / 0.6, 0.0, 1.0)
-        burp_torso = 1.0 - self._logistic(med["median_torso"], k=0.08, x0=50.0)
-        scores["burpee"] = 0.6 * burp_amp + 0.4 * burp_torso
-
-        stand_energy = 1.0 - self._logistic(med["ankle_speed_norm"], k=1.5, x0=0.15)
-        stand_y = 1.0 - self._logistic(med["hip_y_std_norm"], k=4.0, x0=0.03)
-        scores["standing"] = 0.6 * stand_energy + 0.4 * stand_y
-
-        names = list(scores.keys())
-        vals = np.array([scores[n] for n in names], dtype=float)
+        class_scores, form_scores = ACTIVITY_TABLE.evaluate(ACTIVITY_TABLE.stats_matrix(med))
+        names = ACTIVITY_TABLE.labels
+        vals = class_scores[0]
         vals_shift = vals - np.max(vals)
         expv = np.exp(vals_shift * 6.0)
         probs = expv / (np.sum(expv) + 1e-12)
-        probs_by_name: Dict[str, float] = {n: float(probs[i]) for i, n in enumerate(names)}
+        best = int(np.argmax(probs))
 
-        best_label = max(probs_by_name.items(), key=lambda x: x[1])[0]
-        best_conf = probs_by_name[best_label]
+        best_label = names[best]
+        best_conf = float(probs[best])
 
         if self.mode != "auto":
             override = str(self.mode).lower()
@@ -282,64 +651,427 @@ class Estimator:
                 self.stable_count = 0
         final_label = self.prev_label
 
-        score_val = self.form_score(final_label, med)
+        score_val = float(form_scores[0, names.index(final_label)])
         return final_label, int(round(score_val)), float(best_conf)
 
     def form_score(self, label: str, med: Optional[Dict[str, float]]) -> float:
-        if med is None:
+        if med is None or label not in ACTIVITY_TABLE.labels:
             return 0.0
-        if label == "running":
-            p = np.clip(self._logistic(med["periodic_strength"], k=0.8, x0=2.0), 0, 1)
-            s = np.clip(med["ankle_speed_norm"] / 2.2, 0, 1)
-            freq_fit = np.clip(1 - abs(2.2 - med["dom_freq"]) / 1.6, 0, 1)
-            score = 0.5 * p + 0.35 * s + 0.15 * freq_fit
-            return float(score * 100.0)
-        if label == "walking":
-            freq_fit = np.clip(1 - abs(1.2 - med["dom_freq"]) / 1.0, 0, 1)
-            speed_fit = np.clip(med["ankle_speed_norm"] / 1.0, 0, 1)
-            periodic = np.clip(self._logistic(med["periodic_strength"], k=0.6, x0=1.2), 0, 1)
-            score = 0.5 * freq_fit + 0.35 * periodic + 0.15 * speed_fit
-            return float(score * 100.0)
-        if label == "squat":
-            depth = np.clip((160.0 - med["median_knee"]) / 80.0, 0, 1)
-            symmetry = np.clip(1.0 - med["knee_diff_med"] / 70.0, 0, 1)
-            torso_pen = np.clip(1.0 - abs(90.0 - med["hip_ang_med"]) / 50.0, 0, 1)
-            score = 0.6 * depth + 0.25 * symmetry + 0.15 * torso_pen
-            return float(score * 100.0)
-        if label == "lunge":
-            asym = np.clip(med["knee_diff_med"] / 60.0, 0, 1)
-            step = np.clip(med["hip_x_std_norm"] / 0.5, 0, 1)
-            score = 0.6 * asym + 0.4 * step
-            return float(score * 100.0)
-        if label == "pushup":
-            torso = np.clip(1.0 - med["median_torso"] / 40.0, 0, 1)
-            elbow = np.clip(1.0 - abs(80.0 - med["elbow_med"]) / 60.0, 0, 1)
-            motion = np.clip(1.0 - med["hip_y_range_norm"] / 0.3, 0, 1)
-            score = 0.6 * torso + 0.3 * elbow + 0.1 * motion
-            return float(score * 100.0)
-        if label == "plank":
-            t = np.clip(1.0 - med["median_torso"] / 25.0, 0, 1)
-            mv = np.clip(1.0 - med["hip_y_std_norm"] / 0.05, 0, 1)
-            score = 0.75 * t + 0.25 * mv
-            return float(score * 100.0)
-        if label == "jumping_jack":
-            ws = np.clip((med["median_wrist_norm"] - 1.2) / (2.0 - 1.2), 0, 1)
-            fs = np.clip((med["median_foot_norm"] - 1.2) / (2.0 - 1.2), 0, 1)
-            periodic = np.clip(self._logistic(med["periodic_strength"], k=0.6, x0=1.3), 0, 1)
-            score = 0.4 * (0.5 * ws + 0.5 * fs) + 0.6 * periodic
-            return float(score * 100.0)
-        if label == "burpee":
-            amp = np.clip(med["hip_y_range_norm"] / 0.6, 0, 1)
-            t = np.clip(1.0 - med["median_torso"] / 60.0, 0, 1)
-            score = 0.6 * amp + 0.4 * t
-            return float(score * 100.0)
-        if label == "situp":
-            freq_score = np.clip(1 - abs(1.0 - med["dom_freq"]) / 0.8, 0, 1)
-            amp = np.clip(med["hip_y_std_norm"] / 0.12, 0, 1)
-            score = 0.5 * freq_score + 0.5 * amp
-            return float(score * 100.0)
-        if label == "standing":
-            s = np.clip(1.0 - med["ankle_speed_norm"] / 0.25, 0, 1)
-            y = np.clip(1.0 - med["hip_y_std_norm"] / 0.02, 0, 1)
-            return float((0.6 * s + 0.4 * y) * 100.0)
-        return 0.0
+        _, form_scores = ACTIVITY_TABLE.evaluate(ACTIVITY_TABLE.stats_matrix(med))
+        return float(form_scores[0, ACTIVITY_TABLE.labels.index(label)])
+
+# (n,) -> (n, w) windows ending at each index, front-padded with `pad`
+def _windows(x: np.ndarray, w: int, pad: float) -> np.ndarray:
+    padded = np.concatenate([np.full(w - 1, pad, dtype=np.float64), np.asarray(x, dtype=np.float64)])
+    return sliding_window_view(padded, w)
+
+# rows per block of the batched window statistics
+_CHUNK = 4096
+
+# apply fn to row blocks so the (n, w) temporaries stay bounded for long clips
+def _rolling(x: np.ndarray, w: int, pad: float, fn: Any, chunk: int = _CHUNK) -> np.ndarray:
+    if len(x) == 0:
+        return fn(np.zeros((0, w)))
+    win = _windows(x, w, pad)
+    return np.concatenate([fn(win[i : i + chunk]) for i in range(0, len(x), chunk)])
+
+# median of the non-NaN entries of each row (NaN sorts last), same value as np.median
+def _row_medians(win: np.ndarray) -> np.ndarray:
+    srt = np.sort(win, axis=1)
+    n = np.sum(~np.isnan(win), axis=1)
+    lo = np.maximum((n - 1) // 2, 0)[:, None]
+    hi = np.maximum(n // 2, 0)[:, None]
+    return (np.take_along_axis(srt, lo, axis=1)[:, 0] + np.take_along_axis(srt, hi, axis=1)[:, 0]) / 2.0
+
+# mean and population std of the non-NaN entries of each row -> (rows, 2)
+def _row_moments(win: np.ndarray) -> np.ndarray:
+    mask = ~np.isnan(win)
+    n = np.maximum(np.sum(mask, axis=1), 1)
+    mean = np.sum(np.where(mask, win, 0.0), axis=1) / n
+    dev = np.where(mask, win - mean[:, None], 0.0)
+    return np.stack([mean, np.sqrt(np.sum(dev * dev, axis=1) / n)], axis=1)
+
+# rfft peak of mean-removed rows of equal length -> (rows, 2) [dom_freq, periodic_strength]
+def _row_periodicity(rows: np.ndarray, fps: float) -> np.ndarray:
+    y = rows - np.mean(rows, axis=1, keepdims=True)
+    yf = np.abs(np.fft.rfft(y, axis=1))
+    yf[:, 0] = 0
+    freqs = np.fft.rfftfreq(rows.shape[1], d=1.0 / fps)
+    peak = np.max(yf, axis=1)
+    idx = np.argmax(yf >= peak[:, None] * (1.0 - PEAK_RTOL), axis=1)
+    # np.delete(yf, idx) drops one maximum, i.e. the last element once sorted
+    rest = _row_medians(np.sort(yf, axis=1)[:, :-1]) + 1e-6
+    return np.stack([freqs[idx], peak / rest], axis=1)
+
+# Estimator._temporal_stats for every push of a frame_features_batch table at once.
+# Returns (stats, has_stats): stats[key][i] is what the streaming estimator reports
+# after the i-th push (up to float rounding of the running sums), has_stats[i] is
+# False where it would report None.
+def window_stats_batch(
+    table: Dict[str, np.ndarray], fps: float, window_size: int
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    w = int(window_size)
+    valid = np.asarray(table["valid"], dtype=bool)
+    p = len(valid)
+    valid_in_buf = _rolling(valid.astype(np.float64), w, 0.0, lambda win: np.sum(win, axis=1))
+    has_stats = valid_in_buf > 0
+
+    stats: Dict[str, np.ndarray] = {}
+    for key, src in PUSH_MEDIANS:
+        col = np.where(valid, table[src], np.nan)
+        stats[key] = _rolling(col, w, np.nan, _row_medians)
+
+    # series window: the last w valid frames, indexed by valid-frame ordinal
+    series = {c: np.asarray(table[c], dtype=np.float64)[valid] for c in SERIES_COLUMNS}
+    v = len(series["hip_y"])
+    n = np.minimum(np.arange(1, v + 1), w)
+    sw_median = _rolling(series["shoulder_width_px"], w, np.nan, _row_medians)
+    sw = sw_median + 1e-6
+    hip_y_std = _rolling(series["hip_y"], w, np.nan, _row_moments)[:, 1]
+    hip_x_std = _rolling(series["hip_x"], w, np.nan, _row_moments)[:, 1]
+    hip_y_max = _rolling(series["hip_y"], w, -np.inf, lambda win: np.max(win, axis=1))
+    hip_y_min = _rolling(series["hip_y"], w, np.inf, lambda win: np.min(win, axis=1))
+
+    periodicity = np.zeros((v, 2))
+    min_len = max(8, int(fps * 0.5))
+    hip_y = series["hip_y"]
+    if v >= w and w >= min_len:
+        # full windows only, in blocks like _rolling
+        win = sliding_window_view(hip_y, w)
+        for i in range(0, len(win), _CHUNK):
+            periodicity[w - 1 + i : w - 1 + i + _CHUNK] = _row_periodicity(win[i : i + _CHUNK], fps)
+    for j in range(min(v, w - 1)):
+        if j + 1 >= min_len:
+            periodicity[j] = _row_periodicity(hip_y[None, : j + 1], fps)[0]
+
+    # mean |Δankle| over the n - 1 steps inside each series window
+    def ankle_speed(cx: str, cy: str) -> np.ndarray:
+        steps = np.full(v, np.nan)
+        if v > 1:
+            steps[1:] = np.hypot(np.diff(series[cx]), np.diff(series[cy]))
+        if w < 2:
+            return np.zeros(v)
+        mean = _rolling(steps, w - 1, np.nan, _row_moments)[:, 0]
+        return np.where(n >= 2, mean / sw * fps, 0.0)
+
+    per_valid: Dict[str, np.ndarray] = {
+        "shoulder_width_median": sw_median,
+        "hip_y_std_norm": hip_y_std / sw,
+        "hip_y_range_norm": np.where(n > 1, (hip_y_max - hip_y_min) / sw, 0.0),
+        "hip_x_std_norm": hip_x_std / sw,
+        "dom_freq": periodicity[:, 0],
+        "periodic_strength": periodicity[:, 1],
+        "ankle_speed_norm": (
+            ankle_speed("left_ankle_x", "left_ankle_y") + ankle_speed("right_ankle_x", "right_ankle_y")
+        )
+        / 2.0,
+    }
+    # every push with stats has at least one valid frame behind it
+    ordinal = np.clip(np.cumsum(valid) - 1, 0, None)
+    for key, values in per_valid.items():
+        stats[key] = values[ordinal] if v else np.zeros(p)
+
+    motion = _motion(table["left_ankle_x"], table["left_ankle_y"], table["right_ankle_x"], table["right_ankle_y"])
+    motion = np.where(valid, motion, np.nan)
+    stats["motion_energy"] = _rolling(motion, w, np.nan, _row_moments)[:, 0]
+
+    for key in stats:
+        stats[key] = np.where(has_stats, stats[key], np.nan)
+    return stats, has_stats
+
+# label hysteresis of Estimator.detect over a run of best-label indices:
+# a new label is adopted once it has been best for stable_threshold frames in a row
+def _hysteresis(best: np.ndarray, stable_threshold: int) -> np.ndarray:
+    n = len(best)
+    if n == 0:
+        return best
+    starts = np.flatnonzero(np.r_[True, best[1:] != best[:-1]])
+    lengths = np.diff(np.r_[starts, n])
+    lag = max(int(stable_threshold) - 1, 0)
+    adopted = np.full(n, -1)
+    take = lengths > lag
+    adopted[starts[take] + lag] = best[starts[take]]
+    adopted[0] = best[0]
+    last = np.maximum.accumulate(np.where(adopted >= 0, np.arange(n), 0))
+    return adopted[last]
+
+# offline equivalent of pushing every row of `table` through Estimator.push/detect:
+# per-push labels, integer scores and confidences plus the window stats
+def score_sequence(
+    table: Dict[str, np.ndarray],
+    fps: float = 30,
+    window_seconds: float = 3.0,
+    stable_threshold: int = 3,
+    mode: str = "auto",
+) -> Dict[str, Any]:
+    est = Estimator(fps=fps, window_seconds=window_seconds, stable_threshold=stable_threshold, mode=mode)
+    stats, has_stats = window_stats_batch(table, est.fps, est.window_size)
+    p = len(has_stats)
+    labels = np.full(p, "unknown", dtype=object)
+    scores = np.zeros(p, dtype=np.int64)
+    confs = np.zeros(p, dtype=np.float64)
+
+    rows = np.flatnonzero(has_stats)
+    if rows.size:
+        vals, form = ACTIVITY_TABLE.evaluate(ACTIVITY_TABLE.stats_matrix(stats)[rows])
+        names = list(ACTIVITY_TABLE.labels)
+        vals_shift = vals - np.max(vals, axis=1, keepdims=True)
+        expv = np.exp(vals_shift * 6.0)
+        probs = expv / (np.sum(expv, axis=1, keepdims=True) + 1e-12)
+        best = np.argmax(probs, axis=1)
+        best_conf = probs[np.arange(rows.size), best]
+        if est.mode != "auto":
+            override = str(est.mode).lower()
+            if override in names:
+                best = np.full(rows.size, names.index(override))
+                best_conf = np.maximum(best_conf, 0.6)
+            else:
+                best_conf = np.maximum(best_conf, 0.55)
+
+        final = _hysteresis(best, est.stable_threshold)
+        labels[rows] = np.array(names, dtype=object)[final]
+        scores[rows] = np.rint(form[np.arange(rows.size), final]).astype(np.int64)
+        confs[rows] = best_conf
+
+    return {"labels": labels, "scores": scores, "confs": confs, "stats": stats, "has_stats": has_stats}
+
+# EstimatorBank.mode values other than a label index
+_MODE_AUTO = -1
+_MODE_OTHER = -2
+
+# The rolling windows of many Estimators (same fps / window / stable_threshold) in shared
+# (sessions, columns, window) arrays, for many concurrent live sessions on one core.
+# add() / remove() hand out and recycle slots; each tick, push() appends one
+# frame_features_batch row per session and detect() computes window stats, class
+# probabilities, form scores and label hysteresis for all of them in vectorized batches.
+# For every slot, push + detect gives what a standalone Estimator would return after the
+# same pushes, up to float rounding of the window sums.
+class EstimatorBank:
+    def __init__(
+        self,
+        fps: float = 30,
+        window_seconds: float = 3.0,
+        stable_threshold: int = 3,
+        capacity: int = 64,
+    ) -> None:
+        self.fps: float = max(1.0, float(fps))
+        self.window_size: int = max(8, int(round(self.fps * window_seconds)))
+        self.stable_threshold: int = stable_threshold
+        self._series_columns: Tuple[str, ...] = SERIES_COLUMNS + ("left_step", "right_step")
+        self._capacity: int = 0
+        self._free: List[int] = []
+        self._count: int = 0
+        self._pushes = np.zeros((0, len(PUSH_COLUMNS), self.window_size))
+        self._series = np.zeros((0, len(self._series_columns), self.window_size))
+        self._push_pos = np.zeros(0, dtype=np.intp)
+        self._push_len = np.zeros(0, dtype=np.intp)
+        self._series_pos = np.zeros(0, dtype=np.intp)
+        self._series_len = np.zeros(0, dtype=np.intp)
+        # label indices, -1 = none yet
+        self._prev = np.zeros(0, dtype=np.intp)
+        self._candidate = np.zeros(0, dtype=np.intp)
+        self._stable = np.zeros(0, dtype=np.intp)
+        self._mode = np.zeros(0, dtype=np.intp)
+        self._active = np.zeros(0, dtype=bool)
+        self._grow(max(1, int(capacity)))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._pushes.nbytes + self._series.nbytes)
+
+    def _grow(self, capacity: int) -> None:
+        extra = capacity - self._capacity
+        w = self.window_size
+        self._pushes = np.concatenate([self._pushes, np.zeros((extra, len(PUSH_COLUMNS), w))])
+        self._series = np.concatenate([self._series, np.full((extra, len(self._series_columns), w), np.nan)])
+        for name in ("_push_pos", "_push_len", "_series_pos", "_series_len", "_prev", "_candidate", "_stable", "_mode"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(extra, dtype=np.intp)]))
+        self._active = np.concatenate([self._active, np.zeros(extra, dtype=bool)])
+        # lowest slots are handed out first
+        self._free.extend(range(capacity - 1, self._capacity - 1, -1))
+        self._capacity = capacity
+
+    # a new session with empty windows -> its slot id; amortized O(1) in the number of sessions
+    def add(self, mode: str = "auto") -> int:
+        if not self._free:
+            self._grow(2 * self._capacity)
+        slot = self._free.pop()
+        self._active[slot] = True
+        self._count += 1
+        self.reset(slot, mode)
+        return slot
+
+    def remove(self, slot: int) -> None:
+        self._check([slot])
+        self._active[slot] = False
+        self._free.append(slot)
+        self._count -= 1
+
+    # empty the windows of a slot, as a fresh Estimator(mode=mode)
+    def reset(self, slot: int, mode: str = "auto") -> None:
+        self._check([slot])
+        self._pushes[slot] = 0.0
+        self._series[slot] = np.nan
+        self._push_pos[slot] = self._push_len[slot] = 0
+        self._series_pos[slot] = self._series_len[slot] = 0
+        self._prev[slot] = self._candidate[slot] = -1
+        self._stable[slot] = 0
+        if mode == "auto":
+            self._mode[slot] = _MODE_AUTO
+        elif str(mode).lower() in ACTIVITY_TABLE.labels:
+            self._mode[slot] = ACTIVITY_TABLE.labels.index(str(mode).lower())
+        else:
+            self._mode[slot] = _MODE_OTHER
+
+    def _check(self, slots: Any) -> np.ndarray:
+        ids = np.asarray(slots, dtype=np.intp).reshape(-1)
+        if ids.size and (ids.min() < 0 or ids.max() >= self._capacity or not self._active[ids].all()):
+            raise KeyError(f"unknown EstimatorBank slot in {ids.tolist()}")
+        return ids
+
+    # Estimator.push for every slot in `slots`; row i of `table` (frame_features_batch output)
+    # is the next frame of slots[i]. A slot may appear at most once per call.
+    def push(self, slots: Sequence[int], table: Dict[str, np.ndarray]) -> None:
+        ids = self._check(slots)
+        if len(np.unique(ids)) != len(ids):
+            raise ValueError("a slot can take one frame per push()")
+        valid = np.asarray(table["valid"], dtype=bool)
+        if len(valid) != len(ids):
+            raise ValueError(f"{len(ids)} slots but {len(valid)} feature rows")
+        w = self.window_size
+
+        motion = _motion(table["left_ankle_x"], table["left_ankle_y"], table["right_ankle_x"], table["right_ankle_y"])
+        rows = np.column_stack([np.ones(len(ids))] + [table[src] for _, src in PUSH_MEDIANS] + [motion])
+        pos = self._push_pos[ids]
+        self._pushes[ids, :, pos] = np.where(valid[:, None], rows, 0.0)
+        self._push_pos[ids] = (pos + 1) % w
+        self._push_len[ids] = np.minimum(self._push_len[ids] + 1, w)
+
+        # valid frames also go to the series window, with |Δankle| from the previous one
+        vi = ids[valid]
+        if vi.size == 0:
+            return
+        spos = self._series_pos[vi]
+        prev = (spos - 1) % w
+        has_prev = self._series_len[vi] >= 1
+        cols = {c: i for i, c in enumerate(self._series_columns)}
+
+        def step(cx: str, cy: str) -> np.ndarray:
+            dx = np.asarray(table[cx])[valid] - self._series[vi, cols[cx], prev]
+            dy = np.asarray(table[cy])[valid] - self._series[vi, cols[cy], prev]
+            return np.where(has_prev, np.hypot(dx, dy), np.nan)
+
+        values = np.column_stack(
+            [np.asarray(table[c])[valid] for c in SERIES_COLUMNS]
+            + [step("left_ankle_x", "left_ankle_y"), step("right_ankle_x", "right_ankle_y")]
+        )
+        self._series[vi, :, spos] = values
+        self._series_pos[vi] = (spos + 1) % w
+        self._series_len[vi] = np.minimum(self._series_len[vi] + 1, w)
+
+    # Estimator._temporal_stats for each slot -> (stats, has_stats) like window_stats_batch:
+    # stats[key][i] belongs to slots[i] and is NaN where has_stats[i] is False
+    def window_stats(self, slots: Sequence[int]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        ids = self._check(slots)
+        b = len(ids)
+        w = self.window_size
+        cols = {c: i for i, c in enumerate(self._series_columns)}
+        pushes = self._pushes[ids]
+        valid = pushes[:, 0] > 0
+        has_stats = valid.any(axis=1)
+
+        stats: Dict[str, np.ndarray] = {}
+        sources = np.where(valid[:, None, :], pushes[:, 1 : 1 + len(PUSH_MEDIANS)], np.nan)
+        medians = _row_medians(sources.reshape(-1, w)).reshape(b, len(PUSH_MEDIANS))
+        for j, (key, _) in enumerate(PUSH_MEDIANS):
+            stats[key] = medians[:, j]
+
+        series = self._series[ids]
+        n = self._series_len[ids]
+        full = n == w
+        sw_median = np.where(n > 0, _row_medians(series[:, cols["shoulder_width_px"]]), 1.0)
+        sw = sw_median + 1e-6
+        hip_y = series[:, cols["hip_y"]]
+        hip_y_max = np.max(np.where(np.isnan(hip_y), -np.inf, hip_y), axis=1)
+        hip_y_min = np.min(np.where(np.isnan(hip_y), np.inf, hip_y), axis=1)
+
+        # the ring is only out of order once full, and |rfft| does not depend on the rotation
+        periodicity = np.zeros((b, 2))
+        min_len = max(8, int(self.fps * 0.5))
+        flat = hip_y_max == hip_y_min
+        rows = np.flatnonzero(full & ~flat)
+        if rows.size:
+            periodicity[rows] = _row_periodicity(hip_y[rows], self.fps)
+        for i in np.flatnonzero((n >= min_len) & ~full):
+            periodicity[i] = _row_periodicity(hip_y[i : i + 1, : n[i]], self.fps)[0]
+
+        # mean |Δankle| over the n - 1 steps inside the window: once full, the oldest row's
+        # step leads to a frame that has already left it
+        oldest = full[:, None] & (np.arange(w) == self._series_pos[ids][:, None])
+
+        def ankle_speed(col: str) -> np.ndarray:
+            steps = np.where(oldest, np.nan, series[:, cols[col]])
+            return np.where(n >= 2, _row_moments(steps)[:, 0] / sw * self.fps, 0.0)
+
+        motion = np.where(valid, pushes[:, -1], np.nan)
+        stats.update(
+            shoulder_width_median=sw_median,
+            hip_y_std_norm=_row_moments(hip_y)[:, 1] / sw,
+            hip_y_range_norm=np.where(n > 1, (hip_y_max - hip_y_min) / sw, 0.0),
+            hip_x_std_norm=_row_moments(series[:, cols["hip_x"]])[:, 1] / sw,
+            dom_freq=periodicity[:, 0],
+            periodic_strength=periodicity[:, 1],
+            ankle_speed_norm=(ankle_speed("left_step") + ankle_speed("right_step")) / 2.0,
+            motion_energy=_row_moments(motion)[:, 0],
+        )
+        for key in stats:
+            stats[key] = np.where(has_stats, stats[key], np.nan)
+        return stats, has_stats
+
+    # Estimator.detect for every slot (advancing each slot's label hysteresis once) ->
+    # {"labels", "scores", "confs", "stats", "has_stats"} like score_sequence, row i for slots[i]
+    def detect(self, slots: Sequence[int]) -> Dict[str, Any]:
+        ids = self._check(slots)
+        stats, has_stats = self.window_stats(ids)
+        b = len(ids)
+        labels = np.full(b, "unknown", dtype=object)
+        scores = np.zeros(b, dtype=np.int64)
+        confs = np.zeros(b, dtype=np.float64)
+
+        rows = np.flatnonzero(has_stats)
+        if rows.size:
+            s = ids[rows]
+            vals, form = ACTIVITY_TABLE.evaluate(ACTIVITY_TABLE.stats_matrix(stats)[rows])
+            vals_shift = vals - np.max(vals, axis=1, keepdims=True)
+            expv = np.exp(vals_shift * 6.0)
+            probs = expv / (np.sum(expv, axis=1, keepdims=True) + 1e-12)
+            best = np.argmax(probs, axis=1)
+            best_conf = probs[np.arange(rows.size), best]
+            mode = self._mode[s]
+            forced = mode >= 0
+            best = np.where(forced, mode, best)
+            best_conf = np.where(forced, np.maximum(best_conf, 0.6), best_conf)
+            best_conf = np.where(mode == _MODE_OTHER, np.maximum(best_conf, 0.55), best_conf)
+
+            prev = self._prev[s]
+            count = np.where(best == self._candidate[s], self._stable[s] + 1, 1)
+            adopt = (best != prev) & (count >= self.stable_threshold)
+            first = prev < 0
+            prev = np.where(first | adopt, best, prev)
+            count = np.where(adopt & ~first, 0, count)
+            self._prev[s] = prev
+            self._candidate[s] = best
+            self._stable[s] = count
+
+            labels[rows] = np.array(ACTIVITY_TABLE.labels, dtype=object)[prev]
+            scores[rows] = np.rint(form[np.arange(rows.size), prev]).astype(np.int64)
+            confs[rows] = best_conf
+
+        return {"labels": labels, "scores": scores, "confs": confs, "stats": stats, "has_stats": has_stats}
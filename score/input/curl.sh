@@ -1,4 +1,10 @@
 curl -X POST "http://localhost:8000/api/score" \
   -F "file=@input.mp4" \
   -F "mode=running" \
-  -F "max_width=640"
\ No newline at end of file
+  -F "max_width=640"
+# 60/120 fps uploads: analyze ~30 fps only
+curl -X POST "http://localhost:8000/api/score" \
+  -F "file=@input.mp4" \
+  -F "mode=running" \
+  -F "max_width=640" \
+  -F "target_fps=30"
@@ -0,0 +1,87 @@
+import queue
+import threading
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+VIS_THRESHOLD: float = 0.12
+
+def draw_skeleton(canvas: np.ndarray, xyvis: np.ndarray, connections: Iterable[Tuple[int, int]]) -> np.ndarray:
+    n = xyvis.shape[0]
+    for a, b in connections:
+        if a < 0 or b < 0 or a >= n or b >= n:
+            continue
+        xa, ya, va = xyvis[a]
+        xb, yb, vb = xyvis[b]
+        if va > VIS_THRESHOLD and vb > VIS_THRESHOLD:
+            cv2.line(canvas, (int(xa), int(ya)), (int(xb), int(yb)), (0, 200, 255), 2)
+    for x, y, v in xyvis:
+        c = (0, 255, 0) if v > VIS_THRESHOLD else (90, 90, 90)
+        cv2.circle(canvas, (int(x), int(y)), 3, c, -1)
+    return canvas
+
+# draws + encodes on a background thread; submit() blocks once `max_pending` frames are queued.
+# Encodes with the first of `fourccs` the OpenCV build can open: H.264 (avc1) plays in
+# browsers; the MPEG-4 Part 2 (mp4v) fallback of builds without an H.264 encoder does not,
+# so such a file is download-only.
+class AnnotatedVideoWriter:
+    _STOP = object()
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        fps: float,
+        size: Tuple[int, int],
+        connections: Iterable[Tuple[int, int]],
+        max_pending: int = 32,
+        fourccs: Sequence[str] = ("avc1", "mp4v"),
+    ) -> None:
+        self.path = Path(path)
+        self.connections = list(connections)
+        # the codec in use
+        self.fourcc: Optional[str] = None
+        for fourcc in fourccs:
+            self._writer = cv2.VideoWriter(str(self.path), cv2.VideoWriter_fourcc(*fourcc), float(fps), size)
+            if self._writer.isOpened():
+                self.fourcc = fourcc
+                break
+            self._writer.release()
+        if self.fourcc is None:
+            raise RuntimeError(f"Cannot open video writer for {self.path} ({', '.join(fourccs)})")
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._error: Optional[BaseException] = None
+        self.frames_written: int = 0
+        self._thread = threading.Thread(target=self._run, name="annotated-writer", daemon=True)
+        self._thread.start()
+
+    # the writer draws on `frame` in place, so the caller must not reuse it
+    def submit(self, frame: np.ndarray, xyvis: Optional[np.ndarray]) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"Annotated video encoding failed: {self._error}")
+        self._queue.put((frame, xyvis))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            if self._error is not None:
+                continue
+            try:
+                frame, xyvis = item
+                if xyvis is not None:
+                    draw_skeleton(frame, xyvis, self.connections)
+                self._writer.write(frame)
+                self.frames_written += 1
+            except Exception as e:
+                self._error = e
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        self._writer.release()
+        if self._error is not None:
+            raise RuntimeError(f"Annotated video encoding failed: {self._error}")
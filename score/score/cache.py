@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+# content address of a result: hash of the input bytes + every parameter that changes it
+def cache_key(content_hash: str, params: Dict[str, Any]) -> str:
+    blob = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{content_hash}:{blob}".encode()).hexdigest()
+
+class CacheStats:
+    def __init__(self) -> None:
+        self.memory_hits: int = 0
+        self.disk_hits: int = 0
+        self.coalesced: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+# JSON results on disk, one file per key; oldest files go first once max_bytes is exceeded
+class DiskTier:
+    def __init__(self, path: Union[str, Path], max_bytes: int, ttl_seconds: float) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes: int = int(max_bytes)
+        self.ttl_seconds: float = float(ttl_seconds)
+        self._lock = threading.Lock()
+        # key -> (size, mtime), oldest first
+        self._index: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._bytes: int = 0
+        entries = []
+        for p in self.path.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, p.stem, st.st_size))
+        for mtime, key, size in sorted(entries):
+            self._index[key] = (size, mtime)
+            self._bytes += size
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def _drop(self, key: str) -> None:
+        size, _ = self._index.pop(key)
+        self._bytes -= size
+        self._file(key).unlink(missing_ok=True)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[1] > self.ttl_seconds:
+                self._drop(key)
+                return None
+        try:
+            return json.loads(self._file(key).read_text())
+        except (OSError, ValueError):
+            with self._lock:
+                if key in self._index:
+                    self._drop(key)
+            return None
+
+    # returns the number of entries evicted to make room
+    def put(self, key: str, value: Any) -> int:
+        data = json.dumps(value).encode()
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._file(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        evicted = 0
+        now = time.time()
+        with self._lock:
+            if key in self._index:
+                self._bytes -= self._index.pop(key)[0]
+            self._index[key] = (len(data), now)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._drop(oldest)
+                evicted += 1
+            while self._index:
+                oldest, (_, mtime) = next(iter(self._index.items()))
+                if now - mtime <= self.ttl_seconds:
+                    break
+                self._drop(oldest)
+                evicted += 1
+        return evicted
+
+# In-memory LRU in front of an optional DiskTier. get_or_compute() coalesces concurrent
+# requests for the same key: the first one computes, the others await its result.
+class ResultCache:
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float = 86400.0,
+        disk_dir: Optional[Union[str, Path]] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self.max_entries: int = max(0, int(max_entries))
+        self.ttl_seconds: float = float(ttl_seconds)
+        self.disk: Optional[DiskTier] = DiskTier(disk_dir, disk_max_bytes, ttl_seconds) if disk_dir else None
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Future"] = {}
+
+    def _memory_get(self, key: str) -> Optional[Any]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > self.ttl_seconds:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return entry[1]
+
+    def _memory_put(self, key: str, value: Any) -> None:
+        if self.max_entries == 0:
+            return
+        self._memory[key] = (time.time(), value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    # -> (value, source) with source "memory", "disk", "coalesced" or "computed". With
+    # shared=False the computation neither joins nor is joined by concurrent requests for the
+    # key (e.g. one that can be cancelled: its failure must not reach other requests)
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]], shared: bool = True
+    ) -> Tuple[Any, str]:
+        value = self._memory_get(key)
+        if value is not None:
+            self.stats.memory_hits += 1
+            return value, "memory"
+        if not shared:
+            return await self._compute(key, compute)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+            value, _ = await asyncio.shield(task)
+            return value, "coalesced"
+        # a task of its own, so the result still lands in the cache (and reaches the
+        # coalesced waiters) if the request that started it goes away
+        task = asyncio.ensure_future(self._fill(key, compute))
+        task.add_done_callback(_retrieve)
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        try:
+            return await self._compute(key, compute)
+        finally:
+            del self._inflight[key]
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        value = await asyncio.to_thread(self.disk.get, key) if self.disk is not None else None
+        if value is not None:
+            self.stats.disk_hits += 1
+            self._memory_put(key, value)
+            return value, "disk"
+        self.stats.misses += 1
+        value = await compute()
+        self._memory_put(key, value)
+        if self.disk is not None:
+            try:
+                self.stats.evictions += await asyncio.to_thread(self.disk.put, key, value)
+            except OSError:
+                # a full or read-only cache dir only costs the disk tier
+                pass
+        return value, "computed"
+
+    def info(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = self.stats.as_dict()
+        out["memory_entries"] = len(self._memory)
+        out["disk_entries"] = len(self.disk) if self.disk is not None else 0
+        out["disk_bytes"] = self.disk.nbytes if self.disk is not None else 0
+        return out
+
+def _retrieve(task: "asyncio.Future") -> None:
+    if not task.cancelled():
+        task.exception()
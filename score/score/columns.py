@@ -0,0 +1,134 @@
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+# per scored frame: scores, confidences, labels
+FrameSeries = Tuple[Sequence[int], Sequence[float], Sequence[str]]
+
+_PART = re.compile(r"^part-(\d{6})\.npz$")
+
+# column of one part from row values: bool, int64, float64 (NaN for None, also for bools with
+# a None and for columns with no value at all) or str ("" for None)
+def _column(values: List[Any]) -> np.ndarray:
+    present = [v for v in values if v is not None]
+    if not present:
+        return np.full(len(values), np.nan)
+    complete = len(present) == len(values)
+    if all(isinstance(v, (bool, np.bool_)) for v in present):
+        if complete:
+            return np.array(values, dtype=bool)
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    if all(isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool) for v in present):
+        if complete and all(isinstance(v, (int, np.integer)) for v in present):
+            return np.array(values, dtype=np.int64)
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    return np.array(["" if v is None else str(v) for v in values], dtype=str)
+
+# a part's column without any value (all None when it was written)
+def _empty(column: np.ndarray) -> bool:
+    return column.dtype.kind == "f" and bool(np.isnan(column).all())
+
+# Append-only columnar table in a directory of parts, part-000000.npz, part-000001.npz, ...
+# Each append() writes one new part (atomically, so a crash never leaves half a part) with a
+# column per row field, plus, when frame series are given, their concatenation in
+# frame_score / frame_conf / frame_label with row i's frames at frame_offsets[i]:[i + 1].
+# Nothing is rewritten: parts are only added, and read() concatenates them. No pickled
+# objects, so parts load with allow_pickle=False. One writer per directory at a time.
+class ColumnStore:
+    def __init__(self, root: Union[str, Path], key_column: str = "key") -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.key_column: str = key_column
+
+    def parts(self) -> List[Path]:
+        return sorted(p for p in self.root.iterdir() if _PART.match(p.name))
+
+    def _next_part(self) -> Path:
+        parts = self.parts()
+        n = int(_PART.match(parts[-1].name).group(1)) + 1 if parts else 0
+        return self.root / f"part-{n:06d}.npz"
+
+    # rows must share their fields; frames, if given, has one series per row
+    def append(self, rows: Sequence[Dict[str, Any]], frames: Optional[Sequence[FrameSeries]] = None) -> Optional[Path]:
+        if not rows:
+            return None
+        names = list(rows[0])
+        if any(list(r) != names for r in rows):
+            raise ValueError("rows of one part must have the same fields")
+        if frames is not None and len(frames) != len(rows):
+            raise ValueError(f"{len(frames)} frame series for {len(rows)} rows")
+        columns: Dict[str, np.ndarray] = {name: _column([r[name] for r in rows]) for name in names}
+        if frames is not None:
+            lengths = [len(scores) for scores, _, _ in frames]
+            columns["frame_offsets"] = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            columns["frame_score"] = np.array([s for scores, _, _ in frames for s in scores], dtype=np.int16)
+            columns["frame_conf"] = np.array([c for _, confs, _ in frames for c in confs], dtype=np.float32)
+            columns["frame_label"] = np.array([l for _, _, labels in frames for l in labels], dtype=str)
+        path = self._next_part()
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **columns)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return path
+
+    def _load(self, path: Path) -> Iterator[Tuple[str, np.ndarray]]:
+        with np.load(path, allow_pickle=False) as part:
+            for name in part.files:
+                yield name, part[name]
+
+    # values of the key column over every part
+    def keys(self) -> Set[str]:
+        out: Set[str] = set()
+        for path in self.parts():
+            with np.load(path, allow_pickle=False) as part:
+                if self.key_column in part.files:
+                    out.update(part[self.key_column].tolist())
+        return out
+
+    # every part concatenated; a field missing from a part, or without any value there, is
+    # NaN / "" there. Numeric columns are promoted (bool < int64 < float64); one that holds
+    # strings in some parts and numbers in others raises ValueError. Frame offsets are rebased
+    # onto the concatenated frame columns (rows of parts without frames get none).
+    def read(self, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        loaded = [dict(self._load(p)) for p in self.parts()]
+        sizes = [len(next((v for k, v in part.items() if not k.startswith("frame_")), [])) for part in loaded]
+        frame_cols = ("frame_score", "frame_conf", "frame_label")
+        names: List[str] = []
+        for part in loaded:
+            names += [k for k in part if k not in names and k != "frame_offsets" and k not in frame_cols]
+        if columns is not None:
+            names = [n for n in names if n in columns]
+        out: Dict[str, np.ndarray] = {}
+        for name in names:
+            kinds = {part[name].dtype.kind == "U" for part in loaded if name in part and not _empty(part[name])}
+            if len(kinds) > 1:
+                raise ValueError(f"column {name!r} holds strings in some parts and numbers in others")
+            text = kinds == {True}
+            chunks = []
+            for part, size in zip(loaded, sizes):
+                if name in part and not (text and _empty(part[name])):
+                    chunks.append(part[name])
+                else:
+                    chunks.append(np.full(size, "", dtype=str) if text else np.full(size, np.nan))
+            out[name] = np.concatenate(chunks) if chunks else np.zeros(0)
+        if columns is None or any(c in columns for c in frame_cols + ("frame_offsets",)):
+            offsets = [np.zeros(1, dtype=np.int64)]
+            total = 0
+            for part, size in zip(loaded, sizes):
+                rel = part.get("frame_offsets", np.zeros(size + 1, dtype=np.int64))
+                offsets.append(rel[1:] + total)
+                total += int(rel[-1])
+            out["frame_offsets"] = np.concatenate(offsets)
+            empty = {"frame_score": np.int16, "frame_conf": np.float32, "frame_label": str}
+            for name in frame_cols:
+                chunks = [part[name] for part in loaded if name in part]
+                out[name] = np.concatenate(chunks) if chunks else np.zeros(0, dtype=empty[name])
+        return out
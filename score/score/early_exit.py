@@ -0,0 +1,97 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from score.rolling import SlidingMoments
+
+# When to stop analyzing a video before its end; criteria left None are off.
+# stable: the label has held and the score standard deviation stayed within `tolerance`
+# over the last span_seconds of scored frames (counted once the Estimator window is full);
+# time_budget / frame_budget: budget_seconds of analysis or budget_frames analyzed frames.
+class EarlyExit:
+    def __init__(
+        self,
+        span_seconds: Optional[float] = None,
+        tolerance: float = 2.0,
+        budget_seconds: Optional[float] = None,
+        budget_frames: Optional[int] = None,
+    ) -> None:
+        self.span_seconds: Optional[float] = span_seconds
+        self.tolerance: float = float(tolerance)
+        self.budget_seconds: Optional[float] = budget_seconds
+        self.budget_frames: Optional[int] = budget_frames
+
+    @property
+    def enabled(self) -> bool:
+        return self.span_seconds is not None or self.budget_seconds is not None or self.budget_frames is not None
+
+    def monitor(self, fps: float, warmup_frames: int = 0) -> "EarlyExitMonitor":
+        return EarlyExitMonitor(self, fps, warmup_frames)
+
+# One analysis under an EarlyExit rule. frame() is called by the scoring stage for every
+# analyzed frame in order; stopped() is also polled by the decoder, so the time budget cuts
+# decoding off even while the later stages are behind. Frames that arrive after the stop
+# are dropped, and end / frames then describe what the result covers.
+class EarlyExitMonitor:
+    def __init__(self, rule: EarlyExit, fps: float, warmup_frames: int = 0) -> None:
+        self.rule = rule
+        self.span: Optional[int] = None
+        if rule.span_seconds is not None:
+            self.span = max(2, int(math.ceil(rule.span_seconds * fps)))
+        self.deadline: Optional[float] = None
+        if rule.budget_seconds is not None:
+            self.deadline = time.perf_counter() + rule.budget_seconds
+        self.warmup: int = int(warmup_frames)
+        self.reason: Optional[str] = None
+        # frames analyzed and index past the last one, up to the stop
+        self.frames: int = 0
+        self.end: int = 0
+        self._stop = threading.Event()
+        self._scored: int = 0
+        self._label: Optional[str] = None
+        self._held: int = 0
+        self._scores: Deque[float] = deque()
+        self._moments = SlidingMoments()
+
+    def _halt(self, reason: str) -> bool:
+        if not self._stop.is_set():
+            self.reason = reason
+            self._stop.set()
+        return True
+
+    def stopped(self) -> bool:
+        if self._stop.is_set():
+            return True
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return self._halt("time_budget")
+        return False
+
+    # label / score are None for frames without a scored person; True once stopped
+    def frame(self, idx: int, label: Optional[str] = None, score: Optional[float] = None) -> bool:
+        if self.stopped():
+            return True
+        self.frames += 1
+        self.end = idx + 1
+        rule = self.rule
+        if rule.budget_frames is not None and self.frames >= rule.budget_frames:
+            return self._halt("frame_budget")
+        if self.span is None or label is None:
+            return False
+        self._scored += 1
+        self._held = self._held + 1 if label == self._label else 1
+        self._label = label
+        self._scores.append(float(score))
+        self._moments.add(float(score))
+        if len(self._scores) > self.span:
+            self._moments.remove(self._scores.popleft())
+        if self._scored % self.span == 0:
+            self._moments.reset(self._scores)
+        if (
+            self._scored >= self.warmup + self.span
+            and self._held >= self.span
+            and self._moments.std() <= rule.tolerance
+        ):
+            return self._halt("stable")
+        return False
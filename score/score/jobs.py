@@ -0,0 +1,239 @@
+import asyncio
+import heapq
+import itertools
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+# highest precedence first
+PRIORITIES: Tuple[str, ...] = ("live", "normal", "background")
+
+class JobQueueFull(Exception):
+    pass
+
+class AnalysisCancelled(Exception):
+    pass
+
+# Frames done / total and a cancel flag for one analysis, in three integer cells: a plain
+# list in-process, or a slot of a shared array (see score.workers.ProgressBoard) when the
+# analysis runs in a worker process. One writer per cell, so no locking.
+class Progress:
+    def __init__(self, cells: Optional[Any] = None, slot: Optional[int] = None) -> None:
+        self.slot: Optional[int] = slot
+        self._cells: Any = cells if cells is not None else [0, 0, 0]
+        self._i: int = 3 * (slot or 0) if cells is not None else 0
+
+    @property
+    def done(self) -> int:
+        return int(self._cells[self._i])
+
+    @property
+    def total(self) -> int:
+        return int(self._cells[self._i + 1])
+
+    @property
+    def cancelled(self) -> bool:
+        return bool(self._cells[self._i + 2])
+
+    def update(self, done: int, total: int) -> None:
+        self._cells[self._i] = int(done)
+        self._cells[self._i + 1] = int(total)
+
+    def cancel(self) -> None:
+        self._cells[self._i + 2] = 1
+
+    # raise AnalysisCancelled once cancel() was called
+    def check(self) -> None:
+        if self._cells[self._i + 2]:
+            raise AnalysisCancelled("job cancelled")
+
+    # plain in-process copy, e.g. before a shared slot is handed back
+    def snapshot(self) -> "Progress":
+        return Progress([self.done, self.total, int(self.cancelled)])
+
+class Job:
+    def __init__(
+        self,
+        run: Callable[["Job"], Awaitable[Any]],
+        priority: str,
+        cleanup: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.id: str = uuid.uuid4().hex
+        self.priority: str = priority
+        # queued -> running -> done | failed | cancelled
+        self.status: str = "queued"
+        self.created_at: float = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.progress: Progress = Progress()
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self._run = run
+        self._cleanup = cleanup
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def _finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = time.time()
+        cleanup, self._cleanup = self._cleanup, None
+        if cleanup is not None:
+            cleanup()
+
+# In-process job queue: submit() returns at once and `concurrency` runner tasks take queued
+# jobs by priority class, then submission order. At most max_queued jobs wait (JobQueueFull
+# beyond that); limits caps how many jobs of a class run at once, so e.g. background work
+# always leaves a runner free for live jobs. Finished jobs are kept ttl_seconds for polling.
+class JobQueue:
+    def __init__(
+        self,
+        concurrency: int,
+        max_queued: int,
+        ttl_seconds: float,
+        limits: Optional[Dict[str, int]] = None,
+        priorities: Sequence[str] = PRIORITIES,
+    ) -> None:
+        self.concurrency: int = max(1, int(concurrency))
+        self.max_queued: int = max(0, int(max_queued))
+        self.ttl_seconds: float = float(ttl_seconds)
+        self.priorities: Tuple[str, ...] = tuple(priorities)
+        self.limits: Dict[str, int] = {k: max(1, int(v)) for k, v in (limits or {}).items()}
+        self._rank: Dict[str, int] = {p: i for i, p in enumerate(self.priorities)}
+        self._jobs: Dict[str, Job] = {}
+        self._heap: List[Tuple[int, int, Job]] = []
+        self._seq = itertools.count()
+        self._queued: int = 0
+        self._running: Dict[str, int] = {}
+        self._cond: Optional[asyncio.Condition] = None
+        self._runners: List["asyncio.Task"] = []
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def counts(self) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for job in self._jobs.values():
+            out[job.status] = out.get(job.status, 0) + 1
+        return out
+
+    async def start(self) -> None:
+        if self._runners:
+            return
+        self._cond = asyncio.Condition()
+        self._runners = [asyncio.create_task(self._runner(), name=f"job-runner-{i}") for i in range(self.concurrency)]
+
+    # stops the runners; jobs still queued or running end as cancelled
+    async def close(self) -> None:
+        runners, self._runners = self._runners, []
+        for task in runners:
+            task.cancel()
+        await asyncio.gather(*runners, return_exceptions=True)
+        for job in self._jobs.values():
+            if not job.finished:
+                job._finish("cancelled")
+        self._heap.clear()
+        self._queued = 0
+
+    def submit(
+        self,
+        run: Callable[[Job], Awaitable[Any]],
+        priority: str = "normal",
+        cleanup: Optional[Callable[[], None]] = None,
+    ) -> Job:
+        if priority not in self._rank:
+            raise ValueError(f"unknown priority {priority!r}; expected one of {', '.join(self.priorities)}")
+        if self._cond is None:
+            raise RuntimeError("job queue is not running")
+        self.sweep()
+        if self._queued >= self.max_queued:
+            raise JobQueueFull(f"{self._queued} jobs queued")
+        job = Job(run, priority, cleanup)
+        self._jobs[job.id] = job
+        heapq.heappush(self._heap, (self._rank[priority], next(self._seq), job))
+        self._queued += 1
+        self._notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self.sweep()
+        return self._jobs.get(job_id)
+
+    # queued jobs end right away; running ones stop at their next progress check
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.progress.cancel()
+        if job.status == "queued":
+            self._queued -= 1
+            job._finish("cancelled")
+        return job
+
+    # jobs queued ahead of this one in the order runners will take them
+    def position(self, job: Job) -> Optional[int]:
+        if job.status != "queued":
+            return None
+        key = next((rank, seq) for rank, seq, j in self._heap if j is job)
+        return sum(1 for rank, seq, j in self._heap if j.status == "queued" and (rank, seq) < key)
+
+    def sweep(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [k for k, j in self._jobs.items() if j.finished and j.finished_at is not None and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _notify(self) -> None:
+        cond = self._cond
+
+        async def wake() -> None:
+            async with cond:
+                cond.notify_all()
+
+        asyncio.get_running_loop().create_task(wake())
+
+    def _eligible(self) -> Optional[Job]:
+        # cancelled entries are dropped lazily
+        while self._heap and self._heap[0][2].status != "queued":
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        job = self._heap[0][2]
+        limit = self.limits.get(job.priority)
+        # the top job has the highest queued class, so if it has to wait, every job does
+        if limit is not None and self._running.get(job.priority, 0) >= limit:
+            return None
+        heapq.heappop(self._heap)
+        return job
+
+    async def _next(self) -> Job:
+        async with self._cond:
+            while True:
+                job = self._eligible()
+                if job is not None:
+                    self._queued -= 1
+                    self._running[job.priority] = self._running.get(job.priority, 0) + 1
+                    return job
+                await self._cond.wait()
+
+    async def _runner(self) -> None:
+        while True:
+            job = await self._next()
+            job.status = "running"
+            job.started_at = time.time()
+            status = "failed"
+            try:
+                job.result = await job._run(job)
+                status = "done"
+            except AnalysisCancelled:
+                status = "cancelled"
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            except Exception as e:
+                job.error = str(e) or type(e).__name__
+            finally:
+                self._running[job.priority] -= 1
+                job._finish(status)
+                self._notify()
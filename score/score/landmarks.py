@@ -0,0 +1,44 @@
+import io
+
+import numpy as np
+
+NUM_LANDMARKS: int = 33
+NPY_MAGIC: bytes = b"\x93NUMPY"
+# one frame of little-endian float32 (x, y, visibility)
+FRAME_BYTES: int = NUM_LANDMARKS * 3 * 4
+
+class LandmarkPayloadError(ValueError):
+    pass
+
+# (N, 33, 3) float32 from a .npy file or raw little-endian float32 bytes
+def decode_landmarks(data: bytes) -> np.ndarray:
+    if data.startswith(NPY_MAGIC):
+        try:
+            arr = np.load(io.BytesIO(data), allow_pickle=False)
+        except (ValueError, EOFError, OSError) as e:
+            raise LandmarkPayloadError(f"Invalid .npy payload: {e}")
+        if arr.dtype.kind not in "fiu":
+            raise LandmarkPayloadError(f"Unsupported .npy dtype: {arr.dtype}.")
+    else:
+        if len(data) % FRAME_BYTES != 0:
+            raise LandmarkPayloadError(
+                f"Raw payload must be float32 (N, {NUM_LANDMARKS}, 3): {len(data)} bytes is not a multiple of {FRAME_BYTES}."
+            )
+        arr = np.frombuffer(data, dtype="<f4")
+        arr = arr.reshape(-1, NUM_LANDMARKS, 3)
+    if arr.ndim != 3 or arr.shape[1:] != (NUM_LANDMARKS, 3):
+        raise LandmarkPayloadError(f"Expected shape (N, {NUM_LANDMARKS}, 3), got {arr.shape}.")
+    return np.ascontiguousarray(arr, dtype=np.float32)
+
+# normalized [0, 1] coordinates -> pixel coordinates, rounded and clamped as utils.landmark does
+def to_pixels(xyvis: np.ndarray, image_width: int, image_height: int) -> np.ndarray:
+    out = np.array(xyvis, dtype=np.float32)
+    x = np.rint(xyvis[:, :, 0].astype(np.float64) * image_width)
+    y = np.rint(xyvis[:, :, 1].astype(np.float64) * image_height)
+    out[:, :, 0] = np.clip(x, 0, image_width - 1)
+    out[:, :, 1] = np.clip(y, 0, image_height - 1)
+    return out
+
+# frames the client marked as "no person" (NaN/inf) are dropped, like frames where Pose finds nobody
+def detected_frames(xyvis: np.ndarray) -> np.ndarray:
+    return xyvis[np.isfinite(xyvis).all(axis=(1, 2))]
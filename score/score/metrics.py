@@ -0,0 +1,160 @@
+import bisect
+import math
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# per-frame stage latencies, seconds
+STAGE_BUCKETS: Tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Per-analysis stage timings: count, total seconds and bucket counts per stage, as plain lists
+# so they pickle cheaply out of pool workers. Each stage is only observed from one thread.
+class StageTimer:
+    def __init__(self, buckets: Sequence[float] = STAGE_BUCKETS) -> None:
+        self.buckets: Tuple[float, ...] = tuple(buckets)
+        # stage -> [count, seconds, bucket counts (len(buckets) + 1, last is +Inf)]
+        self.stages: Dict[str, List[Any]] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = [0, 0.0, [0] * (len(self.buckets) + 1)]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2][bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def merge(self, other: "StageTimer") -> None:
+        for stage, (count, seconds, counts) in other.stages.items():
+            entry = self.stages.get(stage)
+            if entry is None:
+                self.stages[stage] = [count, seconds, list(counts)]
+                continue
+            entry[0] += count
+            entry[1] += seconds
+            entry[2] = [a + b for a, b in zip(entry[2], counts)]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {"count": count, "total_ms": seconds * 1000.0, "mean_ms": seconds * 1000.0 / count if count else 0.0}
+            for stage, (count, seconds, _) in self.stages.items()
+        }
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _num(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[str]:
+        return ()
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+# value read at scrape time
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Dict[LabelValues, float]], labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._fn = fn
+
+    def samples(self) -> Iterable[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in sorted(self._fn().items())]
+
+# running total kept elsewhere (e.g. cache stats), read at scrape time
+class CounterFunc(Gauge):
+    kind = "counter"
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(buckets)
+        # labels -> [count, sum, per-bucket counts (not cumulative), last is +Inf]
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def _entry(self, labels: LabelValues) -> List[Any]:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [0, 0.0, [0] * (len(self.buckets) + 1)]
+        return entry
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            entry = self._entry(labels)
+            entry[0] += 1
+            entry[1] += value
+            entry[2][bisect.bisect_left(self.buckets, value)] += 1
+
+    # add pre-bucketed observations (same buckets), e.g. a StageTimer entry from a worker
+    def merge(self, count: int, total: float, counts: Sequence[int], *labels: str) -> None:
+        if len(counts) != len(self.buckets) + 1:
+            raise ValueError(f"{self.name}: expected {len(self.buckets) + 1} bucket counts, got {len(counts)}")
+        with self._lock:
+            entry = self._entry(labels)
+            entry[0] += count
+            entry[1] += total
+            entry[2] = [a + b for a, b in zip(entry[2], counts)]
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((k, (v[0], v[1], list(v[2]))) for k, v in self._values.items())
+        out = []
+        for labels, (count, total, counts) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, labels, ('le', _num(bound)))} {cumulative}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(total)}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return out
+
+# Prometheus text exposition (format 0.0.4) without a client library dependency
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics) + "\n"
@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+_DONE = object()
+
+class StageStats:
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+        self.items: int = 0
+        self.busy_seconds: float = 0.0
+
+    # items per second of time spent inside the stage (not waiting on its queues)
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+# most items the source can have handed out and not yet seen finish the last stage:
+# one per queue slot, plus one being processed and one waiting to be queued per stage
+def max_in_flight(stages: int, maxsize: int = 8) -> int:
+    return int(stages) * (max(1, int(maxsize)) + 2)
+
+# source -> stage 1 -> ... -> stage n, one thread per step and a bounded FIFO between steps,
+# so items keep their order and a slow stage backs up the ones before it.
+# The last stage runs on the calling thread; the first error stops every step and is re-raised.
+def run_pipeline(
+    source: Iterable[Any],
+    stages: Sequence[Tuple[str, Callable[[Any], Any]]],
+    source_name: str = "source",
+    maxsize: int = 8,
+) -> List[StageStats]:
+    if not stages:
+        raise ValueError("run_pipeline needs at least one stage")
+    stats = [StageStats(source_name)] + [StageStats(name) for name, _ in stages]
+    queues: List["queue.Queue"] = [queue.Queue(maxsize=max(1, int(maxsize))) for _ in stages]
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def put(q: "queue.Queue", item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: "queue.Queue") -> Any:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def fail(e: BaseException) -> None:
+        errors.append(e)
+        stop.set()
+
+    def run_source() -> None:
+        st = stats[0]
+        it: Iterator[Any] = iter(source)
+        try:
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                st.busy_seconds += time.perf_counter() - t0
+                st.items += 1
+                if not put(queues[0], item):
+                    return
+            put(queues[0], _DONE)
+        except BaseException as e:
+            fail(e)
+
+    def run_stage(i: int) -> None:
+        st = stats[i + 1]
+        fn = stages[i][1]
+        out_q: Optional["queue.Queue"] = queues[i + 1] if i + 1 < len(stages) else None
+        try:
+            while True:
+                item = get(queues[i])
+                if item is _DONE:
+                    if out_q is not None:
+                        put(out_q, _DONE)
+                    return
+                t0 = time.perf_counter()
+                result = fn(item)
+                st.busy_seconds += time.perf_counter() - t0
+                st.items += 1
+                if out_q is not None and not put(out_q, result):
+                    return
+        except BaseException as e:
+            fail(e)
+
+    threads = [threading.Thread(target=run_source, name=f"pipeline-{source_name}", daemon=True)]
+    threads += [
+        threading.Thread(target=run_stage, args=(i,), name=f"pipeline-{stages[i][0]}", daemon=True)
+        for i in range(len(stages) - 1)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        run_stage(len(stages) - 1)
+    finally:
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+    return stats
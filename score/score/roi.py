@@ -0,0 +1,128 @@
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# x0, y0, x1, y1 in frame pixels
+Box = Tuple[int, int, int, int]
+
+# Person region of interest for pose inference. While tracking, the model input is the
+# previous frame's landmark bounding box, padded and squared, downscaled so its long side
+# is at most `size` px: inference cost stays about the same whatever the source resolution,
+# and a far-away subject keeps its native pixels. The box only moves when the subject nears
+# its edge or shrinks well inside it; every move means the pose tracker has to start over
+# (its state is in crop coordinates), so update() reports it.
+# Without a box (start, or tracking lost) each frame tries one search region, downscaled to
+# at most `detect_size` px: the whole frame first, then overlapping 2x2 and 3x3 tiles. The
+# pose detector sees its input at a fixed small size, so a subject that is small in a
+# high-resolution frame is only found in a tile.
+class PersonRoi:
+    def __init__(
+        self,
+        size: int = 384,
+        detect_size: int = 960,
+        pad: float = 0.5,
+        margin: float = 0.1,
+        min_visibility: float = 0.3,
+        overlap: float = 0.25,
+        min_tile: int = 240,
+    ) -> None:
+        self.size: int = max(32, int(size))
+        self.detect_size: int = max(32, int(detect_size))
+        self.pad: float = float(pad)
+        self.margin: float = float(margin)
+        self.min_visibility: float = float(min_visibility)
+        self.overlap: float = float(overlap)
+        self.min_tile: int = int(min_tile)
+        self.box: Optional[Box] = None
+        self._scan: int = 0
+        self._regions: Dict[Tuple[int, int], List[Box]] = {}
+        # search passes run / times the box moved
+        self.searches: int = 0
+        self.moves: int = 0
+
+    # whole frame, then n x n tiles (n = 2, 3) overlapping by `overlap` of a tile, while
+    # the tiles' short side stays at least min_tile px
+    def regions(self, w: int, h: int) -> List[Box]:
+        out = self._regions.get((w, h))
+        if out is None:
+            out = [(0, 0, w, h)]
+            for n in (2, 3):
+                tw = min(w, int(round(w / n * (1.0 + self.overlap))))
+                th = min(h, int(round(h / n * (1.0 + self.overlap))))
+                if min(tw, th) < self.min_tile:
+                    break
+                xs = np.linspace(0, w - tw, n).round().astype(int)
+                ys = np.linspace(0, h - th, n).round().astype(int)
+                out += [(int(x), int(y), int(x) + tw, int(y) + th) for y in ys for x in xs]
+            self._regions[(w, h)] = out
+        return out
+
+    # model input for this frame and the box it covers
+    def image(self, rgb: np.ndarray) -> Tuple[np.ndarray, Box]:
+        h, w = rgb.shape[:2]
+        if self.box is None:
+            regions = self.regions(w, h)
+            box, limit = regions[self._scan % len(regions)], self.detect_size
+            self._scan += 1
+            self.searches += 1
+        else:
+            box, limit = self.box, self.size
+        x0, y0, x1, y1 = box
+        crop = rgb[y0:y1, x0:x1]
+        scale = limit / float(max(x1 - x0, y1 - y0))
+        if scale < 1.0:
+            size = (max(1, int(round((x1 - x0) * scale))), max(1, int(round((y1 - y0) * scale))))
+            return cv2.resize(crop, size), box
+        return np.ascontiguousarray(crop), box
+
+    # normalized (33, 3) model output over `box` -> frame pixels, rounded and clipped like
+    # score.utils.landmark
+    @staticmethod
+    def to_frame(norm: np.ndarray, box: Box, w: int, h: int) -> np.ndarray:
+        x0, y0, x1, y1 = box
+        out = np.empty((len(norm), 3), dtype=np.float32)
+        out[:, 0] = np.clip(np.round(x0 + norm[:, 0] * (x1 - x0)), 0, w - 1)
+        out[:, 1] = np.clip(np.round(y0 + norm[:, 1] * (y1 - y0)), 0, h - 1)
+        out[:, 2] = norm[:, 2]
+        return out
+
+    # the search starts over from the whole frame
+    def lost(self) -> None:
+        self.box = None
+        self._scan = 0
+
+    # follow the landmarks found in this frame; True when the box moved
+    def update(self, xyvis: np.ndarray, w: int, h: int) -> bool:
+        pts = xyvis[xyvis[:, 2] >= self.min_visibility, :2]
+        if len(pts) < 4:
+            pts = xyvis[:, :2]
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+        side = float(max(hi - lo)) * (1.0 + 2.0 * self.pad)
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            inset = self.margin * max(x1 - x0, y1 - y0)
+            # a side on the frame border cannot move further out, so it does not count
+            inside = (
+                (lo[0] >= x0 + inset or x0 == 0)
+                and (lo[1] >= y0 + inset or y0 == 0)
+                and (hi[0] <= x1 - inset or x1 == w)
+                and (hi[1] <= y1 - inset or y1 == h)
+            )
+            if inside and side >= 0.5 * max(x1 - x0, y1 - y0):
+                return False
+        cx, cy = (lo + hi) / 2.0
+        side = max(side, 32.0)
+        x0, x1 = _span(cx, side, w)
+        y0, y1 = _span(cy, side, h)
+        self.box = (x0, y0, x1, y1)
+        self._scan = 0
+        self.moves += 1
+        return True
+
+# [start, end) of length `side` centred on c, shifted to fit in [0, limit]
+def _span(c: float, side: float, limit: int) -> Tuple[int, int]:
+    if side >= limit:
+        return 0, limit
+    start = int(round(min(max(c - side / 2.0, 0.0), limit - side)))
+    return start, min(limit, start + int(round(side)))
@@ -0,0 +1,307 @@
+import math
+from array import array
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# sorted window -> median in O(log W) search + memmove insert/delete
+class SlidingMedian:
+    def __init__(self) -> None:
+        self._sorted: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def add(self, x: float) -> None:
+        insort(self._sorted, x)
+
+    def remove(self, x: float) -> None:
+        i = bisect_left(self._sorted, x)
+        if i < len(self._sorted) and self._sorted[i] == x:
+            del self._sorted[i]
+
+    def clear(self) -> None:
+        self._sorted.clear()
+
+    # same definition as np.median: mean of the two middle values when n is even
+    def median(self) -> Optional[float]:
+        n = len(self._sorted)
+        if n == 0:
+            return None
+        mid = n // 2
+        if n % 2 == 1:
+            return self._sorted[mid]
+        return (self._sorted[mid - 1] + self._sorted[mid]) / 2.0
+
+
+# sliding Welford: mean, M2 = Σ (xi - mean)^2
+class SlidingMoments:
+    def __init__(self) -> None:
+        self.n: int = 0
+        self.mean: float = 0.0
+        self._m2: float = 0.0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self._m2 += d * (x - self.mean)
+
+    def remove(self, x: float) -> None:
+        if self.n <= 1:
+            self.clear()
+            return
+        self.n -= 1
+        d = x - self.mean
+        self.mean -= d / self.n
+        self._m2 -= d * (x - self.mean)
+
+    def clear(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    # recompute from the live window to drop accumulated rounding drift
+    def reset(self, values: Iterable[float]) -> None:
+        self.clear()
+        for x in values:
+            self.add(x)
+
+    # population std (ddof=0), same as np.std
+    def std(self) -> float:
+        if self.n == 0:
+            return 0.0
+        return math.sqrt(max(self._m2, 0.0) / self.n)
+
+
+# running Σ with Neumaier compensation so add/remove pairs do not drift
+class SlidingSum:
+    def __init__(self) -> None:
+        self.n: int = 0
+        self._s: float = 0.0
+        self._c: float = 0.0
+
+    def _acc(self, x: float) -> None:
+        t = self._s + x
+        if abs(self._s) >= abs(x):
+            self._c += (self._s - t) + x
+        else:
+            self._c += (x - t) + self._s
+        self._s = t
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        self._acc(x)
+
+    def remove(self, x: float) -> None:
+        self.n -= 1
+        if self.n <= 0:
+            self.clear()
+            return
+        self._acc(-x)
+
+    def clear(self) -> None:
+        self.n = 0
+        self._s = 0.0
+        self._c = 0.0
+
+    def reset(self, values: Iterable[float]) -> None:
+        self.clear()
+        for x in values:
+            self.add(x)
+
+    @property
+    def total(self) -> float:
+        return self._s + self._c
+
+    def mean(self) -> float:
+        return self.total / self.n if self.n > 0 else 0.0
+
+
+# monotonic deques keyed by a sequence number -> window min/max in amortized O(1)
+class SlidingExtrema:
+    def __init__(self) -> None:
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+
+    def add(self, seq: int, x: float) -> None:
+        while self._min and self._min[-1][1] >= x:
+            self._min.pop()
+        self._min.append((seq, x))
+        while self._max and self._max[-1][1] <= x:
+            self._max.pop()
+        self._max.append((seq, x))
+
+    # drop everything older than seq (exclusive lower bound of the window)
+    def expire(self, oldest_seq: int) -> None:
+        while self._min and self._min[0][0] < oldest_seq:
+            self._min.popleft()
+        while self._max and self._max[0][0] < oldest_seq:
+            self._max.popleft()
+
+    def clear(self) -> None:
+        self._min.clear()
+        self._max.clear()
+
+    def min(self) -> float:
+        return self._min[0][1] if self._min else 0.0
+
+    def max(self) -> float:
+        return self._max[0][1] if self._max else 0.0
+
+
+# Sliding DFT of the last w samples: every rfft bin X_k = Σ x[n] e^(-2πikn/w) (x[0] oldest)
+# follows a full window in O(1) per bin and sample, X_k <- (X_k - x_old + x_new) e^(2πik/w),
+# instead of an FFT per push. Only meaningful once w samples are in; reset() anchors it
+# on the live window and should be called again every w updates, since the updates
+# accumulate rounding (|ΔX_k| stays around 1e-12 of the spectrum scale between anchors).
+class SlidingDFT:
+    def __init__(self, w: int) -> None:
+        self.w: int = int(w)
+        k = np.arange(self.w // 2 + 1)
+        self._twiddle: np.ndarray = np.exp(2j * np.pi * k / self.w)
+        self._bins: np.ndarray = np.zeros(len(k), dtype=np.complex128)
+        self._mag: np.ndarray = np.zeros(len(k), dtype=np.float64)
+        self.ready: bool = False
+
+    # window may also be a full ring row whose oldest sample sits at index start: rotating
+    # the samples only turns the phase of each bin, X_k = rfft(row)_k e^(2πik start/w)
+    def reset(self, window: np.ndarray, start: int = 0) -> None:
+        if len(window) != self.w:
+            raise ValueError(f"SlidingDFT expects {self.w} samples, got {len(window)}")
+        self._bins[:] = np.fft.rfft(window)
+        if start % self.w:
+            self._bins *= np.exp(2j * np.pi * np.arange(len(self._bins)) * (start % self.w) / self.w)
+        self.ready = True
+
+    def update(self, x_new: float, x_old: float) -> None:
+        self._bins += x_new - x_old
+        self._bins *= self._twiddle
+
+    def clear(self) -> None:
+        self._bins[:] = 0
+        self.ready = False
+
+    # |X_k| with the DC bin zeroed; a scratch array overwritten by the next call
+    def magnitudes(self) -> np.ndarray:
+        np.abs(self._bins, out=self._mag)
+        self._mag[0] = 0.0
+        return self._mag
+
+
+# fixed-capacity column store, one value of `dtype` per row and column. Rows are written in
+# place (advance() + put(), or append()), and windows are read as views of the storage.
+class RingBuffer:
+    def __init__(self, columns: Sequence[str], capacity: int, dtype: Any = np.float64) -> None:
+        self.columns: Dict[str, int] = {name: i for i, name in enumerate(columns)}
+        self.capacity: int = int(capacity)
+        self._data: np.ndarray = np.zeros((len(self.columns), self.capacity), dtype=dtype)
+        self._start: int = 0
+        self._len: int = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def full(self) -> bool:
+        return self._len == self.capacity
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._data.nbytes)
+
+    # room for a new newest row, overwriting the oldest when full -> its position for put()
+    def advance(self) -> int:
+        if self._len == self.capacity:
+            pos = self._start
+            self._start = (self._start + 1) % self.capacity
+        else:
+            pos = (self._start + self._len) % self.capacity
+            self._len += 1
+        return pos
+
+    def put(self, column: str, pos: int, value: float) -> None:
+        self._data[self.columns[column], pos] = value
+
+    # values in column order; overwrites the oldest row when full
+    def append(self, values: Sequence[float]) -> None:
+        self._data[:, self.advance()] = values
+
+    def clear(self) -> None:
+        self._start = 0
+        self._len = 0
+
+    # storage position of the i-th live row (0 = oldest, -1 = newest)
+    def position(self, i: int) -> int:
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError(i)
+        return (self._start + i) % self.capacity
+
+    def get(self, column: str, i: int) -> float:
+        return float(self._data[self.columns[column], self.position(i)])
+
+    def oldest(self, column: str) -> float:
+        return self.get(column, 0)
+
+    def newest(self, column: str) -> float:
+        return self.get(column, -1)
+
+    # live window, oldest first, as two views of the storage: the rows up to the end of the
+    # ring and the ones wrapped around to its start (empty until the ring has wrapped; a ring
+    # that is not full never has)
+    def window(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        row = self._data[self.columns[column]]
+        end = self._start + self._len
+        if end <= self.capacity:
+            return row[self._start : end], row[:0]
+        return row[self._start :], row[: end - self.capacity]
+
+    # live window as Python floats, oldest first (a new list, e.g. to re-anchor a running sum)
+    def values(self, column: str) -> List[float]:
+        head, tail = self.window(column)
+        return head.tolist() + tail.tolist()
+
+    # the whole storage row of a column, indexed by position
+    def storage(self, column: str) -> np.ndarray:
+        return self._data[self.columns[column]]
+
+# Sliding median of one RingBuffer column, kept as the ring positions of the live rows in
+# value order (2-byte ints) rather than copies of the values. add() a row once it is written,
+# remove() it before it is overwritten; O(log W) search + memmove insert/delete like
+# SlidingMedian.
+class RingMedian:
+    def __init__(self, ring: RingBuffer, column: str) -> None:
+        # Python floats on indexing, for bisect's key
+        self._values = memoryview(ring.storage(column))
+        self._order = array("h" if ring.capacity <= 1 << 15 else "i")
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, pos: int) -> None:
+        insort(self._order, pos, key=self._values.__getitem__)
+
+    def remove(self, pos: int) -> None:
+        i = bisect_left(self._order, self._values[pos], key=self._values.__getitem__)
+        while i < len(self._order) and self._order[i] != pos:
+            i += 1
+        if i < len(self._order):
+            del self._order[i]
+
+    def clear(self) -> None:
+        del self._order[:]
+
+    # same definition as np.median: mean of the two middle values when n is even
+    def median(self) -> Optional[float]:
+        n = len(self._order)
+        if n == 0:
+            return None
+        mid = n // 2
+        if n % 2 == 1:
+            return self._values[self._order[mid]]
+        return (self._values[self._order[mid - 1]] + self._values[self._order[mid]]) / 2.0
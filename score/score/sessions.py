@@ -0,0 +1,96 @@
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import mediapipe as mp
+
+from score.workers import PoseKey, pose_key
+
+class SessionLimitReached(Exception):
+    pass
+
+# one live client: its own Pose (tracking state) and whatever scoring state the caller attaches
+class Session:
+    def __init__(self, key: PoseKey, pose: Any, state: Any) -> None:
+        self.id: str = uuid.uuid4().hex
+        self.key: PoseKey = key
+        self.pose: Any = pose
+        self.state: Any = state
+        self.frames: int = 0
+        # latest (label, score, conf), kept across frames where no person is found
+        self.last_result: Optional[Tuple[str, int, float]] = None
+
+def _new_pose(key: PoseKey) -> Any:
+    return mp.solutions.pose.Pose(
+        static_image_mode=False,
+        model_complexity=key[0],
+        min_detection_confidence=key[1],
+        min_tracking_confidence=key[2],
+    )
+
+# At most max_sessions open at once. Pose instances of closed sessions are kept (up to
+# max_idle_poses) and reset for the next session, so opening one skips model loading.
+class SessionRegistry:
+    def __init__(
+        self,
+        max_sessions: int,
+        max_idle_poses: Optional[int] = None,
+        pose_factory: Callable[[PoseKey], Any] = _new_pose,
+    ) -> None:
+        self.max_sessions: int = max(0, int(max_sessions))
+        self.max_idle_poses: int = self.max_sessions if max_idle_poses is None else max(0, int(max_idle_poses))
+        self._pose_factory = pose_factory
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Session] = {}
+        self._reserved: int = 0
+        self._idle_poses: Dict[PoseKey, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    # may load a model: call from a worker thread, not the event loop
+    def open(self, model_complexity: int, min_det_conf: float, min_track_conf: float, state: Any = None) -> Session:
+        key = pose_key(model_complexity, min_det_conf, min_track_conf)
+        with self._lock:
+            if len(self._sessions) + self._reserved >= self.max_sessions:
+                raise SessionLimitReached(f"{len(self._sessions)} sessions open")
+            self._reserved += 1
+            idle = self._idle_poses.get(key)
+            pose = idle.pop() if idle else None
+        try:
+            if pose is None:
+                pose = self._pose_factory(key)
+            else:
+                pose.reset()
+        except BaseException:
+            with self._lock:
+                self._reserved -= 1
+            raise
+        session = Session(key, pose, state)
+        with self._lock:
+            self._reserved -= 1
+            self._sessions[session.id] = session
+        return session
+
+    def close(self, session: Session) -> None:
+        with self._lock:
+            if self._sessions.pop(session.id, None) is None:
+                return
+            idle = self._idle_poses.setdefault(session.key, [])
+            if sum(len(p) for p in self._idle_poses.values()) < self.max_idle_poses:
+                idle.append(session.pose)
+                session.pose = None
+        if session.pose is not None:
+            session.pose.close()
+            session.pose = None
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for s in sessions:
+            self.close(s)
+        with self._lock:
+            poses = [p for idle in self._idle_poses.values() for p in idle]
+            self._idle_poses.clear()
+        for p in poses:
+            p.close()
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+def file_sha256(path: Union[str, Path], chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Per-frame landmarks of analyzed videos, so scoring changes can be replayed without pose
+# inference. Each entry is <key>.npy, float32 (N, 33, 3) with one row per analyzed frame
+# (NaN where no person was found), and <key>.json with fps/size/pose metadata. The .json is
+# written last, so an entry without it is incomplete and ignored.
+class LandmarkStore:
+    def __init__(self, root: Union[str, Path]) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # video content + every parameter that changes the landmarks
+    @staticmethod
+    def key(
+        video_hash: str,
+        model_complexity: int,
+        min_det_conf: float,
+        min_track_conf: float,
+        max_width: Optional[int],
+        target_fps: Optional[float],
+        roi: bool = False,
+    ) -> str:
+        values = [int(model_complexity), round(float(min_det_conf), 3), round(float(min_track_conf), 3), max_width, target_fps]
+        # appended only when set, so keys stored before the option existed stay valid
+        if roi:
+            values.append("roi")
+        params = json.dumps(values)
+        return hashlib.sha256(f"{video_hash}:{params}".encode()).hexdigest()[:32]
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.root / f"{key}.npy", self.root / f"{key}.json"
+
+    def __contains__(self, key: str) -> bool:
+        return self._paths(key)[1].is_file()
+
+    def save(self, key: str, xyvis: np.ndarray, meta: Dict[str, Any]) -> None:
+        npy_path, meta_path = self._paths(key)
+        xyvis = np.ascontiguousarray(xyvis, dtype=np.float32).reshape(-1, 33, 3)
+        for path, write in (
+            (npy_path, lambda f: np.save(f, xyvis, allow_pickle=False)),
+            (meta_path, lambda f: f.write(json.dumps(dict(meta, frames=len(xyvis))).encode())),
+        ):
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    write(f)
+                os.replace(tmp, path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+
+    # (read-only memory-mapped (N, 33, 3) array, metadata); KeyError if the key is not stored
+    def load(self, key: str) -> Tuple[np.ndarray, Dict[str, Any]]:
+        npy_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text())
+        except FileNotFoundError:
+            raise KeyError(key)
+        if meta.get("frames") == 0:
+            return np.zeros((0, 33, 3), dtype=np.float32), meta
+        return np.load(npy_path, mmap_mode="r", allow_pickle=False), meta
@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# multipart framing allowance on top of the file size when checking Content-Length
+FORM_OVERHEAD_BYTES: int = 64 * 1024
+# text fields are small form options; anything bigger is rejected
+MAX_FIELD_BYTES: int = 16 * 1024
+
+class UploadTooLarge(Exception):
+    pass
+
+class UploadError(Exception):
+    pass
+
+class StreamedUpload:
+    def __init__(self) -> None:
+        self.path: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.size: int = 0
+        # sha256 of the file part, computed while it streams in
+        self.sha256: Optional[str] = None
+        self.fields: Dict[str, str] = {}
+
+    def remove(self) -> None:
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+# Parse a multipart/form-data request body as it arrives: the part named `file_field` goes
+# straight to a temp file chunk by chunk, the other parts are collected as text fields.
+# The body is never held in memory, and oversized uploads are rejected from Content-Length
+# or as soon as the written size passes max_bytes. Chunks are parsed and written on a worker
+# thread, so a slow disk does not hold up the event loop; a malformed body is an UploadError.
+async def receive_upload(
+    request: Any,
+    file_field: str = "file",
+    max_bytes: int = 512 * 1024 * 1024,
+    allowed_suffixes: Sequence[str] = (),
+    suffix: str = ".mp4",
+    dest_dir: Optional[str] = None,
+) -> StreamedUpload:
+    ctype, opts = parse_options_header(request.headers.get("content-type", ""))
+    boundary = opts.get(b"boundary")
+    if ctype != b"multipart/form-data" or not boundary:
+        raise UploadError("Expected a multipart/form-data body.")
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > max_bytes + FORM_OVERHEAD_BYTES:
+        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes.")
+
+    upload = StreamedUpload()
+    headers: List[Tuple[bytes, bytes]] = []
+    header_field: List[bytes] = []
+    header_value: List[bytes] = []
+    part: Dict[str, Any] = {}
+    digest = hashlib.sha256()
+
+    def on_part_begin() -> None:
+        headers.clear()
+        part.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_field.append(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.append(data[start:end])
+
+    def on_header_end() -> None:
+        headers.append((b"".join(header_field).lower(), b"".join(header_value)))
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        disposition = dict(headers).get(b"content-disposition", b"")
+        _, params = parse_options_header(disposition)
+        name = params.get(b"name", b"").decode("utf-8", "replace")
+        filename = params.get(b"filename")
+        part["name"] = name
+        if filename is not None and name == file_field:
+            if upload.path is not None:
+                raise UploadError(f"Only one '{file_field}' part is accepted.")
+            upload.filename = filename.decode("utf-8", "replace")
+            if allowed_suffixes and not upload.filename.lower().endswith(tuple(allowed_suffixes)):
+                raise UploadError(f"Unsupported file extension: {upload.filename}.")
+            fd, upload.path = tempfile.mkstemp(suffix=suffix, dir=dest_dir)
+            part["file"] = os.fdopen(fd, "wb")
+        else:
+            part["chunks"] = []
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        f = part.get("file")
+        if f is not None:
+            upload.size += end - start
+            if upload.size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes.")
+            chunk = data[start:end]
+            f.write(chunk)
+            digest.update(chunk)
+        else:
+            part["field_size"] = part.get("field_size", 0) + end - start
+            if part["field_size"] > MAX_FIELD_BYTES:
+                raise UploadError(f"Form field '{part['name']}' is too large.")
+            part["chunks"].append(data[start:end])
+
+    def on_part_end() -> None:
+        f = part.pop("file", None)
+        if f is not None:
+            f.close()
+            upload.sha256 = digest.hexdigest()
+        elif "chunks" in part:
+            upload.fields[part["name"]] = b"".join(part["chunks"]).decode("utf-8", "replace")
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": on_part_begin,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+        },
+    )
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                await asyncio.to_thread(parser.write, chunk)
+        await asyncio.to_thread(parser.finalize)
+    except BaseException as e:
+        f = part.pop("file", None)
+        if f is not None:
+            f.close()
+        upload.remove()
+        if isinstance(e, FormParserError):
+            raise UploadError(f"Malformed multipart body ({e}).") from e
+        raise
+    return upload
+
+# whole request body for small binary payloads, rejected once it passes max_bytes
+async def read_body(request: Any, max_bytes: int) -> bytes:
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > max_bytes:
+        raise UploadTooLarge(f"Body exceeds {max_bytes} bytes.")
+    chunks: List[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"Body exceeds {max_bytes} bytes.")
+        chunks.append(chunk)
+    return b"".join(chunks)
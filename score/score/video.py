@@ -0,0 +1,300 @@
+import functools
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from score.metrics import StageTimer
+
+FRAME_SOURCES: Tuple[str, ...] = ("auto", "ffmpeg", "opencv")
+
+class VideoMeta:
+    def __init__(
+        self,
+        in_w: int,
+        in_h: int,
+        fps: float,
+        frame_count: int,
+        max_width: Optional[int],
+        target_fps: Optional[float],
+    ) -> None:
+        self.in_w: int = int(in_w)
+        self.in_h: int = int(in_h)
+        self.fps: float = float(fps) or 30.0
+        self.frame_count: int = int(frame_count)
+        self.scale: float = 1.0
+        if max_width is not None and self.in_w > max_width:
+            self.scale = float(max_width) / float(self.in_w)
+        self.out_w: int = int(round(self.in_w * self.scale))
+        self.out_h: int = int(round(self.in_h * self.scale))
+        # analyze every stride-th frame; the rest are only grabbed (no retrieve/convert)
+        self.stride: int = 1
+        if target_fps is not None and target_fps > 0 and self.fps > target_fps:
+            self.stride = max(1, int(round(self.fps / float(target_fps))))
+        self.analyzed_fps: float = self.fps / self.stride
+
+class DecodeCounter:
+    def __init__(self, start: int) -> None:
+        self.frame_idx: int = start
+        self.analyzed: int = 0
+
+def open_capture(input_path: Union[str, Path]) -> Any:
+    input_path = Path(input_path)
+    if not input_path.exists():
+        raise RuntimeError(f"Input file does not exist: {input_path}")
+    cap = cv2.VideoCapture(str(input_path))
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open {input_path}")
+    return cap
+
+def _capture_meta(cap: Any, max_width: Optional[int], target_fps: Optional[float], size: Optional[Tuple[int, int]] = None) -> VideoMeta:
+    w, h = size or (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    return VideoMeta(w, h, cap.get(cv2.CAP_PROP_FPS) or 30.0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), max_width, target_fps)
+
+# stream properties as OpenCV reports them. first_frame=True takes the size from a decoded
+# frame instead, i.e. after rotation metadata is applied, as other decoders see it.
+def probe_video(
+    input_path: Union[str, Path],
+    max_width: Optional[int] = None,
+    target_fps: Optional[float] = None,
+    first_frame: bool = False,
+) -> VideoMeta:
+    cap = open_capture(input_path)
+    try:
+        size = None
+        if first_frame:
+            ret, frame = cap.read()
+            if ret:
+                size = (frame.shape[1], frame.shape[0])
+        return _capture_meta(cap, max_width, target_fps, size)
+    finally:
+        cap.release()
+
+# Decodes one video to RGB frames of meta.out_w x meta.out_h, every meta.stride-th frame
+# counted from the start of the video. Frames are written into a ring of `buffers`
+# preallocated arrays, so a yielded frame stays valid until `buffers` more have been
+# yielded: size it with pipeline.max_in_flight() when frames go through run_pipeline.
+class FrameSource(ABC):
+    name: str = ""
+
+    def __init__(self, meta: VideoMeta, buffers: int) -> None:
+        self.meta: VideoMeta = meta
+        self._ring: np.ndarray = np.empty((max(1, int(buffers)), meta.out_h, meta.out_w, 3), dtype=np.uint8)
+        self._next: int = 0
+
+    def _buffer(self) -> np.ndarray:
+        buf = self._ring[self._next]
+        self._next = (self._next + 1) % len(self._ring)
+        return buf
+
+    # (frame index, RGB frame) from counter.frame_idx up to end_frame (exclusive)
+    @abstractmethod
+    def frames(
+        self, counter: DecodeCounter, timer: StageTimer, end_frame: Optional[int] = None
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "FrameSource":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+# cv2.VideoCapture, then cv2.resize / cv2.cvtColor into reused buffers
+class OpenCVSource(FrameSource):
+    name = "opencv"
+
+    def __init__(
+        self, input_path: Union[str, Path], max_width: Optional[int], target_fps: Optional[float], buffers: int = 1
+    ) -> None:
+        self._cap = open_capture(input_path)
+        super().__init__(_capture_meta(self._cap, max_width, target_fps), buffers)
+
+    def frames(
+        self, counter: DecodeCounter, timer: StageTimer, end_frame: Optional[int] = None
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        cap = self._cap
+        meta = self.meta
+        if counter.frame_idx > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, counter.frame_idx)
+        clock = time.perf_counter
+        bgr: Optional[np.ndarray] = None
+        small = np.empty((meta.out_h, meta.out_w, 3), dtype=np.uint8) if meta.scale != 1.0 else None
+        while end_frame is None or counter.frame_idx < end_frame:
+            t0 = clock()
+            if counter.frame_idx % meta.stride != 0:
+                if not cap.grab():
+                    break
+                timer.observe("grab", clock() - t0)
+                counter.frame_idx += 1
+                continue
+            # decodes into the previous frame's array once its size is known
+            ret, frame = cap.read() if bgr is None else cap.read(bgr)
+            if not ret:
+                break
+            bgr = frame
+            t1 = clock()
+            timer.observe("read", t1 - t0)
+            idx = counter.frame_idx
+            counter.frame_idx += 1
+            counter.analyzed += 1
+            if small is not None:
+                frame = cv2.resize(frame, (meta.out_w, meta.out_h), dst=small)
+                t0, t1 = t1, clock()
+                timer.observe("resize", t1 - t0)
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._buffer())
+            timer.observe("convert", clock() - t1)
+            yield idx, rgb
+
+    def close(self) -> None:
+        self._cap.release()
+
+# output frame timing option of an ffmpeg binary: -fps_mode replaced -vsync in ffmpeg 5.1,
+# older releases reject it. Unnumbered (git) builds are taken as current. None when
+# `binary -version` does not run.
+@functools.lru_cache(maxsize=None)
+def ffmpeg_sync_option(binary: str) -> Optional[str]:
+    try:
+        out = subprocess.run([binary, "-version"], capture_output=True, text=True, timeout=10, check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    m = re.match(r"ffmpeg version n?(\d+)\.(\d+)", out)
+    if m is not None and (int(m.group(1)), int(m.group(2))) < (5, 1):
+        return "-vsync"
+    return "-fps_mode"
+
+# An ffmpeg subprocess that drops the skipped frames (select), scales and converts to RGB24
+# itself, and streams raw frames over a pipe straight into the ring buffers, so none of
+# that happens in this process. A start frame is selected by decoded frame number rather
+# than seeked to by time, so it is exact for variable or rounded frame rates too; the
+# frames before it are decoded and dropped before scaling or conversion.
+class FFmpegSource(FrameSource):
+    name = "ffmpeg"
+
+    def __init__(
+        self,
+        input_path: Union[str, Path],
+        max_width: Optional[int],
+        target_fps: Optional[float],
+        buffers: int = 1,
+        binary: str = "ffmpeg",
+    ) -> None:
+        self._binary: Optional[str] = shutil.which(binary)
+        if self._binary is None:
+            raise RuntimeError(f"ffmpeg binary not found: {binary}")
+        self._sync: Optional[str] = ffmpeg_sync_option(self._binary)
+        if self._sync is None:
+            raise RuntimeError(f"ffmpeg binary does not run: {self._binary}")
+        self._path = str(input_path)
+        self._proc: Optional[subprocess.Popen] = None
+        super().__init__(probe_video(input_path, max_width, target_fps, first_frame=True), buffers)
+
+    def _command(self, first: int) -> list:
+        meta = self.meta
+        filters = []
+        # n is the decoded frame number from the start of the stream
+        keep = []
+        if first > 0:
+            keep.append(f"gte(n\\,{first})")
+        if meta.stride > 1:
+            keep.append(f"not(mod(n\\,{meta.stride}))")
+        if keep:
+            filters.append(f"select='{'*'.join(keep)}'")
+        if meta.scale != 1.0:
+            filters.append(f"scale={meta.out_w}:{meta.out_h}:flags=bilinear")
+        cmd = [self._binary, "-v", "error", "-nostdin", "-i", self._path, "-map", "0:v:0", "-an", "-sn", "-dn"]
+        if filters:
+            cmd += ["-vf", ",".join(filters)]
+        return cmd + [self._sync, "passthrough", "-pix_fmt", "rgb24", "-f", "rawvideo", "pipe:1"]
+
+    def frames(
+        self, counter: DecodeCounter, timer: StageTimer, end_frame: Optional[int] = None
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        meta = self.meta
+        first = counter.frame_idx
+        stride = meta.stride
+        clock = time.perf_counter
+        with tempfile.TemporaryFile() as stderr:
+            self._proc = proc = subprocess.Popen(self._command(first), stdout=subprocess.PIPE, stderr=stderr)
+            # first frame index at or after `first` on the stride grid
+            idx = first + (-first) % stride
+            last: Optional[int] = None
+            eof = False
+            try:
+                while end_frame is None or idx < end_frame:
+                    t0 = clock()
+                    buf = self._buffer()
+                    if not _read_into(proc.stdout, buf):
+                        eof = True
+                        break
+                    timer.observe("read", clock() - t0)
+                    counter.analyzed += 1
+                    counter.frame_idx = idx + 1
+                    last = idx
+                    yield idx, buf
+                    idx += stride
+                if not eof:
+                    counter.frame_idx = end_frame
+                else:
+                    # the output is complete once ffmpeg exits; a failure after some frames
+                    # (e.g. a truncated file) is still a failure
+                    proc.wait()
+                    if last is not None and stride > 1:
+                        # frames after the last selected one never leave ffmpeg; count them
+                        # from the container frame count, within one stride
+                        counter.frame_idx = min(max(last + 1, meta.frame_count), last + stride)
+            finally:
+                self.close()
+            if eof and proc.returncode != 0:
+                stderr.seek(0)
+                detail = stderr.read()[-2000:].decode(errors="replace").strip()
+                raise RuntimeError(f"ffmpeg failed ({proc.returncode}): {detail}")
+
+    def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        if proc.stdout is not None:
+            proc.stdout.close()
+
+# fill buf from a pipe; False at end of stream (a partial last frame is dropped)
+def _read_into(stream: Any, buf: np.ndarray) -> bool:
+    view = memoryview(buf).cast("B")
+    got = 0
+    while got < len(view):
+        n = stream.readinto(view[got:])
+        if not n:
+            return False
+        got += n
+    return True
+
+# "auto" picks ffmpeg when the binary is on PATH and runs, and OpenCV otherwise
+def open_frame_source(
+    input_path: Union[str, Path],
+    max_width: Optional[int] = None,
+    target_fps: Optional[float] = None,
+    buffers: int = 1,
+    backend: str = "auto",
+    ffmpeg: str = "ffmpeg",
+) -> FrameSource:
+    if backend not in FRAME_SOURCES:
+        raise ValueError(f"unknown frame source {backend!r}; expected one of {', '.join(FRAME_SOURCES)}")
+    if backend == "auto":
+        binary = shutil.which(ffmpeg)
+        backend = "ffmpeg" if binary is not None and ffmpeg_sync_option(binary) is not None else "opencv"
+    if backend == "ffmpeg":
+        return FFmpegSource(input_path, max_width, target_fps, buffers, binary=ffmpeg)
+    return OpenCVSource(input_path, max_width, target_fps, buffers)
@@ -0,0 +1,197 @@
+import asyncio
+import multiprocessing
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import mediapipe as mp
+
+from score.jobs import Progress
+
+# (model_complexity, min_det_conf, min_track_conf)
+PoseKey = Tuple[int, float, float]
+
+# per-process Pose instances, built once and reused across videos
+_POSES: "OrderedDict[PoseKey, Any]" = OrderedDict()
+MAX_POSES_PER_WORKER: int = 4
+
+def pose_key(model_complexity: int, min_det_conf: float, min_track_conf: float) -> PoseKey:
+    return (int(model_complexity), round(float(min_det_conf), 3), round(float(min_track_conf), 3))
+
+def get_pose(model_complexity: int = 0, min_det_conf: float = 0.5, min_track_conf: float = 0.5) -> Any:
+    key = pose_key(model_complexity, min_det_conf, min_track_conf)
+    pose = _POSES.get(key)
+    if pose is not None:
+        _POSES.move_to_end(key)
+        return pose
+    pose = mp.solutions.pose.Pose(
+        static_image_mode=False,
+        model_complexity=key[0],
+        min_detection_confidence=key[1],
+        min_tracking_confidence=key[2],
+    )
+    _POSES[key] = pose
+    while len(_POSES) > MAX_POSES_PER_WORKER:
+        _, old = _POSES.popitem(last=False)
+        old.close()
+    return pose
+
+# this worker's view of the pool's ProgressBoard cells
+_PROGRESS_CELLS: Optional[Any] = None
+
+def worker_progress(slot: Optional[int]) -> Optional[Progress]:
+    if slot is None or _PROGRESS_CELLS is None:
+        return None
+    return Progress(_PROGRESS_CELLS, slot)
+
+# pool entry point: fn(input_path, pose=..., progress=..., **kwargs), e.g. app.analyze_video
+# or app.analyze_segment, with this process's warm Pose for the requested parameters and
+# reporting through the pool's progress slot when given one. Also usable in-process.
+def run_with_pose(fn: Callable[..., Any], input_path: str, progress_slot: Optional[int] = None, **kwargs: Any) -> Any:
+    pose = get_pose(
+        kwargs.get("model_complexity", 0),
+        kwargs.get("min_det_conf", 0.5),
+        kwargs.get("min_track_conf", 0.5),
+    )
+    return fn(input_path, pose=pose, progress=worker_progress(progress_slot), **kwargs)
+
+def _init_worker(warm_keys: Sequence[PoseKey], ready: Any, progress_cells: Optional[Any] = None) -> None:
+    global _PROGRESS_CELLS
+    _PROGRESS_CELLS = progress_cells
+    try:
+        for key in warm_keys:
+            get_pose(*key)
+    finally:
+        ready.release()
+
+# Progress cells shared with the pool's worker processes: handed over when they are spawned,
+# so no manager process is involved. A task given a slot reports progress and sees
+# cancellation through it (see score.jobs.Progress).
+class ProgressBoard:
+    def __init__(self, ctx: Any, slots: int) -> None:
+        self.slots: int = max(1, int(slots))
+        self.cells: Any = ctx.RawArray("q", 3 * self.slots)
+        self._free: List[int] = list(range(self.slots))
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Optional[Progress]:
+        with self._lock:
+            if not self._free:
+                return None
+            slot = self._free.pop()
+        for i in range(3 * slot, 3 * slot + 3):
+            self.cells[i] = 0
+        return Progress(self.cells, slot)
+
+    def release(self, progress: Progress) -> None:
+        if progress.slot is None:
+            return
+        with self._lock:
+            self._free.append(progress.slot)
+
+class PoolSaturated(Exception):
+    pass
+
+class PoolUnavailable(Exception):
+    pass
+
+# process pool whose workers keep warm Pose instances. At most size + max_queued tasks are
+# admitted at once; further submissions fail fast with PoolSaturated instead of queueing.
+class PoseWorkerPool:
+    def __init__(self, size: int, max_queued: int = 0, warm_keys: Sequence[PoseKey] = ()) -> None:
+        self.size: int = max(1, int(size))
+        self.max_pending: int = self.size + max(0, int(max_queued))
+        self.warm_keys = [pose_key(*k) for k in warm_keys]
+        self._pool: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._pending: int = 0
+        self.progress: Optional[ProgressBoard] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    # spawn, not fork: the parent may already hold MediaPipe graphs and running threads
+    def start(self, warm_timeout: float = 120.0) -> None:
+        if self._pool is not None:
+            return
+        ctx = multiprocessing.get_context("spawn")
+        ready = ctx.Semaphore(0)
+        # one progress slot per task that can be admitted at once, and as many again for the
+        # jobs following them (a segmented job's own slot sums those of its segments)
+        self.progress = ProgressBoard(ctx, 2 * self.max_pending)
+        self._pool = ctx.Pool(
+            processes=self.size, initializer=_init_worker, initargs=(self.warm_keys, ready, self.progress.cells)
+        )
+        # block until every worker has loaded its models
+        for _ in range(self.size):
+            ready.acquire(timeout=warm_timeout)
+
+    def close(self) -> None:
+        if self._pool is None:
+            return
+        self._pool.terminate()
+        self._pool.join()
+        self._pool = None
+
+    def _acquire(self, n: int = 1) -> None:
+        if self._pool is None:
+            raise PoolUnavailable("worker pool is not running")
+        with self._lock:
+            if self._pending + n > self.max_pending:
+                raise PoolSaturated(f"{self._pending} analyses in flight")
+            self._pending += n
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    # the slot is held until the worker finishes, even if the awaiting request goes away
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        self._acquire()
+        return await self._submit(fn, args, kwargs)
+
+    # one task per (args, kwargs) entry, admitted all together or not at all; results in order.
+    # Returns (or raises the first failure) once every task has finished.
+    async def run_many(self, fn: Callable[..., Any], calls: Sequence[Tuple[tuple, dict]]) -> List[Any]:
+        self._acquire(len(calls))
+        futs = []
+        for i, (args, kwargs) in enumerate(calls):
+            try:
+                futs.append(self._submit(fn, args, kwargs))
+            except BaseException:
+                for _ in calls[i + 1:]:
+                    self._release()
+                raise
+        results = await asyncio.gather(*futs, return_exceptions=True)
+        for r in results:
+            if isinstance(r, BaseException):
+                raise r
+        return list(results)
+
+    def _submit(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> "asyncio.Future":
+        loop = asyncio.get_running_loop()
+        fut: "asyncio.Future" = loop.create_future()
+
+        def done(result: Any) -> None:
+            self._release()
+            loop.call_soon_threadsafe(_resolve, fut, result, None)
+
+        def failed(e: BaseException) -> None:
+            self._release()
+            loop.call_soon_threadsafe(_resolve, fut, None, e)
+
+        try:
+            self._pool.apply_async(fn, args, kwargs, callback=done, error_callback=failed)
+        except Exception as e:
+            self._release()
+            raise PoolUnavailable(str(e))
+        return fut
+
+def _resolve(fut: "asyncio.Future", result: Any, error: Optional[BaseException]) -> None:
+    if fut.done():
+        return
+    if error is not None:
+        fut.set_exception(error)
+    else:
+        fut.set_result(result)
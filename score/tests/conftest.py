@@ -0,0 +1,50 @@
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, List
+
+import numpy as np
+import pytest
+
+from bench.synthetic import landmark_sequence, write_video
+
+# Stands in for mediapipe's Pose: frame i of every video gets landmark_sequence(...)[i] as
+# normalized landmarks, so analyses are deterministic and need no model files.
+class FakePose:
+    def __init__(self, activity: str = "running", frames: int = 600, width: int = 320, height: int = 240) -> None:
+        self.xyvis = landmark_sequence(activity, frames, 30.0, width, height, seed=0, noise_px=0.0, missing_p=0.0)
+        self.size = (width, height)
+        self.calls: int = 0
+        self.resets: int = 0
+        self.closed: bool = False
+
+    def process(self, rgb: np.ndarray) -> Any:
+        w, h = self.size
+        pts = self.xyvis[self.calls % len(self.xyvis)]
+        self.calls += 1
+        lm: List[Any] = [SimpleNamespace(x=x / w, y=y / h, visibility=v) for x, y, v in pts]
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=lm))
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.resets += 1
+
+    def close(self) -> None:
+        self.closed = True
+
+@pytest.fixture
+def fake_pose() -> FakePose:
+    return FakePose()
+
+# 4 s, 30 fps, 320x240
+@pytest.fixture(scope="session")
+def video(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    path = tmp_path_factory.mktemp("videos") / "running.mp4"
+    write_video(path, "running", 4.0, fps=30.0, width=320, height=240)
+    return path
+
+# 12 s: long enough for plan_segments to split it in two
+@pytest.fixture(scope="session")
+def long_video(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    path = tmp_path_factory.mktemp("videos") / "running-long.mp4"
+    write_video(path, "running", 12.0, fps=30.0, width=320, height=240)
+    return path
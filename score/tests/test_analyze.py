@@ -0,0 +1,39 @@
+import pytest
+
+import app
+from score.early_exit import EarlyExit
+from tests.conftest import FakePose
+
+class FailingWriter:
+    def __init__(self, *args, **kwargs) -> None:
+        pass
+
+    def submit(self, frame, xyvis) -> None:
+        pass
+
+    def close(self) -> None:
+        raise RuntimeError("encoder failed")
+
+def test_pose_closed_when_annotation_writer_fails(monkeypatch, tmp_path, video, fake_pose):
+    monkeypatch.setattr(app, "_open_pose", lambda *args: (fake_pose, True))
+    monkeypatch.setattr(app, "AnnotatedVideoWriter", FailingWriter)
+    with pytest.raises(RuntimeError, match="encoder failed"):
+        app.analyze_video(str(video), annotated_output_path=tmp_path / "out.mp4")
+    assert fake_pose.closed
+
+def test_analyze_video_with_fake_pose(video, fake_pose):
+    summary = app.analyze_video(str(video), pose=fake_pose)
+    assert summary.frames_processed == 120
+    assert summary.frames_analyzed == 120
+    assert summary.avg_score is not None
+    assert not fake_pose.closed
+
+def test_stored_landmarks_not_reused_under_early_exit(tmp_path, video):
+    full = app.analyze_video(str(video), pose=FakePose(), landmark_dir=tmp_path, video_hash="0" * 64)
+    assert full.landmark_key is not None
+    summary = app.analyze_video(
+        str(video), pose=FakePose(), landmark_dir=tmp_path, video_hash="0" * 64, early_exit=EarlyExit(budget_frames=30)
+    )
+    assert summary.stopped_early
+    assert summary.stop_reason == "frame_budget"
+    assert summary.frames_analyzed == 30
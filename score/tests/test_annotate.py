@@ -0,0 +1,23 @@
+import cv2
+import numpy as np
+import pytest
+
+from score.annotate import AnnotatedVideoWriter
+
+# H.264 where the OpenCV build has an encoder, else the mp4v fallback
+def test_writer_falls_back_to_an_available_codec(tmp_path):
+    path = tmp_path / "out.mp4"
+    writer = AnnotatedVideoWriter(path, 30.0, (64, 48), [(0, 1)])
+    assert writer.fourcc in ("avc1", "mp4v")
+    xyvis = np.array([[10, 10, 1.0], [50, 40, 1.0]], dtype=np.float32)
+    for _ in range(5):
+        writer.submit(np.zeros((48, 64, 3), dtype=np.uint8), xyvis)
+    writer.close()
+    assert writer.frames_written == 5
+    cap = cv2.VideoCapture(str(path))
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 5
+    cap.release()
+
+def test_writer_fails_when_no_codec_opens(tmp_path):
+    with pytest.raises(RuntimeError, match="avc1, mp4v"):
+        AnnotatedVideoWriter(tmp_path / "missing" / "out.mp4", 30.0, (64, 48), [])
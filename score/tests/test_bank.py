@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from bench.synthetic import ACTIVITIES, landmark_sequence
+from features import Estimator, EstimatorBank, features_at, frame_features_batch
+
+MODES = ("auto", "auto", "running", "yoga")
+
+# sessions join, leave, reset and skip ticks; every slot that pushed must agree with a
+# standalone Estimator fed the same frames
+@pytest.mark.parametrize("fps", [15.0, 30.0])
+def test_estimator_bank_matches_estimators(fps):
+    rng = np.random.default_rng(0)
+    activities = sorted(ACTIVITIES)
+    ticks = int(10 * fps)
+    tables = [
+        frame_features_batch(landmark_sequence(activities[i % len(activities)], ticks, fps=fps, seed=i, missing_p=0.1))
+        for i in range(12)
+    ]
+    bank = EstimatorBank(fps=fps, capacity=2)
+    live = {}
+    for t in range(ticks):
+        for i in range(len(tables)):
+            if i not in live and rng.random() < 0.05:
+                mode = MODES[i % len(MODES)]
+                live[i] = (bank.add(mode), Estimator(fps=fps, mode=mode))
+            elif i in live and rng.random() < 0.005:
+                bank.remove(live.pop(i)[0])
+            elif i in live and rng.random() < 0.005:
+                slot, est = live[i]
+                bank.reset(slot, est.mode)
+                live[i] = (slot, Estimator(fps=fps, mode=est.mode))
+        pushing = [i for i in live if rng.random() < 0.9]
+        if not pushing:
+            continue
+        slots = [live[i][0] for i in pushing]
+        rows = {k: np.array([tables[i][k][t] for i in pushing]) for k in tables[0]}
+        bank.push(slots, rows)
+        got = bank.detect(slots)
+        for j, i in enumerate(pushing):
+            est = live[i][1]
+            est.push(features_at(tables[i], t))
+            label, score, conf = est.detect()
+            assert (got["labels"][j], got["scores"][j]) == (label, score), (t, i)
+            assert got["confs"][j] == pytest.approx(conf, rel=1e-9, abs=1e-12)
+            med = est._temporal_stats()
+            assert bool(got["has_stats"][j]) == (med is not None)
+            if med is not None:
+                for key, value in med.items():
+                    assert got["stats"][key][j] == pytest.approx(value, rel=1e-9, abs=1e-9), (t, i, key)
+    assert bank.capacity >= len(live)
+
+def test_estimator_bank_rejects_unknown_slots():
+    bank = EstimatorBank(fps=30.0)
+    slot = bank.add()
+    bank.remove(slot)
+    with pytest.raises(KeyError):
+        bank.detect([slot])
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+import app
+from score.cache import ResultCache
+from score.jobs import AnalysisCancelled
+
+def test_concurrent_requests_coalesce():
+    async def main():
+        cache = ResultCache(8)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"v": 1}
+
+        return await asyncio.gather(cache.get_or_compute("k", compute), cache.get_or_compute("k", compute)), calls
+
+    (first, second), calls = asyncio.run(main())
+    assert first == ({"v": 1}, "computed")
+    assert second == ({"v": 1}, "coalesced")
+    assert len(calls) == 1
+
+def test_cancelled_unshared_computation_does_not_fail_other_requests():
+    async def main():
+        cache = ResultCache(8)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def cancelled():
+            started.set()
+            await release.wait()
+            raise AnalysisCancelled("job cancelled")
+
+        async def plain():
+            return {"v": 1}
+
+        job = asyncio.ensure_future(cache.get_or_compute("k", cancelled, shared=False))
+        await started.wait()
+        value = await cache.get_or_compute("k", plain)
+        release.set()
+        with pytest.raises(AnalysisCancelled):
+            await job
+        return value, await cache.get_or_compute("k", plain)
+
+    value, again = asyncio.run(main())
+    assert value == ({"v": 1}, "computed")
+    assert again == ({"v": 1}, "memory")
+
+# a time-budget result depends on machine load: it is neither served from nor put in the cache
+@pytest.mark.parametrize("budget_seconds, runs", [(None, 1), (5.0, 2)])
+def test_time_budget_results_are_not_cached(monkeypatch, budget_seconds, runs):
+    calls = []
+
+    async def run_analysis(path, **kwargs):
+        calls.append(kwargs["early_exit"])
+        return app.ScoreSummary(
+            frames_processed=10, input_fps=30.0, duration_seconds=1.0, mode="auto", processing_time_seconds=0.1
+        )
+
+    monkeypatch.setattr(app, "_run_analysis", run_analysis)
+    monkeypatch.setattr(app, "results", ResultCache(8))
+    params = app.ScoreParams(budget_seconds=budget_seconds)
+    summaries = [asyncio.run(app._score_video("clip.mp4", "0" * 64, params)) for _ in range(2)]
+    assert len(calls) == runs
+    assert [s.cached for s in summaries] == [False, runs == 1]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from score.columns import ColumnStore
+
+def test_rows_and_frames_round_trip(tmp_path):
+    store = ColumnStore(tmp_path)
+    store.append([{"key": "a", "n": 1}, {"key": "b", "n": 2}], [([1, 2], [0.5, 0.6], ["x", "y"]), ([], [], [])])
+    store.append([{"key": "c", "n": 3}], [([3], [0.7], ["z"])])
+    out = store.read()
+    assert out["key"].tolist() == ["a", "b", "c"]
+    assert out["n"].dtype == np.int64
+    assert out["frame_offsets"].tolist() == [0, 2, 2, 3]
+    assert out["frame_label"].tolist() == ["x", "y", "z"]
+    assert store.keys() == {"a", "b", "c"}
+
+def test_all_none_column_takes_the_type_of_the_other_parts(tmp_path):
+    store = ColumnStore(tmp_path)
+    store.append([{"key": "a", "label": None, "score": None}])
+    store.append([{"key": "b", "label": "running", "score": 1.5}])
+    out = store.read()
+    assert out["label"].tolist() == ["", "running"]
+    assert out["score"].dtype == np.float64
+    assert np.isnan(out["score"][0]) and out["score"][1] == 1.5
+
+def test_numeric_columns_are_promoted(tmp_path):
+    store = ColumnStore(tmp_path)
+    store.append([{"key": "a", "v": 1, "ok": True}])
+    store.append([{"key": "b", "v": 2.5, "ok": None}])
+    out = store.read()
+    assert out["v"].tolist() == [1.0, 2.5]
+    assert out["ok"][0] == 1.0 and np.isnan(out["ok"][1])
+
+def test_strings_and_numbers_across_parts_raise(tmp_path):
+    store = ColumnStore(tmp_path)
+    store.append([{"key": "a", "v": 1}])
+    store.append([{"key": "b", "v": "one"}])
+    with pytest.raises(ValueError, match="'v'"):
+        store.read()
+    assert store.read(["key"])["key"].tolist() == ["a", "b"]
@@ -0,0 +1,93 @@
+import pytest
+
+import app
+from score import early_exit
+from score.early_exit import EarlyExit
+from tests.conftest import FakePose
+
+# perf_counter stand-in for score.early_exit, advanced by hand
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    c = Clock()
+    monkeypatch.setattr(early_exit, "time", c)
+    return c
+
+def test_frame_budget():
+    monitor = EarlyExit(budget_frames=5).monitor(30.0)
+    assert [monitor.frame(i) for i in range(5)] == [False] * 4 + [True]
+    assert (monitor.reason, monitor.frames, monitor.end) == ("frame_budget", 5, 5)
+    # later frames are dropped
+    assert monitor.frame(5, "running", 80)
+    assert (monitor.frames, monitor.end) == (5, 5)
+
+def test_time_budget(clock):
+    monitor = EarlyExit(budget_seconds=1.0).monitor(30.0)
+    for i in range(3):
+        assert not monitor.frame(i, "running", 80)
+    clock.now = 1.0
+    assert monitor.stopped()
+    assert monitor.frame(3, "running", 80)
+    assert (monitor.reason, monitor.frames, monitor.end) == ("time_budget", 3, 3)
+
+def test_stable_after_warmup_and_one_span():
+    # span = 10 frames at 10 fps, counted after 5 warm-up frames
+    monitor = EarlyExit(span_seconds=1.0, tolerance=2.0).monitor(10.0, warmup_frames=5)
+    stops = [monitor.frame(i, "running", 80 + i % 2) for i in range(20)]
+    assert stops.index(True) == 14
+    assert (monitor.reason, monitor.frames, monitor.end) == ("stable", 15, 15)
+
+def test_stable_needs_label_held_and_scores_within_tolerance():
+    monitor = EarlyExit(span_seconds=1.0, tolerance=2.0).monitor(10.0)
+    # scores spread too wide
+    assert not any(monitor.frame(i, "running", 70 + 10 * (i % 2)) for i in range(30))
+    monitor = EarlyExit(span_seconds=1.0, tolerance=2.0).monitor(10.0)
+    labels = ["running", "walking"] * 15
+    assert not any(monitor.frame(i, label, 80) for i, label in enumerate(labels))
+    # frames without a person count towards the result but not towards the span
+    monitor = EarlyExit(span_seconds=1.0).monitor(10.0)
+    assert not any(monitor.frame(i) for i in range(30))
+    stops = [monitor.frame(30 + i, "running", 80) for i in range(10)]
+    assert stops.index(True) == 9
+    assert (monitor.frames, monitor.end) == (40, 40)
+
+def test_disabled_rule():
+    assert not EarlyExit().enabled
+    monitor = EarlyExit().monitor(30.0)
+    assert not any(monitor.frame(i, "running", 80) for i in range(100))
+    assert monitor.reason is None
+
+# what the summary reports under each rule
+def test_summary_frame_budget(video):
+    summary = app.analyze_video(str(video), pose=FakePose(), early_exit=EarlyExit(budget_frames=30))
+    assert (summary.stopped_early, summary.stop_reason) == (True, "frame_budget")
+    assert (summary.frames_processed, summary.frames_analyzed) == (30, 30)
+    assert summary.analyzed_fraction == pytest.approx(0.25)
+
+def test_summary_stable(long_video):
+    summary = app.analyze_video(str(long_video), pose=FakePose(), early_exit=EarlyExit(span_seconds=1.0, tolerance=100.0))
+    # one Estimator window (90 frames) of warm-up, then one 30-frame span
+    assert (summary.stopped_early, summary.stop_reason) == (True, "stable")
+    assert summary.frames_processed == 120
+    assert summary.analyzed_fraction == pytest.approx(1 / 3)
+
+def test_summary_time_budget(clock, video):
+    class TickingPose(FakePose):
+        def process(self, rgb):
+            clock.now += 0.1
+            return super().process(rgb)
+
+    summary = app.analyze_video(str(video), pose=TickingPose(), early_exit=EarlyExit(budget_seconds=1.0))
+    assert (summary.stopped_early, summary.stop_reason) == (True, "time_budget")
+    assert summary.frames_processed <= 10
+    assert summary.analyzed_fraction == pytest.approx(summary.frames_processed / 120)
+
+def test_summary_without_stop(video):
+    summary = app.analyze_video(str(video), pose=FakePose(), early_exit=EarlyExit(budget_frames=1000))
+    assert (summary.stopped_early, summary.stop_reason, summary.analyzed_fraction) == (False, None, 1.0)
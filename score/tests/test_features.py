@@ -0,0 +1,126 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from bench.synthetic import ACTIVITIES, landmark_sequence
+from features import (
+    FEATURE_KEYS,
+    PEAK_RTOL,
+    PUSH_MEDIANS,
+    Estimator,
+    features_at,
+    frame_features_batch,
+    frame_features_from_xyvis,
+    window_stats_batch,
+)
+from score.rolling import SlidingDFT
+
+# noise and missing landmarks (invalid frames) included
+@pytest.mark.parametrize("activity", sorted(ACTIVITIES))
+def test_frame_features_batch_matches_per_frame(activity):
+    xyvis = landmark_sequence(activity, 300, fps=30.0, seed=1, missing_p=0.05)
+    xyvis[::37, :, 2] = 0.0
+    table = frame_features_batch(xyvis)
+    assert len(table["valid"]) == len(xyvis)
+    for i, x in enumerate(xyvis):
+        ref = frame_features_from_xyvis(x)
+        assert features_at(table, i) == ref
+        if not ref["valid"]:
+            assert all(np.isnan(table[k][i]) for k in FEATURE_KEYS)
+
+def test_frame_features_batch_single_frame():
+    x = landmark_sequence("squat", 1, seed=2)[0]
+    assert features_at(frame_features_batch(x), 0) == features_at(frame_features_batch(x[None]), 0)
+
+# A one-frame hip_y spike in an otherwise still window has a flat spectrum: every bin is tied with
+# the peak up to FFT rounding, and dom_freq is the lowest one, fps / n, in both paths.
+def test_dom_freq_ties_go_to_lowest_bin():
+    fps = 30.0
+    xyvis = np.repeat(landmark_sequence("squat", 1, fps=fps, seed=2, noise_px=0.0, missing_p=0.0), 150, axis=0)
+    xyvis[100, [23, 24], 1] += 8.0
+    est = Estimator(fps=fps)
+    stats, _ = window_stats_batch(frame_features_batch(xyvis), est.fps, est.window_size)
+    for i, x in enumerate(xyvis):
+        est.push(frame_features_from_xyvis(x))
+        n = min(i + 1, est.window_size)
+        if i < 100 or i + 1 - n > 100:
+            continue
+        assert est._temporal_stats()["dom_freq"] == stats["dom_freq"][i] == pytest.approx(fps / n)
+
+def test_sliding_dft_tracks_fft():
+    w = 90
+    rng = np.random.default_rng(0)
+    x = np.round(rng.normal(300.0, 20.0, 2000))
+    dft = SlidingDFT(w)
+    dft.reset(x[:w])
+    for i in range(w, len(x)):
+        dft.update(x[i], x[i - w])
+        # re-anchored every w updates, as Estimator does
+        if (i + 1) % w == 0:
+            dft.reset(x[i + 1 - w : i + 1])
+        ref = np.abs(np.fft.rfft(x[i + 1 - w : i + 1]))
+        ref[0] = 0.0
+        assert np.max(np.abs(dft.magnitudes() - ref)) <= 1e-9 * np.max(ref)
+
+# Estimator._temporal_stats as recomputed from the whole window on every push (the code the
+# rolling statistics replaced), with the PEAK_RTOL tie rule for dom_freq
+def _recomputed_stats(pushes, series, fps):
+    valid = [f for f in pushes if f["valid"]]
+    if not valid:
+        return None
+    med = {key: float(np.median([f[src] for f in valid])) for key, src in PUSH_MEDIANS}
+    med["shoulder_width_median"] = float(np.median([f["shoulder_width_px"] for f in series])) if series else 1.0
+    hip_y = np.array([f["hip_y"] for f in series]) if series else np.array([0.0])
+    hip_x = np.array([f["hip_x"] for f in series]) if series else np.array([0.0])
+    sw = med["shoulder_width_median"] + 1e-6
+    med["hip_y_std_norm"] = float(np.std(hip_y) / sw)
+    med["hip_y_range_norm"] = float((np.max(hip_y) - np.min(hip_y)) / sw) if len(hip_y) > 1 else 0.0
+    med["hip_x_std_norm"] = float(np.std(hip_x) / sw)
+    med["dom_freq"] = med["periodic_strength"] = 0.0
+    if len(hip_y) >= max(8, int(fps * 0.5)):
+        yf = np.abs(np.fft.rfft(hip_y - np.mean(hip_y)))
+        yf[0] = 0
+        if np.max(yf) > 0:
+            idx = int(np.argmax(yf >= np.max(yf) * (1.0 - PEAK_RTOL)))
+            med["dom_freq"] = float(np.fft.rfftfreq(len(hip_y), d=1.0 / fps)[idx])
+            med["periodic_strength"] = float(yf[idx] / (np.median(np.delete(yf, idx)) + 1e-6))
+
+    def speed(cx, cy):
+        if len(series) < 2:
+            return 0.0
+        steps = [np.hypot(b[cx] - a[cx], b[cy] - a[cy]) for a, b in zip(list(series)[:-1], list(series)[1:])]
+        return float(np.mean(steps) / sw * fps)
+
+    med["ankle_speed_norm"] = (speed("left_ankle_x", "left_ankle_y") + speed("right_ankle_x", "right_ankle_y")) / 2.0
+    # stored in float32, like the features
+    med["motion_energy"] = float(
+        np.mean(
+            [
+                float(np.float32(np.hypot(f["left_ankle_x"] - f["right_ankle_x"], f["left_ankle_y"] - f["right_ankle_y"])))
+                for f in valid
+            ]
+        )
+    )
+    return med
+
+@pytest.mark.parametrize("fps", [15.0, 30.0, 60.0])
+@pytest.mark.parametrize("activity", sorted(ACTIVITIES))
+def test_rolling_stats_match_recomputation(activity, fps):
+    est = Estimator(fps=fps)
+    pushes: deque = deque(maxlen=est.window_size)
+    series: deque = deque(maxlen=est.window_size)
+    # longer than several windows, so re-anchoring and the sliding DFT are covered
+    for x in landmark_sequence(activity, int(8 * fps), fps=fps, seed=4, missing_p=0.05):
+        feat = frame_features_from_xyvis(x)
+        est.push(feat)
+        pushes.append(feat)
+        if feat["valid"]:
+            series.append(feat)
+        got, ref = est._temporal_stats(), _recomputed_stats(pushes, series, fps)
+        assert (got is None) == (ref is None)
+        if ref is None:
+            continue
+        assert got["dom_freq"] == ref["dom_freq"]
+        for key, value in ref.items():
+            assert got[key] == pytest.approx(value, rel=1e-9, abs=1e-9), key
@@ -0,0 +1,64 @@
+import io
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from bench.synthetic import landmark_sequence
+from features import frame_features_batch, score_sequence
+from score.landmarks import FRAME_BYTES, LandmarkPayloadError, decode_landmarks
+
+@pytest.fixture(scope="module")
+def xyvis() -> np.ndarray:
+    arr = landmark_sequence("running", 150, 30.0, 320, 240, seed=0, noise_px=0.0, missing_p=0.0).astype(np.float32)
+    # frames where the client found nobody
+    arr[[10, 11, 100]] = np.nan
+    return arr
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app.app)
+
+def npy(arr: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, arr)
+    return buf.getvalue()
+
+def test_decode_raw_and_npy(xyvis):
+    raw = decode_landmarks(xyvis.astype("<f4").tobytes())
+    assert raw.shape == (150, 33, 3)
+    np.testing.assert_array_equal(raw, xyvis)
+    # other numeric dtypes are converted to float32
+    np.testing.assert_array_equal(decode_landmarks(npy(xyvis.astype(np.float64))), xyvis)
+
+@pytest.mark.parametrize(
+    "data",
+    [b"\0" * (FRAME_BYTES + 4), npy(np.zeros((4, 33, 2), dtype=np.float32)), npy(np.array(["a"])), b"\x93NUMPY broken"],
+)
+def test_decode_rejects_bad_payloads(data):
+    with pytest.raises(LandmarkPayloadError):
+        decode_landmarks(data)
+
+@pytest.mark.parametrize("encode", [lambda a: a.astype("<f4").tobytes(), npy], ids=["raw", "npy"])
+def test_endpoint_matches_score_sequence(client, xyvis, encode):
+    r = client.post("/api/score/landmarks?fps=30", content=encode(xyvis))
+    assert r.status_code == 200
+    body = r.json()
+    seq = score_sequence(frame_features_batch(xyvis[np.isfinite(xyvis).all(axis=(1, 2))]), fps=30)
+    # NaN rows count as processed frames but are not scored
+    assert (body["frames_processed"], len(seq["scores"])) == (150, 147)
+    assert body["avg_score"] == pytest.approx(float(seq["scores"].mean()))
+    assert body["max_score"] == int(seq["scores"].max())
+    assert (body["last_label"], body["last_score"]) == (seq["labels"][-1], int(seq["scores"][-1]))
+    assert body["last_conf"] == pytest.approx(float(seq["confs"][-1]))
+    assert body["temporal_stats"]["dom_freq"] == pytest.approx(float(seq["stats"]["dom_freq"][-1]))
+
+def test_endpoint_rejects_partial_frames(client, xyvis):
+    r = client.post("/api/score/landmarks?fps=30", content=xyvis.tobytes()[:-4])
+    assert r.status_code == 400
+    assert str(FRAME_BYTES) in r.json()["detail"]
+
+def test_endpoint_validates_params(client, xyvis):
+    assert client.post("/api/score/landmarks", content=xyvis.tobytes()).status_code == 422
+    assert client.post("/api/score/landmarks?fps=30&image_width=320", content=xyvis.tobytes()).status_code == 422
@@ -0,0 +1,49 @@
+import re
+from typing import Dict
+
+from fastapi.testclient import TestClient
+
+import app
+
+def scrape(client: TestClient) -> Dict[str, float]:
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in r.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+def test_requests_are_counted_by_route_template():
+    client = TestClient(app.app)
+    job = 'score_http_requests_total{route="/api/score/jobs/{job_id}",method="GET",status="404"}'
+    unmatched = 'score_http_requests_total{route="unmatched",method="GET",status="404"}'
+    before = scrape(client)
+    assert client.get("/api/score/jobs/abc123").status_code == 404
+    assert client.get("/no/such/path").status_code == 404
+    after = scrape(client)
+    # labelled by the route's template, not the concrete path
+    assert after[job] - before.get(job, 0.0) == 1
+    assert after[unmatched] - before.get(unmatched, 0.0) == 1
+    assert not any("abc123" in name or "/no/such/path" in name for name in after)
+
+    prefix = 'score_http_request_duration_seconds_bucket{route="/api/score/jobs/{job_id}",le="'
+    buckets = {name[len(prefix) : -2]: v for name, v in after.items() if name.startswith(prefix)}
+    assert list(buckets) == [repr(b) for b in app.REQUEST_SECONDS.buckets] + ["+Inf"]
+    # cumulative, ending at the route's request count
+    counts = list(buckets.values())
+    assert counts == sorted(counts)
+    count = 'score_http_request_duration_seconds_count{route="/api/score/jobs/{job_id}"}'
+    assert counts[-1] == after[count]
+    assert after[count] - before.get(count, 0.0) == 1
+
+def test_metric_families_are_declared():
+    text = TestClient(app.app).get("/metrics").text
+    for name, kind in [
+        ("score_http_requests_total", "counter"),
+        ("score_http_request_duration_seconds", "histogram"),
+        ("score_ws_sessions", "gauge"),
+    ]:
+        assert re.search(rf"^# TYPE {name} {kind}$", text, re.M)
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from score.roi import PersonRoi
+
+W, H = 1920, 1080
+
+# 33 landmarks spread over a w x h rectangle at (x, y), all visible
+def person(x: float, y: float, w: float, h: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    xyvis = np.ones((33, 3), dtype=np.float32)
+    xyvis[:, 0] = x + rng.uniform(0, w, 33)
+    xyvis[:, 1] = y + rng.uniform(0, h, 33)
+    xyvis[:2, :2] = [[x, y], [x + w, y + h]]
+    return xyvis
+
+def test_regions_are_the_frame_then_tiles():
+    regions = PersonRoi().regions(W, H)
+    assert regions[0] == (0, 0, W, H)
+    assert len(regions) == 1 + 4 + 9
+    for x0, y0, x1, y1 in regions:
+        assert 0 <= x0 < x1 <= W and 0 <= y0 < y1 <= H
+    # the 2x2 tiles sit in the frame's corners and overlap
+    tw, th = regions[1][2], regions[1][3]
+    assert {r[:2] for r in regions[1:5]} == {(0, 0), (W - tw, 0), (0, H - th), (W - tw, H - th)}
+    assert tw > W / 2 and th > H / 2
+    # tiles shorter than min_tile are not used
+    assert PersonRoi().regions(320, 240) == [(0, 0, 320, 240)]
+
+def test_search_cycles_through_regions_downscaled():
+    roi = PersonRoi(detect_size=960)
+    rgb = np.zeros((H, W, 3), dtype=np.uint8)
+    regions = roi.regions(W, H)
+    for i in range(len(regions) + 1):
+        image, box = roi.image(rgb)
+        assert box == regions[i % len(regions)]
+        assert max(image.shape[:2]) <= 960
+    assert roi.searches == len(regions) + 1
+
+def test_to_frame_round_trips_pixels():
+    box = (400, 200, 1000, 800)
+    pts = person(500, 300, 300, 400)
+    norm = pts.copy()
+    norm[:, 0] = (pts[:, 0] - box[0]) / (box[2] - box[0])
+    norm[:, 1] = (pts[:, 1] - box[1]) / (box[3] - box[1])
+    out = PersonRoi.to_frame(norm, box, W, H)
+    np.testing.assert_array_equal(out[:, :2], np.round(pts[:, :2]))
+    np.testing.assert_array_equal(out[:, 2], pts[:, 2])
+    # model output outside the crop is clamped to the frame
+    out = PersonRoi.to_frame(np.array([[-5.0, -5.0, 1.0], [5.0, 5.0, 1.0]]), box, W, H)
+    np.testing.assert_array_equal(out[:, :2], [[0, 0], [W - 1, H - 1]])
+
+def test_update_pads_and_squares_the_box():
+    roi = PersonRoi(pad=0.5)
+    assert roi.update(person(800, 300, 100, 200), W, H)
+    x0, y0, x1, y1 = roi.box
+    # 200 px tall person padded by half its size on each side
+    assert (x1 - x0, y1 - y0) == (400, 400)
+    assert ((x0 + x1) / 2, (y0 + y1) / 2) == (850, 400)
+    assert roi.moves == 1
+
+def test_update_keeps_box_while_person_stays_inside():
+    roi = PersonRoi()
+    roi.update(person(800, 300, 100, 200), W, H)
+    box = roi.box
+    assert not roi.update(person(820, 310, 100, 200), W, H)
+    assert roi.box == box
+    # near the edge: the box follows
+    assert roi.update(person(950, 300, 100, 200), W, H)
+    assert roi.box != box
+    # much smaller inside the box: it shrinks
+    box = roi.box
+    assert roi.update(person(990, 380, 10, 40), W, H)
+    assert roi.box[2] - roi.box[0] < box[2] - box[0]
+
+def test_update_clamps_to_the_frame():
+    roi = PersonRoi()
+    roi.update(person(0, 900, 100, 180), W, H)
+    x0, y0, x1, y1 = roi.box
+    assert (x0, y1) == (0, H)
+    assert x1 - x0 == y1 - y0
+    # a box on the frame border does not move for a person touching that border
+    assert not roi.update(person(0, 895, 100, 185), W, H)
+    # larger than the frame: the whole frame along that axis
+    roi.update(person(100, 0, 300, H - 1), W, H)
+    assert (roi.box[1], roi.box[3]) == (0, H)
+
+def test_lost_restarts_the_search_at_the_whole_frame():
+    roi = PersonRoi()
+    rgb = np.zeros((H, W, 3), dtype=np.uint8)
+    roi.image(rgb)
+    roi.image(rgb)
+    roi.update(person(800, 300, 100, 200), W, H)
+    image, box = roi.image(rgb)
+    assert box == roi.box
+    assert max(image.shape[:2]) <= roi.size
+    roi.lost()
+    assert roi.box is None
+    assert roi.image(rgb)[1] == (0, 0, W, H)
+    assert roi.image(rgb)[1] == roi.regions(W, H)[1]
+
+@pytest.mark.parametrize("visible", [0, 3])
+def test_update_with_few_visible_landmarks_uses_all(visible):
+    xyvis = person(800, 300, 100, 200)
+    xyvis[:, 2] = 0.0
+    xyvis[2 : 2 + visible, 2] = 1.0
+    roi = PersonRoi(pad=0.0)
+    roi.update(xyvis, W, H)
+    assert roi.box[3] - roi.box[1] == 200
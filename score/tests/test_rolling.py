@@ -0,0 +1,55 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from score.rolling import RingBuffer, RingMedian, SlidingDFT
+
+def test_ring_buffer_matches_deque():
+    ring = RingBuffer(("a", "b"), 5)
+    ref: deque = deque(maxlen=5)
+    rng = np.random.default_rng(0)
+    for _ in range(23):
+        row = tuple(rng.normal(size=2))
+        ring.append(row)
+        ref.append(row)
+        assert len(ring) == len(ref)
+        assert ring.full == (len(ref) == 5)
+        for j, name in enumerate(("a", "b")):
+            head, tail = ring.window(name)
+            # views of the storage, never copies
+            assert np.shares_memory(head, ring.storage(name))
+            assert head.tolist() + tail.tolist() == [r[j] for r in ref]
+            assert ring.values(name) == [r[j] for r in ref]
+            assert ring.oldest(name) == ref[0][j]
+            assert ring.newest(name) == ref[-1][j]
+    with pytest.raises(IndexError):
+        ring.get("a", 5)
+    assert ring.nbytes == 2 * 5 * 8
+
+def test_ring_median_matches_np_median():
+    ring = RingBuffer(("x",), 7, dtype=np.float32)
+    median = RingMedian(ring, "x")
+    rng = np.random.default_rng(1)
+    # repeated values, so removal has to find the right position among equal ones
+    for x in rng.integers(0, 5, 60).astype(float):
+        if ring.full:
+            median.remove(ring.position(0))
+        pos = ring.advance()
+        ring.put("x", pos, x)
+        median.add(pos)
+        assert len(median) == len(ring)
+        assert median.median() == float(np.median(ring.values("x")))
+
+def test_sliding_dft_reset_from_rotated_ring():
+    w = 16
+    x = np.random.default_rng(2).normal(size=w)
+    ref = SlidingDFT(w)
+    ref.reset(x)
+    for start in range(w):
+        dft = SlidingDFT(w)
+        dft.reset(np.roll(x, start), start)
+        dft.update(1.0, x[0])
+        expect = np.abs(np.fft.rfft(np.r_[x[1:], 1.0]))
+        expect[0] = 0.0
+        assert np.allclose(dft.magnitudes(), expect, rtol=0, atol=1e-12)
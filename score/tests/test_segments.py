@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import pytest
+
+import app
+from score import workers
+from score.early_exit import EarlyExit
+from score.jobs import AnalysisCancelled, Progress
+from score.metrics import StageTimer
+from score.video import DecodeCounter
+from score.workers import ProgressBoard
+from tests.conftest import FakePose
+
+# PoseWorkerPool stand-in running tasks on threads of this process, with a real ProgressBoard
+class InlinePool:
+    def __init__(self, size: int = 2) -> None:
+        self.size = size
+        self.progress = ProgressBoard(multiprocessing.get_context("spawn"), 4 * size)
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def run_many(self, fn, calls):
+        results = await asyncio.gather(*(asyncio.to_thread(fn, *a, **k) for a, k in calls), return_exceptions=True)
+        for r in results:
+            if isinstance(r, BaseException):
+                raise r
+        return list(results)
+
+class SlowPose(FakePose):
+    def process(self, rgb):
+        time.sleep(0.01)
+        return super().process(rgb)
+
+# FakePose keyed on the decoded frame rather than the call count, so a segment that seeks
+# into the video sees the same landmarks as a serial run at every frame
+class FramePose(FakePose):
+    def __init__(self, index: Dict[bytes, int]) -> None:
+        super().__init__()
+        self.index = index
+
+    def process(self, rgb):
+        self.calls = self.index[hashlib.sha1(rgb.tobytes()).digest()]
+        return super().process(rgb)
+
+def frame_index(path) -> Dict[bytes, int]:
+    source = app._open_source(path, None, None)
+    try:
+        return {hashlib.sha1(rgb.tobytes()).digest(): idx for idx, rgb in source.frames(DecodeCounter(0), StageTimer())}
+    finally:
+        source.close()
+
+@pytest.fixture
+def inline_pool(monkeypatch):
+    pool = InlinePool()
+    monkeypatch.setattr(app, "pool", pool)
+    monkeypatch.setattr(workers, "_PROGRESS_CELLS", pool.progress.cells)
+    monkeypatch.setattr(workers, "get_pose", lambda *args: FakePose())
+    return pool
+
+KWARGS = dict(max_width=None, model_complexity=1, min_det_conf=0.5, min_track_conf=0.5, target_fps=None, roi=False)
+
+def test_segment_progress_counts_own_frames(video, fake_pose):
+    progress = Progress()
+    result = app.analyze_segment(str(video), 60, -1, warmup_frames=30, pose=fake_pose, progress=progress)
+    assert result["frames_analyzed"] == 60
+    assert (progress.done, progress.total) == (60, 60)
+
+def test_cancelled_segment_stops(video, fake_pose):
+    progress = Progress()
+    progress.cancel()
+    with pytest.raises(AnalysisCancelled):
+        app.analyze_segment(str(video), 0, -1, pose=fake_pose, progress=progress)
+
+def test_segmented_job_reports_progress(inline_pool, long_video):
+    progress = inline_pool.progress.acquire()
+    summary = asyncio.run(app._run_segmented(str(long_video), 2, "auto", False, progress=progress, **KWARGS))
+    assert summary.frames_processed == 360
+    assert (progress.done, progress.total) == (360, 360)
+    inline_pool.progress.release(progress)
+    assert len(inline_pool.progress._free) == inline_pool.progress.slots
+
+def test_cancelling_segmented_job_stops_every_segment(monkeypatch, inline_pool, long_video):
+    monkeypatch.setattr(workers, "get_pose", lambda *args: SlowPose())
+    monkeypatch.setattr(app, "JOB_PROGRESS_SECONDS", 0.01)
+    progress = inline_pool.progress.acquire()
+    progress.cancel()
+    t0 = time.perf_counter()
+    with pytest.raises(AnalysisCancelled):
+        asyncio.run(app._run_segmented(str(long_video), 2, "auto", False, progress=progress, **KWARGS))
+    # both segments (180 frames at 10 ms each) stopped long before running out
+    assert time.perf_counter() - t0 < 1.0
+    inline_pool.progress.release(progress)
+    assert len(inline_pool.progress._free) == inline_pool.progress.slots
+
+# the request path: /api/score passes every ScoreParams option, single-pass ones as None
+def test_pooled_segmented_analysis(inline_pool, long_video):
+    summary = asyncio.run(
+        app._run_analysis(
+            str(long_video),
+            segments=2,
+            mode="auto",
+            offline=False,
+            annotated_output_path=None,
+            early_exit=None,
+            landmark_dir=None,
+            video_hash="0" * 64,
+            **KWARGS,
+        )
+    )
+    assert summary.frames_processed == 360
+    assert summary.frames_analyzed == 360
+
+def test_pooled_early_exit_skips_stored_landmarks(inline_pool, tmp_path, video):
+    kwargs = dict(KWARGS, mode="auto", offline=False, landmark_dir=tmp_path, video_hash="0" * 64)
+    full = asyncio.run(app._run_analysis(str(video), early_exit=None, **kwargs))
+    assert full.landmark_key is not None
+    summary = asyncio.run(app._run_analysis(str(video), early_exit=EarlyExit(budget_frames=30), **kwargs))
+    assert summary.stopped_early
+    assert summary.frames_analyzed == 30
+
+# scoring runs once over the merged landmarks, so with a pose model that has no tracker state
+# the split-and-merge result is the serial one, field for field
+TIMING_FIELDS = {"processing_time_seconds", "stage_fps", "stage_timings"}
+
+def test_segmented_matches_serial(monkeypatch, inline_pool, long_video):
+    index = frame_index(str(long_video))
+    monkeypatch.setattr(app, "_open_pose", lambda pose, *args: (pose or FramePose(index), pose is None))
+    monkeypatch.setattr(app, "ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor(max_workers))
+    monkeypatch.setattr(workers, "get_pose", lambda *args: FramePose(index))
+    serial = app.analyze_video(str(long_video), pose=FramePose(index)).model_dump(exclude=TIMING_FIELDS)
+    segmented = app.analyze_video_segmented(str(long_video), 2)
+    pooled = asyncio.run(app._run_segmented(str(long_video), 2, "auto", False, **KWARGS))
+    assert serial["frames_analyzed"] == 360
+    assert segmented.model_dump(exclude=TIMING_FIELDS) == serial
+    assert pooled.model_dump(exclude=TIMING_FIELDS) == serial
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from bench.synthetic import landmark_sequence
+from features import Estimator, features_at, frame_features_batch, score_sequence, window_stats_batch
+
+def _streaming(table, fps, mode):
+    est = Estimator(fps=fps, mode=mode)
+    out = []
+    for i in range(len(table["valid"])):
+        est.push(features_at(table, i))
+        label, score, conf = est.detect()
+        out.append((label, score, conf, est._temporal_stats()))
+    return out
+
+def _sequence_table(fps):
+    # activity changes mid-sequence exercise the label hysteresis
+    parts = [landmark_sequence(a, int(4 * fps), fps=fps, seed=i) for i, a in enumerate(("walking", "running", "squat"))]
+    return frame_features_batch(np.concatenate(parts))
+
+@pytest.mark.parametrize("fps", [15.0, 30.0, 60.0])
+@pytest.mark.parametrize("mode", ["auto", "squat", "yoga"])
+def test_score_sequence_matches_streaming(fps, mode):
+    table = _sequence_table(fps)
+    seq = score_sequence(table, fps=fps, mode=mode)
+    stream = _streaming(table, fps, mode)
+    assert len(seq["labels"]) == len(stream)
+    for i, (label, score, conf, med) in enumerate(stream):
+        assert seq["labels"][i] == label
+        assert seq["scores"][i] == score
+        assert seq["confs"][i] == pytest.approx(conf, rel=1e-9, abs=1e-12)
+        assert bool(seq["has_stats"][i]) == (med is not None)
+        if med is not None:
+            for key, value in med.items():
+                assert seq["stats"][key][i] == pytest.approx(value, rel=1e-8, abs=1e-9), (i, key)
+
+def test_offline_analysis_matches_streaming(video, fake_pose):
+    import app
+
+    stream = app.analyze_video(str(video), pose=fake_pose)
+    offline = app.analyze_video(str(video), pose=fake_pose, offline=True)
+    assert offline.frames_analyzed == stream.frames_analyzed
+    assert offline.last_label == stream.last_label
+    assert offline.last_score == stream.last_score
+    assert offline.avg_score == stream.avg_score
+    assert offline._frames[0] == stream._frames[0]
+    assert offline._frames[2] == stream._frames[2]
+
+# longer than two 4096-row blocks: a window's stats depend on that window alone, so the
+# tail of a long clip matches the same frames scored as a short clip
+def test_window_stats_do_not_depend_on_blocks():
+    w = 90
+    table = frame_features_batch(landmark_sequence("running", 9000, fps=30.0, seed=5, missing_p=0.0))
+    start = 5000
+    tail = {k: v[start:] for k, v in table.items()}
+    full, _ = window_stats_batch(table, 30.0, w)
+    part, _ = window_stats_batch(tail, 30.0, w)
+    for key, values in full.items():
+        assert np.allclose(values[start + w :], part[key][w:], rtol=1e-12, atol=0), key
@@ -0,0 +1,51 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from score.upload import UploadError, receive_upload
+
+class StreamRequest:
+    def __init__(self, body: bytes, boundary: str, chunk: int = 7) -> None:
+        self.headers = {"content-type": f"multipart/form-data; boundary={boundary}", "content-length": str(len(body))}
+        self._body = body
+        self._chunk = chunk
+
+    async def stream(self):
+        for i in range(0, len(self._body), self._chunk):
+            yield self._body[i : i + self._chunk]
+
+def _form(boundary: str, data: bytes) -> bytes:
+    return (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"mode\"\r\n\r\nsquat\r\n"
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"clip.mp4\"\r\n"
+        "Content-Type: video/mp4\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+
+def test_receive_upload_streams_file_and_fields():
+    data = os.urandom(5000)
+    upload = asyncio.run(receive_upload(StreamRequest(_form("xyz", data), "xyz"), allowed_suffixes=(".mp4",)))
+    try:
+        assert upload.fields == {"mode": "squat"}
+        assert upload.filename == "clip.mp4"
+        assert upload.size == len(data)
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+        with open(upload.path, "rb") as f:
+            assert f.read() == data
+    finally:
+        upload.remove()
+
+def test_malformed_body_is_upload_error():
+    with pytest.raises(UploadError, match="Malformed"):
+        asyncio.run(receive_upload(StreamRequest(b"--xyz\r\nnot a header\r\n\r\n", "abc")))
+
+def test_malformed_body_is_400():
+    client = TestClient(app.app)
+    r = client.post(
+        "/api/score", content=b"garbage that is no multipart body", headers={"content-type": "multipart/form-data; boundary=abc"}
+    )
+    assert r.status_code == 400
+    assert "Malformed" in r.json()["detail"]
@@ -0,0 +1,125 @@
+import shutil
+import sys
+
+import numpy as np
+import pytest
+
+from score.metrics import StageTimer
+from score.video import (
+    DecodeCounter,
+    FFmpegSource,
+    FrameSource,
+    OpenCVSource,
+    ffmpeg_sync_option,
+    open_frame_source,
+    probe_video,
+)
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+def _decode(source, start=0, end=None):
+    counter = DecodeCounter(start)
+    with source:
+        frames = [(idx, rgb.copy()) for idx, rgb in source.frames(counter, StageTimer(), end)]
+    return frames, counter
+
+def test_frame_source_is_abstract(video):
+    with pytest.raises(TypeError):
+        FrameSource(probe_video(video), 1)
+
+# 120 frames at 30 fps: target_fps=10 keeps every 3rd frame counted from frame 0
+@pytest.mark.parametrize(
+    "max_width, target_fps, start, end",
+    [(None, None, 0, None), (160, None, 0, None), (None, 10.0, 0, None), (160, 10.0, 7, 50), (None, None, 119, None)],
+)
+def test_opencv_source_frames(video, max_width, target_fps, start, end):
+    frames, counter = _decode(OpenCVSource(video, max_width, target_fps, buffers=4), start, end)
+    stride = 3 if target_fps else 1
+    stop = 120 if end is None else end
+    assert [idx for idx, _ in frames] == [i for i in range(start, stop) if i % stride == 0]
+    assert counter.analyzed == len(frames)
+    assert counter.frame_idx == stop
+    h, w = (120, 160) if max_width else (240, 320)
+    assert all(rgb.shape == (h, w, 3) and rgb.dtype == np.uint8 for _, rgb in frames)
+
+@needs_ffmpeg
+@pytest.mark.parametrize(
+    "max_width, target_fps, start, end",
+    [(None, None, 0, None), (160, None, 0, None), (None, 10.0, 0, None), (160, 10.0, 7, 50), (None, 10.0, 61, None)],
+)
+def test_ffmpeg_source_matches_opencv(video, max_width, target_fps, start, end):
+    ref, ref_counter = _decode(OpenCVSource(video, max_width, target_fps, buffers=4), start, end)
+    got, counter = _decode(FFmpegSource(video, max_width, target_fps, buffers=4), start, end)
+    assert [idx for idx, _ in got] == [idx for idx, _ in ref]
+    assert (counter.frame_idx, counter.analyzed) == (ref_counter.frame_idx, ref_counter.analyzed)
+    for (_, a), (_, b) in zip(got, ref):
+        assert a.shape == b.shape
+        # same frames; the two decoders' YUV conversion and scaling differ slightly
+        assert np.mean(np.abs(a.astype(np.int16) - b.astype(np.int16))) < 4.0
+
+# an executable stand-in for ffmpeg: `-version` prints `version`, any other call runs `body`
+def _fake_ffmpeg(path, version: str, body: str = "sys.exit(1)\n"):
+    path.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "if sys.argv[1:] == ['-version']:\n"
+        f"    print('ffmpeg version {version} Copyright (c) 2000-2024 the FFmpeg developers')\n"
+        "    sys.exit(0)\n" + body
+    )
+    path.chmod(0o755)
+    return path
+
+# writes one frame, then fails like ffmpeg on a truncated input
+def test_ffmpeg_failure_after_frames_raises(video, tmp_path):
+    meta = probe_video(video)
+    fake = _fake_ffmpeg(
+        tmp_path / "ffmpeg",
+        "7.0",
+        f"sys.stdout.buffer.write(bytes({meta.out_w * meta.out_h * 3}))\n"
+        "sys.stderr.write('Invalid data found when processing input')\n"
+        "sys.exit(1)\n",
+    )
+    seen = []
+    with pytest.raises(RuntimeError, match="Invalid data"):
+        with FFmpegSource(video, None, None, buffers=2, binary=str(fake)) as source:
+            for idx, _ in source.frames(DecodeCounter(0), StageTimer()):
+                seen.append(idx)
+    assert seen == [0]
+
+@pytest.mark.parametrize(
+    "version, option",
+    [
+        ("4.4.2-0ubuntu0.22.04.1", "-vsync"),
+        ("5.0.3", "-vsync"),
+        ("n5.1.2", "-fps_mode"),
+        ("7.0.2-static", "-fps_mode"),
+        ("N-113542-g0b6a5f", "-fps_mode"),
+    ],
+)
+def test_ffmpeg_sync_option_by_version(tmp_path, version, option):
+    assert ffmpeg_sync_option(str(_fake_ffmpeg(tmp_path / "ffmpeg", version))) == option
+
+# ffmpeg before 5.1 rejects -fps_mode; the source passes -vsync instead
+def test_ffmpeg_source_on_old_ffmpeg(video, tmp_path):
+    meta = probe_video(video)
+    fake = _fake_ffmpeg(
+        tmp_path / "ffmpeg",
+        "4.4.2",
+        "if '-fps_mode' in sys.argv:\n"
+        "    sys.stderr.write(\"Unrecognized option 'fps_mode'.\")\n"
+        "    sys.exit(1)\n"
+        f"sys.stdout.buffer.write(bytes({2 * meta.out_w * meta.out_h * 3}))\n",
+    )
+    frames, counter = _decode(FFmpegSource(video, None, None, buffers=2, binary=str(fake)))
+    assert [idx for idx, _ in frames] == [0, 1]
+
+# auto mode falls back to OpenCV when the ffmpeg binary does not run
+def test_auto_source_skips_broken_ffmpeg(video, tmp_path):
+    broken = tmp_path / "ffmpeg"
+    broken.write_text("#!/bin/sh\nexit 127\n")
+    broken.chmod(0o755)
+    assert ffmpeg_sync_option(str(broken)) is None
+    with open_frame_source(video, backend="auto", ffmpeg=str(broken)) as source:
+        assert isinstance(source, OpenCVSource)
+    with pytest.raises(RuntimeError, match="does not run"):
+        FFmpegSource(video, None, None, binary=str(broken))
@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import app
+from features import Estimator, frame_features_from_xyvis
+from score.sessions import SessionRegistry
+from tests.conftest import FakePose
+
+FPS = 10.0
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, "sessions", SessionRegistry(1, pose_factory=lambda key: FakePose()))
+    return TestClient(app.app)
+
+@pytest.fixture(scope="module")
+def jpeg() -> bytes:
+    ok, data = cv2.imencode(".jpg", np.full((240, 320, 3), 128, dtype=np.uint8))
+    assert ok
+    return data.tobytes()
+
+# what the session should answer: FakePose landmarks through a fresh Estimator
+def expected(pose: FakePose, estimator: Estimator) -> tuple:
+    xyvis = app._pose_landmarks(pose, np.zeros((240, 320, 3), dtype=np.uint8), 320, 240)
+    estimator.push(frame_features_from_xyvis(xyvis))
+    return estimator.detect()
+
+def new_estimator() -> Estimator:
+    return Estimator(fps=FPS, window_seconds=3.0, stable_threshold=3, mode="auto")
+
+def test_frames_are_scored_and_reset_starts_a_new_window(client, jpeg):
+    pose, estimator = FakePose(), new_estimator()
+    with client.websocket_connect(f"/ws/score?fps={FPS}") as ws:
+        ready = ws.receive_json()
+        assert ready["type"] == "ready"
+        assert ready["window_size"] == estimator.window_size
+        for i in range(40):
+            ws.send_bytes(jpeg)
+            reply = ws.receive_json()
+            label, score, conf = expected(pose, estimator)
+            assert (reply["type"], reply["frame"], reply["detected"]) == ("result", i + 1, True)
+            assert (reply["label"], reply["score"]) == (label, score)
+            assert reply["conf"] == pytest.approx(conf)
+        assert reply["label"] != "unknown"
+
+        ws.send_json({"type": "reset"})
+        assert ws.receive_json() == {"type": "reset", "frame": 40}
+        estimator = new_estimator()
+        ws.send_bytes(jpeg)
+        reply = ws.receive_json()
+        assert (reply["frame"], reply["label"], reply["score"]) == (41, *expected(pose, estimator)[:2])
+
+        ws.send_text("hello")
+        assert ws.receive_json()["type"] == "error"
+    assert len(app.sessions) == 0
+
+def test_undecodable_frame_is_an_error(client):
+    with client.websocket_connect("/ws/score") as ws:
+        ws.receive_json()
+        ws.send_bytes(b"not an image")
+        assert ws.receive_json()["type"] == "error"
+
+def test_session_cap(client):
+    with client.websocket_connect("/ws/score") as first:
+        first.receive_json()
+        with client.websocket_connect("/ws/score") as second:
+            with pytest.raises(WebSocketDisconnect) as e:
+                second.receive_json()
+            assert e.value.code == 1013
+    # the first session's slot is free again
+    with client.websocket_connect("/ws/score") as ws:
+        assert ws.receive_json()["type"] == "ready"
+
+def test_idle_session_is_closed(monkeypatch, client):
+    monkeypatch.setattr(app, "WS_IDLE_TIMEOUT_SECONDS", 0.1)
+    with client.websocket_connect("/ws/score") as ws:
+        ws.receive_json()
+        with pytest.raises(WebSocketDisconnect) as e:
+            ws.receive_json()
+        assert e.value.code == 1000
+    assert len(app.sessions) == 0